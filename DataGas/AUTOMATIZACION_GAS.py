@@ -1,254 +1,270 @@
 import pandas as pd
 pd.set_option('display.float_format', '{:,.0f}'.format)
+import argparse
 import glob
 import os
-import re
 
+from agregacion_gas import agregar_niveles
+from almacen_gas import guardar_almacen
+from campos_gas import CampoResolver
+from esquema_gas import aplicar_esquema
+from etapas_gas import RegistroEtapas
+from lectura_gas import leer_archivos
+from manifiesto_gas import leer_archivos_incremental
+from reportes_gas import FILAS_MAXIMAS_EXCEL, escribir_reportes
 
-# Ruta donde están los archivos
-ruta_archivos = r"D:\Analisis producción de gas 2025\Bases_produccion_gas"
 
-# Buscar todos los archivos Excel de gas
-archivos = glob.glob(os.path.join(ruta_archivos, "Produccion_Fiscalizada_Gas_*.xlsx"))
+# Ruta donde están los archivos y Excel de cuencas (valores por defecto de --entrada y --cuencas)
+ruta_archivos = r"D:\Analisis producción de gas 2025\Bases_produccion_gas"
+archivo_cuencas = r"D:\Analisis producción de gas 2025\cuencas_campos_gas.xlsx"
 
-print("Archivos encontrados:")
-for archivo in archivos:
-	print(archivo)
+# Procesos para leer las hojas mensuales (1 = en serie, 0 = todos los núcleos)
+PROCESOS_LECTURA = int(os.environ.get('GAS_PROCESOS_LECTURA', 1))
+
+# Caché incremental: solo se leen los archivos nuevos o modificados (GAS_CACHE_LECTURA=0 lo desactiva)
+USAR_CACHE_LECTURA = os.environ.get('GAS_CACHE_LECTURA', '1') != '0'
+
+# Lector de hojas: 'pandas' (pd.read_excel) o 'streaming' (fila a fila con openpyxl, menos memoria)
+LECTOR_HOJAS = os.environ.get('GAS_LECTOR_HOJAS', 'pandas')
+
+# Procesos para escribir los reportes y formatos extra de cada hoja (p. ej. GAS_FORMATOS_REPORTE=csv,parquet)
+PROCESOS_ESCRITURA = int(os.environ.get('GAS_PROCESOS_ESCRITURA', 1))
+FORMATOS_REPORTE = [f for f in os.environ.get('GAS_FORMATOS_REPORTE', '').split(',') if f]
+
+
+def parsear_argumentos(argv=None):
+	parser = argparse.ArgumentParser(description="ETL de producción fiscalizada de gas")
+	parser.add_argument('--entrada', default=ruta_archivos,
+		help="Carpeta con los Produccion_Fiscalizada_Gas_YYYY.xlsx")
+	parser.add_argument('--salida', default=None,
+		help="Carpeta de los reportes y del almacén Parquet (por defecto, la de entrada)")
+	parser.add_argument('--cuencas', default=archivo_cuencas, help="Excel de cuencas por campo")
+	parser.add_argument('--procesos', type=int, default=PROCESOS_LECTURA,
+		help="Procesos de lectura (1 = en serie, 0 = todos los núcleos)")
+	parser.add_argument('--lector', choices=['pandas', 'streaming'], default=LECTOR_HOJAS,
+		help="Lector de las hojas mensuales")
+	parser.add_argument('--sin-cache', action='store_true', default=not USAR_CACHE_LECTURA,
+		help="Leer todos los archivos sin usar el caché incremental")
+	parser.add_argument('--cache', default=None,
+		help="Carpeta del caché incremental (por defecto <salida>/.cache_gas)")
+	parser.add_argument('--procesos-escritura', type=int, default=PROCESOS_ESCRITURA,
+		help="Procesos para escribir los reportes")
+	parser.add_argument('--formatos', default=','.join(FORMATOS_REPORTE),
+		help="Formatos extra de cada hoja de los reportes, p. ej. csv,parquet")
+	parser.add_argument('--reporte', default=None,
+		help="Reporte JSON de la corrida (por defecto <salida>/reporte_etl_gas.json)")
+	args = parser.parse_args(argv)
+	args.salida = args.salida or args.entrada
+	args.cache = args.cache or os.path.join(args.salida, '.cache_gas')
+	args.reporte = args.reporte or os.path.join(args.salida, 'reporte_etl_gas.json')
+	args.formatos = [f for f in args.formatos.split(',') if f]
+	return args
+
+
+def main(argv=None):
+	args = parsear_argumentos(argv)
+	os.makedirs(args.salida, exist_ok=True)
+	registro = RegistroEtapas(vars(args))
+
+	# Buscar todos los archivos Excel de gas
+	with registro.etapa('descubrir') as etapa:
+		archivos = glob.glob(os.path.join(args.entrada, "Produccion_Fiscalizada_Gas_*.xlsx"))
+		etapa.filas_salida = len(archivos)
+
+	print("Archivos encontrados:")
+	for archivo in archivos:
+		print(archivo)
+
+	# Leer y acumular todos los datos originales en una lista de DataFrames
+	with registro.etapa('leer', filas_entrada=len(archivos)) as etapa:
+		if args.sin_cache:
+			data_original = leer_archivos(archivos, procesos=args.procesos, lector=args.lector)
+		else:
+			data_original = leer_archivos_incremental(archivos, args.cache, procesos=args.procesos, lector=args.lector)
+		etapa.filas_salida = sum(len(df) for df in data_original)
 
-tablas_mensuales = []
-resumen_anual = []
-produccion_anual_por_campo = []
+	with registro.etapa('normalizar', filas_entrada=sum(len(df) for df in data_original)) as etapa:
+		df_all = normalizar(data_original)
+		del data_original
+		etapa.filas_salida = len(df_all)
 
+	with registro.etapa('cuencas', filas_entrada=len(df_all)) as etapa:
+		df_cuencas, df_merge = asignar_cuencas(df_all, args.cuencas)
+		etapa.filas_salida = len(df_merge)
+	diagnosticar_campos(df_cuencas, df_merge)
 
-# Leer y acumular todos los datos originales en una lista de DataFrames
-data_original = []
+	# Todos los resúmenes (anual detallado, mensual, mensual por campo, anual, por campo y por cuenca) en una sola pasada
+	with registro.etapa('agregar', filas_entrada=len(df_merge)) as etapa:
+		resumenes = agregar_niveles(df_merge)
+		etapa.filas_salida = sum(len(df) for df in resumenes.values())
 
-for archivo in archivos:
-	nombre_archivo = os.path.basename(archivo)
-	match = re.search(r'(20\d{2})', nombre_archivo)
-	if match:
-		anio = int(match.group(1))
-	else:
-		print(f"No se pudo extraer el año de: {nombre_archivo}")
-		continue
-	xls = pd.ExcelFile(archivo)
-	for hoja in xls.sheet_names[1:]:  # Omitir la primera hoja (Campos Mpcpd)
-		mes_match = re.match(r'([a-zA-Záéíóúñ]+)[- ]?\d{2}', hoja)
-		if mes_match:
-			mes = mes_match.group(1).lower()
-		else:
-			print(f"No se pudo extraer el mes de la hoja: {hoja}")
-			continue
-		df = pd.read_excel(xls, sheet_name=hoja)
-		df.columns = df.columns.str.replace('\n', ' ', regex=True).str.replace('\r', ' ', regex=True)
-		df.columns = df.columns.str.strip().str.upper()
-		# Normalizar nombre de columna de producción fiscalizada
-		prod_cols = [c for c in df.columns if 'PRODUCCION' in c and 'FISCALIZADA' in c]
-		if prod_cols:
-			prod_col = prod_cols[0]
-			if prod_col != 'PRODUCCION FISCALIZADA':
-				df['PRODUCCION FISCALIZADA'] = df[prod_col]
-		# Agregar año y mes
-		df['AÑO'] = anio
-		df['MES'] = mes
-		data_original.append(df)
-
-# Concatenar todos los datos originales
-df_all = pd.concat(data_original, ignore_index=True)
-
-# Mostrar las columnas disponibles en los datos para diagnóstico
-print("Columnas disponibles en los datos:")
-print(sorted(df_all.columns.tolist()))
-
-# Normalizar nombres de columnas y campos para consistencia
-columnas_requeridas = [
-	'AÑO', 'MES', 'CAMPO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO',
-	'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-	'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-]
-for col in columnas_requeridas:
-	if col not in df_all.columns:
-		df_all[col] = 0
-
-# Mapeo para corregir nombres problemáticos de campos
-MAPEO_CAMPOS = {
-	'Alligator': 'ALLIGATOR',
-	'CARAMELO UNIFICADO': 'CARAMELO',
-	'CHÁCHARO': 'CHACHARO',
-	'Canaguay': 'CANAGUAY',
-	'Coralillo': 'CORALILLO',
-	'LA LOMA': 'LA LOMA ynf',
-	'Lorito': 'LORITO',
-	'MAGICO EXPLORATORIO': 'CAMPO EXPLORATORIO MAGICO',
-	'MANA': 'MANÁ',
-	'Pandereta': 'PANDERETA',
-	'RECETPR WEST': 'RECETOR WEST',
-	'UNIFICADO PALOGRANDE': 'PALOGRANDE UNIFICADO',
-	'Unificado Río Ceibas': 'RIO CEIBAS',
-	'TIGANA ': 'TIGANA',
-	'TECA-COCORNA': 'AREA TECA-COCORNA',
-	'SANTO DOMINGO UNIFICADO': 'SANTO DOMINGO',
-}
-df_all['CAMPO_LIMPIO'] = df_all['CAMPO'].replace(MAPEO_CAMPOS)
-df_all['CAMPO_LIMPIO'] = df_all['CAMPO_LIMPIO'].fillna(df_all['CAMPO'])
-for col in ['PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-			'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS']:
-	if col not in df_all.columns:
-		df_all[col] = 0
-df_anual = df_all.groupby(['AÑO', 'CAMPO_LIMPIO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO'], as_index=False)[
-	[
-		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-	]
-].sum(numeric_only=True)
-
-# TOTALES MENSUALES (todas las variables)
-df_mensual = df_all.groupby(['AÑO', 'MES'], as_index=False)[
-	[
-		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-	]
-].sum(numeric_only=True)
-
-# TOTALES ANUALES (todas las variables)
-df_totales_anuales = df_all.groupby(['AÑO'], as_index=False)[
-	[
-		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-	]
-].sum(numeric_only=True)
+	with registro.etapa('exportar', filas_entrada=sum(len(df) for df in resumenes.values())) as etapa:
+		etapa.filas_salida = exportar(df_merge, resumenes, args)
 
-# ANUAL POR CAMPO
-df_anual_campo = df_all.groupby(['AÑO', 'CAMPO_LIMPIO'], as_index=False)[
-	[
-		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-	]
-].sum(numeric_only=True)
+	mostrar_sumatorias(resumenes)
 
+	print("\nTIEMPOS POR ETAPA:")
+	print(registro.resumen())
+	print(f"\nReporte de la corrida: {registro.guardar(args.reporte)}")
+	return registro
 
-# ANUAL POR CUENCA Y ASIGNACIÓN MANUAL DE CUENCA
-archivo_cuencas = r"D:\Analisis producción de gas 2025\cuencas_campos_gas.xlsx"
-df_cuencas = pd.read_excel(archivo_cuencas)
-df_cuencas.columns = df_cuencas.columns.str.strip().str.upper()
-
-df_merge = pd.merge(df_all, df_cuencas, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO')
-df_merge['CUENCA'] = df_merge['CUENCA'].fillna('SIN CUENCA')
-
-# Asignación manual de cuenca para campos faltantes
-import unicodedata
-MAPEO_CUENCAS_EXTRA = {
-	'CORAZON WEST 4': 'VMM',
-	'DIVIDIVI': 'VIM',
-	'GIGANTE CABALLOS': 'VSM',
-	'LOS ANGELES 12': 'VMM',
-	'PALERMO - SANTA CLARA UNIFICADO': 'VSM',
-	'TENAX': 'VSM',
-}
-def normalizar_campo(nombre):
-	if pd.isnull(nombre):
-		return ''
-	nombre = str(nombre).strip().upper()
-	nombre = unicodedata.normalize('NFKD', nombre).encode('ASCII', 'ignore').decode('utf-8')
-	nombre = nombre.replace('  ', ' ')
-	return nombre
-mapeo_cuencas_extra_norm = {normalizar_campo(k): v for k, v in MAPEO_CUENCAS_EXTRA.items()}
-df_merge['CUENCA'] = df_merge.apply(
-	lambda row: mapeo_cuencas_extra_norm.get(normalizar_campo(row['CAMPO_LIMPIO']), row['CUENCA'])
-	if row['CUENCA'] == 'SIN CUENCA' else row['CUENCA'], axis=1)
-
-
-# Mostrar solo los nombres de los campos que no coinciden exactamente con los del Excel de cuencas
-campos_cuencas = set(df_cuencas['CAMPO'].astype(str).str.strip().str.upper())
-campos_limpios = set(df_all['CAMPO_LIMPIO'].astype(str).str.strip().str.upper())
-no_coinciden = sorted(list(campos_limpios - campos_cuencas))
-if no_coinciden:
-	print("Campos en datos que no coinciden con el Excel de cuencas:")
-	for campo in no_coinciden:
-		print(campo)
-
-df_anual_cuenca = df_merge.groupby(['AÑO', 'CUENCA'], as_index=False)[
-	[
-		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
-	]
-].sum(numeric_only=True)
 
-# Mostrar en consola los nombres de los campos que no tienen cuenca asignada
-campos_sin_cuenca = df_merge[df_merge['CUENCA'] == 'SIN CUENCA']['CAMPO_LIMPIO'].drop_duplicates().tolist()
-if campos_sin_cuenca:
-	print("\nCampos sin cuenca asignada (no aparecen en el Excel de cuencas ni en el mapeo extra):")
-	for campo in campos_sin_cuenca:
-		print(campo)
+def normalizar(data_original):
+	"""Tabla de hechos con todas las columnas requeridas y los tipos del esquema"""
+	# Concatenar todos los datos originales
+	df_all = pd.concat(data_original, ignore_index=True)
 
+	# Mostrar las columnas disponibles en los datos para diagnóstico
+	print("Columnas disponibles en los datos:")
+	print(sorted(df_all.columns.tolist()))
 
-# EXPORTAR TODO EN UN SOLO EXCEL
-output_excel = os.path.join(ruta_archivos, "produccion_gas_resumenes.xlsx")
-# Agrupar solo por AÑO y CAMPO_LIMPIO para la hoja Sumatoria_Anual
-df_sum_anual = df_all.groupby(['AÑO', 'CAMPO_LIMPIO'], as_index=False)[
-	[
+	# Normalizar nombres de columnas y campos para consistencia
+	columnas_requeridas = [
+		'AÑO', 'MES', 'CAMPO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO',
 		'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
 		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
 	]
-].sum(numeric_only=True)
-# Agregar departamento, municipio y cuenca
-campos_info = df_merge.drop_duplicates(subset=['CAMPO_LIMPIO'])[['CAMPO_LIMPIO', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA']]
-df_sum_anual = pd.merge(df_sum_anual, campos_info, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO_LIMPIO')
-cols = [c for c in ['AÑO', 'CAMPO_LIMPIO', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA', 'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
-	'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'] if c in df_sum_anual.columns]
-with pd.ExcelWriter(output_excel) as writer:
-	df_sum_anual[cols].to_excel(writer, sheet_name="Sumatoria_Anual", index=False)
-	df_anual_campo.to_excel(writer, sheet_name="Anual_Por_Campo", index=False)
-	df_anual_cuenca.to_excel(writer, sheet_name="Anual_Por_Cuenca", index=False)
-	df_mensual.to_excel(writer, sheet_name="Totales_Mensuales", index=False)
-	df_totales_anuales.to_excel(writer, sheet_name="Totales_Anuales", index=False)
-print(f"\nArchivo Excel generado con todas las hojas: {output_excel}")
-
-# Exportar segundo Excel tipo serie de tiempo anual solo fiscalizada
-
-# Pivot: años como columnas, campos/cuencas como filas
-serie_campo_pivot = df_anual_campo.pivot(index='CAMPO_LIMPIO', columns='AÑO', values='PRODUCCION FISCALIZADA').sort_index()
-serie_campo_pivot = serie_campo_pivot.reset_index()
-serie_cuenca_pivot = df_anual_cuenca.pivot(index='CUENCA', columns='AÑO', values='PRODUCCION FISCALIZADA').sort_index()
-serie_cuenca_pivot = serie_cuenca_pivot.reset_index()
-output_excel_serie = os.path.join(ruta_archivos, "serie_tiempo_gas.xlsx")
-with pd.ExcelWriter(output_excel_serie) as writer:
-	serie_campo_pivot.to_excel(writer, sheet_name="Serie_Campo", index=False)
-	serie_cuenca_pivot.to_excel(writer, sheet_name="Serie_Cuenca", index=False)
+	for col in columnas_requeridas:
+		if col not in df_all.columns:
+			df_all[col] = 0
+	# Tipos del esquema: dimensiones categóricas, AÑO int16, MES ordenado y métricas float64
+	return aplicar_esquema(df_all, columnas_requeridas)
+
+
+def asignar_cuencas(df_all, archivo_cuencas):
+	"""Excel de cuencas y tabla de hechos con CAMPO_LIMPIO y CUENCA"""
+	# Excel de cuencas y resolución de nombres de campo (MAPEO_CAMPOS en campos_gas)
+	df_cuencas = pd.read_excel(archivo_cuencas)
+	df_cuencas.columns = df_cuencas.columns.str.strip().str.upper()
+	resolver = CampoResolver(df_cuencas)
+
+	df_all['CAMPO_LIMPIO'] = resolver.limpiar(df_all['CAMPO'])
+
+	# CUENCA: Excel de cuencas y, para los campos faltantes, MAPEO_CUENCAS_EXTRA
+	df_merge = aplicar_esquema(df_all.assign(CUENCA=resolver.cuencas(df_all['CAMPO_LIMPIO'])))
+	return df_cuencas, df_merge
+
+
+def diagnosticar_campos(df_cuencas, df_merge):
+	# Mostrar solo los nombres de los campos que no coinciden exactamente con los del Excel de cuencas
+	campos_cuencas = set(df_cuencas['CAMPO'].astype(str).str.strip().str.upper())
+	campos_limpios = set(df_merge['CAMPO_LIMPIO'].astype(str).str.strip().str.upper())
+	no_coinciden = sorted(list(campos_limpios - campos_cuencas))
+	if no_coinciden:
+		print("Campos en datos que no coinciden con el Excel de cuencas:")
+		for campo in no_coinciden:
+			print(campo)
+
+	# Mostrar en consola los nombres de los campos que no tienen cuenca asignada
+	campos_sin_cuenca = df_merge[df_merge['CUENCA'] == 'SIN CUENCA']['CAMPO_LIMPIO'].drop_duplicates().tolist()
+	if campos_sin_cuenca:
+		print("\nCampos sin cuenca asignada (no aparecen en el Excel de cuencas ni en el mapeo extra):")
+		for campo in campos_sin_cuenca:
+			print(campo)
+
+
+def exportar(df_merge, resumenes, args):
+	"""Escribir los reportes de Excel y el almacén Parquet; devuelve las filas escritas"""
+	df_mensual = resumenes['Totales_Mensuales']
+	df_mensual_campo = resumenes['Mensual_Por_Campo']
+	df_totales_anuales = resumenes['Totales_Anuales']
+	df_anual_campo = resumenes['Anual_Por_Campo']
+	df_anual_cuenca = resumenes['Anual_Por_Cuenca']
+
+	# EXPORTAR TODO EN UN SOLO EXCEL
+	output_excel = os.path.join(args.salida, "produccion_gas_resumenes.xlsx")
+	# Agrupar solo por AÑO y CAMPO_LIMPIO para la hoja Sumatoria_Anual
+	df_sum_anual = df_anual_campo
+	# Agregar departamento, municipio y cuenca
+	campos_info = df_merge.drop_duplicates(subset=['CAMPO_LIMPIO'])[['CAMPO_LIMPIO', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA']]
+	df_sum_anual = pd.merge(df_sum_anual, campos_info, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO_LIMPIO')
+	cols = [c for c in ['AÑO', 'CAMPO_LIMPIO', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA', 'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
+		'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'] if c in df_sum_anual.columns]
+
+	# Segundo Excel tipo serie de tiempo anual solo fiscalizada
+	output_excel_serie = os.path.join(args.salida, "serie_tiempo_gas.xlsx")
+
+	# Pivot: años como columnas, campos/cuencas como filas (cada uno se calcula una sola vez)
+	serie_campo_pivot = df_anual_campo.pivot(index='CAMPO_LIMPIO', columns='AÑO', values='PRODUCCION FISCALIZADA').sort_index()
+	serie_campo_pivot = serie_campo_pivot.reset_index()
+	serie_cuenca_pivot = df_anual_cuenca.pivot(index='CUENCA', columns='AÑO', values='PRODUCCION FISCALIZADA').sort_index()
+	serie_cuenca_pivot = serie_cuenca_pivot.reset_index()
 	# Nueva hoja: CAMPO, CUENCA y serie de tiempo anual
-	# Unir df_anual_campo con cuenca
+	# Unir la serie por campo con cuenca
 	campos_cuenca = df_merge.drop_duplicates(subset=['CAMPO_LIMPIO', 'CUENCA'])[['CAMPO_LIMPIO', 'CUENCA']]
-	serie_campo = df_anual_campo.pivot(index='CAMPO_LIMPIO', columns='AÑO', values='PRODUCCION FISCALIZADA').reset_index()
-	serie_campo = pd.merge(serie_campo, campos_cuenca, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO_LIMPIO')
+	serie_campo = pd.merge(serie_campo_pivot, campos_cuenca, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO_LIMPIO')
 	# Reordenar columnas: CAMPO, CUENCA, años...
-	cols = ['CAMPO_LIMPIO', 'CUENCA'] + [c for c in serie_campo.columns if c not in ['CAMPO_LIMPIO', 'CUENCA']]
-	serie_campo = serie_campo[cols]
-	serie_campo = serie_campo.rename(columns={'CAMPO_LIMPIO': 'CAMPO'})
-	serie_campo.to_excel(writer, sheet_name="Serie_Campo_Cuenca", index=False)
-print(f"\nArchivo de serie de tiempo generado: {output_excel_serie}")
-
-# Mostrar sumatoria mensual y anual de gas fiscalizada
-print("SUMATORIA MENSUAL DE GAS FISCALIZADA: ")
-
-if 'PRODUCCION FISCALIZADA' in df_mensual.columns:
-	print(df_mensual[['AÑO', 'MES', 'PRODUCCION FISCALIZADA']].to_string(index=False))
-
-	# Mostrar tabla pivote: años como filas, meses como columnas
-	meses_orden = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-	df_pivot = df_mensual.pivot(index='AÑO', columns='MES', values='PRODUCCION FISCALIZADA')
-	# Reordenar columnas de meses si existen
-	df_pivot = df_pivot.reindex(columns=meses_orden, fill_value=0)
-	print("\nTOTAL MENSUAL DE CADA AÑO (PRODUCCION FISCALIZADA):")
-	print(df_pivot.to_string())
-else:
-	print("No hay datos de PRODUCCION FISCALIZADA en los totales mensuales.")
+	cols_serie = ['CAMPO_LIMPIO', 'CUENCA'] + [c for c in serie_campo.columns if c not in ['CAMPO_LIMPIO', 'CUENCA']]
+	serie_campo = serie_campo[cols_serie].rename(columns={'CAMPO_LIMPIO': 'CAMPO'})
+
+	reportes = {
+		output_excel: {
+			'Sumatoria_Anual': df_sum_anual[cols],
+			'Anual_Por_Campo': df_anual_campo,
+			'Anual_Por_Cuenca': df_anual_cuenca,
+			'Totales_Mensuales': df_mensual,
+			'Totales_Anuales': df_totales_anuales,
+		},
+		output_excel_serie: {
+			'Serie_Campo': serie_campo_pivot,
+			'Serie_Cuenca': serie_cuenca_pivot,
+			'Serie_Campo_Cuenca': serie_campo,
+		},
+	}
+	# Producción mensual por campo para la vista mensual del dashboard; si no cabe
+	# en una hoja de Excel queda solo en el almacén Parquet
+	if len(df_mensual_campo) < FILAS_MAXIMAS_EXCEL:
+		reportes[output_excel]['Mensual_Por_Campo'] = df_mensual_campo
+	else:
+		print(f"\nMensual_Por_Campo tiene {len(df_mensual_campo)} filas, más de las que admite Excel; va solo al almacén Parquet")
+	escribir_reportes(reportes, formatos=args.formatos, procesos=args.procesos_escritura)
+	print(f"\nArchivo Excel generado con todas las hojas: {output_excel}")
+	print(f"\nArchivo de serie de tiempo generado: {output_excel_serie}")
+
+	# Almacén columnar (Parquet) con la tabla de hechos y los resúmenes para el dashboard
+	tablas = {
+		'Hechos': df_merge,
+		'Totales_Anuales': df_totales_anuales,
+		'Totales_Mensuales': df_mensual,
+		'Mensual_Por_Campo': df_mensual_campo,
+		'Anual_Por_Cuenca': df_anual_cuenca,
+		'Anual_Por_Campo': df_anual_campo,
+		'Sumatoria_Anual': df_sum_anual,
+	}
+	dir_almacen = guardar_almacen(tablas, args.salida)
+	if dir_almacen:
+		print(f"\nAlmacén Parquet generado: {dir_almacen}")
+	return sum(len(df) for hojas in reportes.values() for df in hojas.values()) + sum(len(df) for df in tablas.values())
+
+
+def mostrar_sumatorias(resumenes):
+	df_mensual = resumenes['Totales_Mensuales']
+	df_totales_anuales = resumenes['Totales_Anuales']
+
+	# Mostrar sumatoria mensual y anual de gas fiscalizada
+	print("SUMATORIA MENSUAL DE GAS FISCALIZADA: ")
+
+	if 'PRODUCCION FISCALIZADA' in df_mensual.columns:
+		print(df_mensual[['AÑO', 'MES', 'PRODUCCION FISCALIZADA']].to_string(index=False))
+
+		# Mostrar tabla pivote: años como filas, meses como columnas
+		meses_orden = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+		df_pivot = df_mensual.pivot(index='AÑO', columns='MES', values='PRODUCCION FISCALIZADA')
+		# Reordenar columnas de meses si existen
+		df_pivot = df_pivot.reindex(columns=meses_orden, fill_value=0)
+		print("\nTOTAL MENSUAL DE CADA AÑO (PRODUCCION FISCALIZADA):")
+		print(df_pivot.to_string())
+	else:
+		print("No hay datos de PRODUCCION FISCALIZADA en los totales mensuales.")
 
 
-print("SUMATORIA ANUAL DE GAS FISCALIZADA:")
+	print("SUMATORIA ANUAL DE GAS FISCALIZADA:")
 
-if 'PRODUCCION FISCALIZADA' in df_totales_anuales.columns:
-	print(df_totales_anuales[['AÑO', 'PRODUCCION FISCALIZADA']].to_string(index=False))
-else:
-	print("No hay datos de PRODUCCION FISCALIZADA en los totales anuales.")
+	if 'PRODUCCION FISCALIZADA' in df_totales_anuales.columns:
+		print(df_totales_anuales[['AÑO', 'PRODUCCION FISCALIZADA']].to_string(index=False))
+	else:
+		print("No hay datos de PRODUCCION FISCALIZADA en los totales anuales.")
 
 
+if __name__ == '__main__':
+	main()
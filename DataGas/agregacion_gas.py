@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from esquema_gas import COLUMNAS_METRICAS
+
+
+# Motor de agregación por niveles (grouping sets) para los resúmenes del ETL.
+# Las columnas de agrupación se factorizan una sola vez, las filas de hechos se
+# recorren en una única pasada hasta el nivel más fino y cada nivel pedido se
+# calcula a partir del nivel ya agregado más pequeño que lo contiene.
+
+# Niveles de los resúmenes del ETL, con el nombre de su hoja de Excel
+NIVELES_RESUMEN = {
+	'Anual_Detalle': ['AÑO', 'CAMPO_LIMPIO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO'],
+	'Mensual_Por_Campo': ['AÑO', 'MES', 'CAMPO_LIMPIO'],
+	'Totales_Mensuales': ['AÑO', 'MES'],
+	'Totales_Anuales': ['AÑO'],
+	'Anual_Por_Campo': ['AÑO', 'CAMPO_LIMPIO'],
+	'Anual_Por_Cuenca': ['AÑO', 'CUENCA'],
+}
+
+
+def _decodificar(cubo, claves, unicos, metricas):
+	"""Pasar de códigos a valores y descartar los grupos con claves nulas (como groupby)"""
+	validos = (cubo[claves] >= 0).all(axis=1).to_numpy()
+	cubo = cubo[validos]
+	columnas = {c: unicos[c].take(cubo[c].to_numpy()) for c in claves}
+	columnas.update({m: cubo[m].to_numpy() for m in metricas})
+	return pd.DataFrame(columnas)
+
+
+def agregar_niveles(df, niveles=NIVELES_RESUMEN, metricas=COLUMNAS_METRICAS):
+	"""Suma de las métricas para cada nivel de agrupación, en una sola pasada sobre df.
+
+	niveles es un diccionario nombre -> columnas de agrupación. Cada resultado es
+	igual a df.groupby(columnas, as_index=False)[metricas].sum(numeric_only=True):
+	ordenado por las claves y sin los grupos con alguna clave nula.
+	"""
+	claves = list(dict.fromkeys(c for columnas in niveles.values() for c in columnas))
+	metricas = [m for m in metricas if pd.api.types.is_numeric_dtype(df[m])]
+
+	# Factorizar una sola vez cada columna de agrupación (los nulos quedan con código -1)
+	codigos, unicos = {}, {}
+	for c in claves:
+		if isinstance(df[c].dtype, pd.CategoricalDtype):
+			# Las categóricas ya traen sus códigos; se ordenan por el orden de categorías
+			codigos[c], unicos[c] = df[c].cat.codes.to_numpy(np.int64), df[c].cat.categories
+		else:
+			codigos[c], unicos[c] = pd.factorize(df[c], sort=True)
+
+	# Un único código de grupo por fila combinando los códigos de todas las claves;
+	# se compacta después de cada clave para que nunca se desborde
+	grupo = np.zeros(len(df), dtype=np.int64)
+	for c in claves:
+		grupo = grupo * (len(unicos[c]) + 1) + (codigos[c] + 1)
+		grupo, _ = pd.factorize(grupo)
+
+	# Única pasada sobre las filas de hechos: nivel más fino con todas las claves
+	valores = pd.DataFrame({m: df[m].reset_index(drop=True) for m in metricas})
+	base = valores.groupby(grupo, sort=True).sum()
+	_, primeras = np.unique(grupo, return_index=True)
+	for c in claves:
+		base[c] = codigos[c][primeras]
+	base = base.reset_index(drop=True)
+
+	# Niveles de más fino a más grueso; cada uno sale del cubo más pequeño que lo contiene
+	cubos = [(set(claves), base)]
+	resultados = {}
+	for nombre, columnas in sorted(niveles.items(), key=lambda nivel: -len(nivel[1])):
+		columnas = list(columnas)
+		padre = min((cubo for claves_cubo, cubo in cubos if set(columnas) <= claves_cubo), key=len)
+		cubo = padre.groupby(columnas, sort=True)[metricas].sum().reset_index()
+		cubos.append((set(columnas), cubo))
+		resultados[nombre] = _decodificar(cubo, columnas, unicos, metricas)
+	return {nombre: resultados[nombre] for nombre in niveles}
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+
+from esquema_gas import COLUMNAS_METRICAS, aplicar_esquema
+
+
+# Almacén columnar (Parquet) con la tabla de hechos mensual y los resúmenes que
+# consume el dashboard. Leer Parquet es mucho más rápido que volver a abrir los Excel.
+
+DIR_ALMACEN = 'produccion_gas_parquet'
+
+# Tablas del almacén y sus columnas de dimensión (las métricas van siempre al final)
+TABLAS = {
+	'Hechos': ['AÑO', 'MES', 'CAMPO', 'CAMPO_LIMPIO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA'],
+	'Totales_Anuales': ['AÑO'],
+	'Totales_Mensuales': ['AÑO', 'MES'],
+	'Mensual_Por_Campo': ['AÑO', 'MES', 'CAMPO_LIMPIO'],
+	'Anual_Por_Cuenca': ['AÑO', 'CUENCA'],
+	'Anual_Por_Campo': ['AÑO', 'CAMPO_LIMPIO'],
+	'Sumatoria_Anual': ['AÑO', 'CAMPO_LIMPIO', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA'],
+}
+
+
+def parquet_disponible():
+	"""True si hay un motor de Parquet instalado (pyarrow)"""
+	try:
+		import pyarrow  # noqa: F401
+	except ImportError:
+		return False
+	return True
+
+
+def tipar_tabla(df, nombre):
+	"""Seleccionar las columnas de la tabla y aplicarles los tipos del esquema"""
+	columnas = [c for c in TABLAS[nombre] + COLUMNAS_METRICAS if c in df.columns]
+	return aplicar_esquema(df[columnas])
+
+
+def guardar_almacen(tablas, dir_salida):
+	"""Escribir cada tabla como <dir_salida>/produccion_gas_parquet/<nombre>.parquet"""
+	if not parquet_disponible():
+		print("pyarrow no está instalado, no se genera el almacén Parquet")
+		return None
+	dir_almacen = os.path.join(dir_salida, DIR_ALMACEN)
+	os.makedirs(dir_almacen, exist_ok=True)
+	for nombre, df in tablas.items():
+		ruta = os.path.join(dir_almacen, f'{nombre}.parquet')
+		# Escritura atómica para que el dashboard nunca lea un archivo a medias
+		tipar_tabla(df, nombre).to_parquet(ruta + '.tmp', index=False, engine='pyarrow')
+		os.replace(ruta + '.tmp', ruta)
+	return dir_almacen
+
+
+def cargar_tabla(dir_almacen, nombre):
+	"""Leer una tabla del almacén y validarla contra el esquema"""
+	df = pd.read_parquet(os.path.join(dir_almacen, f'{nombre}.parquet'), engine='pyarrow')
+	return aplicar_esquema(df, TABLAS[nombre])
+
+
+def almacen_completo(dir_almacen, nombres):
+	"""True si el almacén existe y contiene todas las tablas pedidas"""
+	return parquet_disponible() and all(
+		os.path.exists(os.path.join(dir_almacen, f'{nombre}.parquet')) for nombre in nombres)
@@ -0,0 +1,351 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+
+# Benchmarks del ETL y del dashboard, sin red, sobre los libros del repositorio
+# y sobre esos mismos datos escalados (cada campo, cuenca y departamento se repite
+# con otro nombre). Cada corrida se agrega a un historial JSON; --comparar la
+# compara con una corrida anterior y marca como regresión lo que se haya vuelto
+# más lento que el umbral, para revisarlo antes de desplegar.
+#
+#   python DataGas/benchmark_gas.py --escalas 1,10 --comparar --fallar
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parsear_argumentos(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmarks del ETL y de las pestañas del dashboard de gas")
+	parser.add_argument('--entrada', default=DIR_REPO,
+		help="Carpeta con los Produccion_Fiscalizada_Gas_YYYY.xlsx y produccion_gas_resumenes.xlsx")
+	parser.add_argument('--cuencas', default=None,
+		help="Excel de cuencas por campo (por defecto se toma CAMPO_LIMPIO/CUENCA de produccion_gas_resumenes.xlsx)")
+	parser.add_argument('--escalas', default='1,10', help="Factores de escala de los datos, p. ej. 1,10,100")
+	parser.add_argument('--solo', choices=['etl', 'tablero'], default=None, help="Correr solo una de las dos partes")
+	parser.add_argument('--repeticiones', type=int, default=5, help="Repeticiones de cada pestaña")
+	parser.add_argument('--repeticiones-etl', type=int, default=1, help="Repeticiones del ETL completo")
+	parser.add_argument('--historial', default=os.path.join(DIR_REPO, '.cache_gas', 'historial_benchmark_gas.json'),
+		help="Archivo JSON donde se acumulan las corridas (por defecto en .cache_gas/, fuera de git)")
+	parser.add_argument('--comparar', nargs='?', const='anterior', default=None,
+		help="Comparar con la corrida anterior del historial o con la de un commit (prefijo)")
+	parser.add_argument('--umbral', type=float, default=0.2, help="Fracción de tiempo extra que cuenta como regresión")
+	parser.add_argument('--minimo-ms', type=float, default=5,
+		help="Diferencia mínima en ms para contar una regresión (evita el ruido en lo que tarda pocos ms)")
+	parser.add_argument('--fallar', action='store_true', help="Salir con código 1 si hay regresiones")
+	args = parser.parse_args(argv)
+	args.escalas = [int(e) for e in args.escalas.split(',') if e]
+	# El benchmark del dashboard se corre desde la carpeta de entrada
+	args.entrada = os.path.abspath(args.entrada)
+	return args
+
+
+def estadisticas(tiempos, **extra):
+	"""Mediana, mínimo y media en segundos de una lista de tiempos"""
+	return dict(mediana=round(statistics.median(tiempos), 6), minimo=round(min(tiempos), 6),
+		media=round(statistics.fmean(tiempos), 6), repeticiones=len(tiempos), **extra)
+
+
+def medir(funcion, repeticiones, calentar=True):
+	"""(estadísticas, último resultado) de llamar funcion() repeticiones veces"""
+	if calentar:
+		funcion()
+	tiempos = []
+	for _ in range(repeticiones):
+		inicio = time.perf_counter()
+		resultado = funcion()
+		tiempos.append(time.perf_counter() - inicio)
+	return estadisticas(tiempos), resultado
+
+
+def escalar(df, columna, factor):
+	"""df con factor copias de sus filas; en la copia i los valores de columna llevan el sufijo ' #i'"""
+	if factor <= 1:
+		return df
+	copias = [df]
+	for i in range(1, factor):
+		copia = df.copy()
+		copia[columna] = copia[columna].astype(str) + f' #{i}'
+		copias.append(copia)
+	escalado = pd.concat(copias, ignore_index=True)
+	if isinstance(df[columna].dtype, pd.CategoricalDtype):
+		escalado[columna] = escalado[columna].astype('category')
+	return escalado
+
+
+def tabla_cuencas(args, dir_temporal):
+	"""Ruta del Excel de cuencas; sin --cuencas se arma con los campos del resumen del repositorio"""
+	if args.cuencas:
+		return args.cuencas
+	from reportes_gas import leer_sumatoria
+	sumatoria = leer_sumatoria(os.path.join(args.entrada, 'produccion_gas_resumenes.xlsx'))
+	cuencas = sumatoria[['CAMPO_LIMPIO', 'CUENCA']].rename(columns={'CAMPO_LIMPIO': 'CAMPO'}).drop_duplicates('CAMPO')
+	ruta = os.path.join(dir_temporal, 'cuencas_campos_gas.xlsx')
+	cuencas.to_excel(ruta, index=False)
+	return ruta
+
+
+# --- ETL ---
+
+def benchmark_etl(args, dir_temporal):
+	"""Tiempo de cada etapa del ETL (leer, normalizar, cuencas, agregar, exportar) por escala"""
+	import AUTOMATIZACION_GAS as etl
+	from etapas_gas import RegistroEtapas
+	from lectura_gas import leer_archivos
+
+	archivos = sorted(glob.glob(os.path.join(args.entrada, 'Produccion_Fiscalizada_Gas_*.xlsx')))
+	if not archivos:
+		print(f"⚠️ No hay libros Produccion_Fiscalizada_Gas_*.xlsx en {args.entrada}, se omite el ETL")
+		return {}
+	ruta_cuencas = tabla_cuencas(args, dir_temporal)
+	df_cuencas_base = pd.read_excel(ruta_cuencas)
+
+	# Los libros solo existen a escala 1: se leen (y se mide la lectura) una vez y las
+	# demás escalas parten de esas mismas hojas
+	registro_lectura = RegistroEtapas()
+	for _ in range(args.repeticiones_etl):
+		with registro_lectura.etapa('leer', filas_entrada=len(archivos)) as etapa:
+			hojas = leer_archivos(archivos)
+			etapa.filas_salida = sum(len(df) for df in hojas)
+	resultados = {'etl.leer.x1': estadisticas([e.segundos for e in registro_lectura.etapas],
+		filas=registro_lectura.etapas[-1].filas_salida, memoria_pico_mb=registro_lectura.etapas[-1].memoria_pico_mb)}
+
+	for escala in args.escalas:
+		hojas_escala = [escalar(df, 'CAMPO', escala) for df in hojas]
+		ruta_escala = ruta_cuencas
+		if escala > 1:
+			ruta_escala = os.path.join(dir_temporal, f'cuencas_x{escala}.xlsx')
+			escalar(df_cuencas_base, 'CAMPO', escala).to_excel(ruta_escala, index=False)
+		salida = os.path.join(dir_temporal, f'salida_x{escala}')
+		os.makedirs(salida, exist_ok=True)
+		argumentos = etl.parsear_argumentos(['--entrada', dir_temporal, '--salida', salida, '--cuencas', ruta_escala])
+
+		registro = RegistroEtapas({'escala': escala})
+		for _ in range(args.repeticiones_etl):
+			filas = sum(len(df) for df in hojas_escala)
+			with registro.etapa('normalizar', filas_entrada=filas) as etapa:
+				df_all = etl.normalizar(hojas_escala)
+				etapa.filas_salida = len(df_all)
+			with registro.etapa('cuencas', filas_entrada=len(df_all)) as etapa:
+				_, df_merge = etl.asignar_cuencas(df_all, ruta_escala)
+				etapa.filas_salida = len(df_merge)
+			with registro.etapa('agregar', filas_entrada=len(df_merge)) as etapa:
+				resumenes = etl.agregar_niveles(df_merge)
+				etapa.filas_salida = sum(len(df) for df in resumenes.values())
+			with registro.etapa('exportar', filas_entrada=sum(len(df) for df in resumenes.values())) as etapa:
+				etapa.filas_salida = etl.exportar(df_merge, resumenes, argumentos)
+
+		for nombre in dict.fromkeys(e.nombre for e in registro.etapas):
+			etapas = [e for e in registro.etapas if e.nombre == nombre]
+			resultados[f'etl.{nombre}.x{escala}'] = estadisticas(
+				[e.segundos for e in etapas], filas=etapas[-1].filas_entrada, memoria_pico_mb=etapas[-1].memoria_pico_mb)
+	return resultados
+
+
+def mensual_por_campo(args, dir_temporal):
+	"""Producción mensual por campo calculada con el ETL desde los libros, o None si no hay libros"""
+	import AUTOMATIZACION_GAS as etl
+	from agregacion_gas import NIVELES_RESUMEN
+	from esquema_gas import aplicar_esquema
+	from lectura_gas import leer_archivos
+
+	archivos = sorted(glob.glob(os.path.join(args.entrada, 'Produccion_Fiscalizada_Gas_*.xlsx')))
+	if not archivos:
+		return None
+	_, df_merge = etl.asignar_cuencas(etl.normalizar(leer_archivos(archivos)), tabla_cuencas(args, dir_temporal))
+	nivel = {'Mensual_Por_Campo': NIVELES_RESUMEN['Mensual_Por_Campo']}
+	return aplicar_esquema(etl.agregar_niveles(df_merge, nivel)['Mensual_Por_Campo'], ['AÑO', 'MES', 'PRODUCCION FISCALIZADA'])
+
+
+# --- Dashboard ---
+
+def rangos_prueba(anios):
+	"""Rangos de años de distinto tamaño: todo, primeros 5, últimos 3 y el último año"""
+	primero, ultimo = int(min(anios)), int(max(anios))
+	return [(primero, ultimo), (primero, min(primero + 4, ultimo)), (max(ultimo - 2, primero), ultimo), (ultimo, ultimo)]
+
+
+def series_mensuales(tablero, n_campos=None):
+	"""construir(indice, inicio, fin) de las dos gráficas mensuales con el ancho inicial, como al mover el filtro.
+
+	Con n_campos, la gráfica por campo lleva los n_campos de más producción en lugar de los iniciales.
+	"""
+	def construir(indice, inicio, fin):
+		if n_campos is None:
+			campos = tablero.campos_mensual_iniciales(indice, inicio, fin)
+		else:
+			campos = indice.totales(inicio, fin).nlargest(n_campos).index.tolist()
+		return [tablero.patch_serie_mensual(grafica, indice, seleccion, inicio, fin, tablero.ANCHO_INICIAL_MENSUAL, None)
+			for grafica, seleccion in (('mensual-total', None), ('mensual-por-campo', campos))]
+	return construir
+
+
+def benchmark_tablero(args, dir_temporal):
+	"""Tiempo de armar cada pestaña completa (render_content) y de cada actualización del filtro, por rango y escala"""
+	# Sin caché de vistas ni recarga: cada repetición arma la pestaña desde cero
+	os.environ['GAS_CACHE_VISTAS_MB'] = '0'
+	os.environ['GAS_INTERVALO_RECARGA'] = '0'
+	os.chdir(args.entrada)
+	sys.path.insert(0, DIR_REPO)
+	import dashboard_gas_completo as tablero
+	from plotly.io.json import to_json_plotly
+
+	base = [indice.df for indice in tablero.datos.actual().datos]
+	if 'CAMPO_LIMPIO' not in base[-1].columns:
+		# Resúmenes anteriores a Mensual_Por_Campo: sin la tabla por campo la gráfica
+		# mensual por campo repetiría la serie total, así que se arma desde los libros
+		print("produccion_gas_resumenes.xlsx no trae Mensual_Por_Campo; se calcula desde los libros")
+		df_mensual_campo = mensual_por_campo(args, dir_temporal)
+		if df_mensual_campo is not None:
+			base[-1] = df_mensual_campo
+	componentes = {
+		'tab-general': tablero.componentes_tab_general,
+		'tab-campo': tablero.componentes_tab_campo,
+		'tab-cuenca': tablero.componentes_tab_cuenca,
+		'tab-departamento': tablero.componentes_tab_departamento,
+		'tab-mensual': series_mensuales(tablero),
+	}
+	# La gráfica mensual con 50 campos es la que pasa por LTTB a cualquier escala; sin
+	# producción mensual por campo no hay nada que medir y el caso se omite
+	extras = {}
+	if 'CAMPO_LIMPIO' in base[-1].columns:
+		extras['mensual-50-campos'] = ('tab-mensual', series_mensuales(tablero, 50))
+	else:
+		print("⚠️ Sin producción mensual por campo: se omite tablero.mensual-50-campos")
+	resultados = {}
+	for escala in args.escalas:
+		df_anual, df_cuenca, df_campo, df_departamento, df_mensual = base
+		if 'CAMPO_LIMPIO' in df_mensual.columns:
+			df_mensual = escalar(df_mensual, 'CAMPO_LIMPIO', escala)
+		inicio_indice = time.perf_counter()
+		indices = tablero.indexar_datos(df_anual, escalar(df_cuenca, 'CUENCA', escala),
+			escalar(df_campo, 'CAMPO_LIMPIO', escala), escalar(df_departamento, 'DEPARTAMENTO', escala), df_mensual)
+		resultados[f'tablero.indexar.x{escala}'] = estadisticas([time.perf_counter() - inicio_indice],
+			filas=sum(len(i.df) for i in indices))
+
+		for inicio, fin in rangos_prueba(indices[0].anios):
+			for pestana, construir in componentes.items():
+				nombre = pestana.replace('tab-', '')
+				# Lo mismo que render_content sin caché: armar la pestaña y serializarla
+				stats, texto = medir(lambda: to_json_plotly(tablero.crear_pestana(indices, pestana, inicio, fin)), args.repeticiones)
+				resultados[f'tablero.{nombre}.{inicio}-{fin}.x{escala}'] = dict(stats, bytes=len(texto))
+				indice = indices[tablero.INDICE_PESTANA[pestana]]
+				if indice.filas(inicio, fin).empty:
+					continue
+				stats, texto = medir(lambda: to_json_plotly(construir(indice, inicio, fin)), args.repeticiones)
+				resultados[f'tablero.{nombre}-filtro.{inicio}-{fin}.x{escala}'] = dict(stats, bytes=len(texto))
+			for nombre, (pestana, construir) in extras.items():
+				indice = indices[tablero.INDICE_PESTANA[pestana]]
+				if indice.filas(inicio, fin).empty:
+					continue
+				stats, texto = medir(lambda: to_json_plotly(construir(indice, inicio, fin)), args.repeticiones)
+				resultados[f'tablero.{nombre}.{inicio}-{fin}.x{escala}'] = dict(stats, bytes=len(texto))
+	return resultados
+
+
+# --- Historial ---
+
+def commit_actual():
+	"""(hash corto del commit, True si hay cambios sin commit), o (None, None) fuera de git"""
+	try:
+		commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIR_REPO,
+			capture_output=True, text=True, check=True).stdout.strip()
+		cambios = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=DIR_REPO,
+			capture_output=True, text=True, check=True).stdout.strip()
+		return commit, bool(cambios)
+	except (OSError, subprocess.CalledProcessError):
+		return None, None
+
+
+def cargar_historial(ruta):
+	try:
+		with open(ruta, encoding='utf-8') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return []
+
+
+def guardar_historial(ruta, historial):
+	"""Escribir el historial de forma atómica"""
+	os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+	with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+		json.dump(historial, f, ensure_ascii=False, indent=1)
+	os.replace(ruta + '.tmp', ruta)
+
+
+def buscar_referencia(historial, referencia):
+	"""Corrida del historial con la que comparar: la anterior o la última de un commit"""
+	if referencia == 'anterior':
+		return historial[-1] if historial else None
+	return next((c for c in reversed(historial) if (c.get('commit') or '').startswith(referencia)), None)
+
+
+def comparar(corrida, referencia, umbral, minimo_ms=5):
+	"""Tabla de texto con la mediana de cada benchmark frente a la referencia, y las regresiones"""
+	lineas = [f"{'BENCHMARK':<48}{'ANTES':>10}{'AHORA':>10}{'CAMBIO':>9}"]
+	regresiones = []
+	for nombre, actual in corrida['resultados'].items():
+		anterior = referencia['resultados'].get(nombre)
+		if anterior is None:
+			continue
+		cambio = actual['mediana'] / anterior['mediana'] - 1 if anterior['mediana'] else 0
+		marca = ''
+		if cambio > umbral and (actual['mediana'] - anterior['mediana']) * 1000 > minimo_ms:
+			marca = '  ⚠️'
+			regresiones.append(nombre)
+		lineas.append(f"{nombre:<48}{anterior['mediana']:>10.4f}{actual['mediana']:>10.4f}{cambio:>+9.0%}{marca}")
+	return '\n'.join(lineas), regresiones
+
+
+def main(argv=None):
+	args = parsear_argumentos(argv)
+	args.historial = os.path.abspath(args.historial)
+	commit, cambios = commit_actual()
+	corrida = {
+		'fecha': datetime.now().isoformat(timespec='seconds'),
+		'commit': commit,
+		'cambios_sin_commit': cambios,
+		'maquina': {'python': platform.python_version(), 'sistema': platform.platform(), 'nucleos': os.cpu_count()},
+		'parametros': {'escalas': args.escalas, 'repeticiones': args.repeticiones, 'repeticiones_etl': args.repeticiones_etl},
+		'resultados': {},
+	}
+	with tempfile.TemporaryDirectory(prefix='benchmark_gas_') as dir_temporal:
+		if args.solo in (None, 'etl'):
+			corrida['resultados'].update(benchmark_etl(args, dir_temporal))
+		if args.solo in (None, 'tablero'):
+			corrida['resultados'].update(benchmark_tablero(args, dir_temporal))
+
+	print(f"\n{'BENCHMARK':<48}{'MEDIANA S':>11}{'MÍNIMO S':>10}{'KB':>8}")
+	for nombre, r in corrida['resultados'].items():
+		kb = f"{r['bytes'] / 1024:.0f}" if 'bytes' in r else '-'
+		print(f"{nombre:<48}{r['mediana']:>11.4f}{r['minimo']:>10.4f}{kb:>8}")
+
+	historial = cargar_historial(args.historial)
+	regresiones = []
+	if args.comparar:
+		referencia = buscar_referencia(historial, args.comparar)
+		if referencia is None:
+			print(f"\nNo hay corrida '{args.comparar}' en {args.historial} para comparar")
+		else:
+			tabla, regresiones = comparar(corrida, referencia, args.umbral, args.minimo_ms)
+			print(f"\nCOMPARACIÓN CON {referencia.get('commit')} ({referencia['fecha']}):")
+			print(tabla)
+			if regresiones:
+				print(f"\n⚠️ {len(regresiones)} benchmarks más de {args.umbral:.0%} más lentos")
+	historial.append(corrida)
+	guardar_historial(args.historial, historial)
+	print(f"\nCorrida guardada en {args.historial}")
+	return 1 if args.fallar and regresiones else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+
+# Caché del contenido ya armado de las pestañas del dashboard. Cada entrada es
+# el JSON de la respuesta (figuras y tarjetas), así que una vista repetida se
+# entrega sin construir ninguna figura. En memoria se descartan las entradas
+# menos usadas cuando se pasa del número de entradas o del tamaño en bytes; con
+# una carpeta en disco, los workers de gunicorn se pasan las vistas ya armadas.
+
+
+def a_json(contenido):
+	"""Texto JSON de un árbol de componentes de Dash con figuras de Plotly (con orjson si está instalado)"""
+	return to_json_plotly(contenido)
+
+
+class CacheVistas:
+	"""LRU acotada por entradas y por bytes, con copia opcional en disco.
+
+	obtener(clave, construir) devuelve lo que dio construir() la primera vez y,
+	después, su JSON ya decodificado. La clave debe incluir todo lo que cambia el
+	resultado (pestaña, rango de años y versión de los datos). maximo_bytes=0
+	desactiva la caché.
+	"""
+
+	def __init__(self, maximo_entradas=512, maximo_bytes=64 << 20, directorio=None, maximo_bytes_disco=256 << 20):
+		self.maximo_entradas = maximo_entradas
+		self.maximo_bytes = maximo_bytes
+		self.directorio = directorio
+		self.maximo_bytes_disco = maximo_bytes_disco
+		self._entradas = OrderedDict()
+		self._bytes = 0
+		self._lock = threading.Lock()
+		self.aciertos = 0
+		self.aciertos_disco = 0
+		self.fallos = 0
+		if directorio:
+			os.makedirs(directorio, exist_ok=True)
+
+	def obtener(self, clave, construir):
+		if not self.maximo_bytes:
+			return construir()
+		with self._lock:
+			texto = self._entradas.get(clave)
+			if texto is not None:
+				self._entradas.move_to_end(clave)
+				self.aciertos += 1
+		if texto is None:
+			texto = self._leer_disco(clave)
+			if texto is not None:
+				with self._lock:
+					self.aciertos_disco += 1
+				self._guardar(clave, texto)
+		if texto is not None:
+			return json.loads(texto)
+
+		with self._lock:
+			self.fallos += 1
+		# Se construye fuera del lock: dos pedidos iguales a la vez pueden armar la vista dos veces
+		contenido = construir()
+		texto = a_json(contenido)
+		self._guardar(clave, texto)
+		self._escribir_disco(clave, texto)
+		return contenido
+
+	def _guardar(self, clave, texto):
+		tamano = len(texto)
+		if tamano > self.maximo_bytes:
+			return
+		with self._lock:
+			anterior = self._entradas.pop(clave, None)
+			if anterior is not None:
+				self._bytes -= len(anterior)
+			self._entradas[clave] = texto
+			self._bytes += tamano
+			while len(self._entradas) > self.maximo_entradas or self._bytes > self.maximo_bytes:
+				_, descartada = self._entradas.popitem(last=False)
+				self._bytes -= len(descartada)
+
+	def _ruta(self, clave):
+		return os.path.join(self.directorio, hashlib.sha1(repr(clave).encode()).hexdigest() + '.json')
+
+	def _leer_disco(self, clave):
+		if not self.directorio:
+			return None
+		try:
+			with open(self._ruta(clave), encoding='utf-8') as f:
+				return f.read()
+		except OSError:
+			return None
+
+	def _escribir_disco(self, clave, texto):
+		if not self.directorio:
+			return
+		ruta = self._ruta(clave)
+		try:
+			with open(f'{ruta}.{os.getpid()}.tmp', 'w', encoding='utf-8') as f:
+				f.write(texto)
+			os.replace(f'{ruta}.{os.getpid()}.tmp', ruta)
+			self._podar_disco()
+		except OSError as e:
+			print(f"⚠️ No se pudo guardar la vista en la caché de disco ({e})")
+
+	def _podar_disco(self):
+		"""Borrar los archivos más viejos mientras la carpeta pase de maximo_bytes_disco"""
+		archivos = []
+		for nombre in os.listdir(self.directorio):
+			if nombre.endswith('.json'):
+				stat = os.stat(os.path.join(self.directorio, nombre))
+				archivos.append((stat.st_mtime, stat.st_size, nombre))
+		total = sum(tamano for _, tamano, _ in archivos)
+		for _, tamano, nombre in sorted(archivos):
+			if total <= self.maximo_bytes_disco:
+				break
+			try:
+				os.remove(os.path.join(self.directorio, nombre))
+			except OSError:
+				pass
+			total -= tamano
+
+	def estadisticas(self):
+		with self._lock:
+			return {
+				'aciertos': self.aciertos,
+				'aciertos_disco': self.aciertos_disco,
+				'fallos': self.fallos,
+				'entradas': len(self._entradas),
+				'bytes': self._bytes,
+				'maximo_bytes': self.maximo_bytes,
+			}
@@ -0,0 +1,97 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# Normalización de nombres de campo y asignación de cuenca.
+# Los nombres distintos son unos pocos cientos frente a decenas de miles de filas
+# mensuales, así que cada nombre se resuelve una sola vez y el resultado se
+# expande a toda la columna con los códigos de pd.factorize.
+
+# Mapeo para corregir nombres problemáticos de campos
+MAPEO_CAMPOS = {
+	'Alligator': 'ALLIGATOR',
+	'CARAMELO UNIFICADO': 'CARAMELO',
+	'CHÁCHARO': 'CHACHARO',
+	'Canaguay': 'CANAGUAY',
+	'Coralillo': 'CORALILLO',
+	'LA LOMA': 'LA LOMA ynf',
+	'Lorito': 'LORITO',
+	'MAGICO EXPLORATORIO': 'CAMPO EXPLORATORIO MAGICO',
+	'MANA': 'MANÁ',
+	'Pandereta': 'PANDERETA',
+	'RECETPR WEST': 'RECETOR WEST',
+	'UNIFICADO PALOGRANDE': 'PALOGRANDE UNIFICADO',
+	'Unificado Río Ceibas': 'RIO CEIBAS',
+	'TIGANA ': 'TIGANA',
+	'TECA-COCORNA': 'AREA TECA-COCORNA',
+	'SANTO DOMINGO UNIFICADO': 'SANTO DOMINGO',
+}
+
+# Asignación manual de cuenca para campos faltantes en el Excel de cuencas
+MAPEO_CUENCAS_EXTRA = {
+	'CORAZON WEST 4': 'VMM',
+	'DIVIDIVI': 'VIM',
+	'GIGANTE CABALLOS': 'VSM',
+	'LOS ANGELES 12': 'VMM',
+	'PALERMO - SANTA CLARA UNIFICADO': 'VSM',
+	'TENAX': 'VSM',
+}
+
+SIN_CUENCA = 'SIN CUENCA'
+
+
+def normalizar_campo(nombre):
+	if pd.isnull(nombre):
+		return ''
+	nombre = str(nombre).strip().upper()
+	nombre = unicodedata.normalize('NFKD', nombre).encode('ASCII', 'ignore').decode('utf-8')
+	nombre = nombre.replace('  ', ' ')
+	return nombre
+
+
+def _expandir(codigos, valores, relleno):
+	"""Llevar los valores resueltos por nombre distinto a todas las filas"""
+	valores = np.asarray(valores, dtype=object)
+	resultado = valores[codigos] if len(valores) else np.empty(len(codigos), dtype=object)
+	resultado[codigos < 0] = relleno
+	return resultado
+
+
+class CampoResolver:
+	"""Resuelve el nombre limpio y la cuenca de columnas completas de campos.
+
+	Combina MAPEO_CAMPOS, el Excel de cuencas y MAPEO_CUENCAS_EXTRA en un solo
+	índice: la cuenca del Excel tiene prioridad (coincidencia exacta con el nombre
+	limpio) y, si no hay, se usa el mapeo extra comparando nombres normalizados.
+	"""
+
+	def __init__(self, df_cuencas=None, mapeo_campos=MAPEO_CAMPOS, mapeo_cuencas_extra=MAPEO_CUENCAS_EXTRA):
+		self.mapeo_campos = dict(mapeo_campos)
+		self.cuenca_excel = {}
+		if df_cuencas is not None and not df_cuencas.empty:
+			cuencas = df_cuencas.dropna(subset=['CUENCA'])
+			cuencas = cuencas[cuencas['CUENCA'] != SIN_CUENCA].drop_duplicates(subset=['CAMPO'])
+			self.cuenca_excel = dict(zip(cuencas['CAMPO'], cuencas['CUENCA']))
+		self.cuenca_extra = {normalizar_campo(k): v for k, v in mapeo_cuencas_extra.items()}
+
+	def nombre_limpio(self, campo):
+		return self.mapeo_campos.get(campo, campo)
+
+	def cuenca(self, campo_limpio):
+		if campo_limpio in self.cuenca_excel:
+			return self.cuenca_excel[campo_limpio]
+		return self.cuenca_extra.get(normalizar_campo(campo_limpio), SIN_CUENCA)
+
+	def limpiar(self, campos):
+		"""Columna CAMPO_LIMPIO a partir de la columna CAMPO (los nulos se conservan)"""
+		codigos, unicos = pd.factorize(campos)
+		limpios = [self.nombre_limpio(c) for c in unicos]
+		return pd.Series(_expandir(codigos, limpios, np.nan), index=campos.index, name='CAMPO_LIMPIO')
+
+	def cuencas(self, campos_limpios):
+		"""Columna CUENCA a partir de la columna CAMPO_LIMPIO"""
+		codigos, unicos = pd.factorize(campos_limpios)
+		cuencas = [self.cuenca(c) for c in unicos]
+		return pd.Series(_expandir(codigos, cuencas, self.cuenca(np.nan)), index=campos_limpios.index, name='CUENCA')
@@ -0,0 +1,364 @@
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+# Prueba de carga del dashboard corriendo (local o desplegado). Cada usuario
+# virtual abre el tablero y luego alterna, con pausas, entre cambiar de pestaña y
+# mover el filtro de años, enviando a /_dash-update-component los mismos pedidos
+# que el navegador. Los callbacks se toman de /_dash-dependencies, así que la
+# prueba sigue al dashboard sin importarlo. Con varios escalones de usuarios se ve
+# qué pestaña se satura primero y cuántos workers de gunicorn hacen falta.
+#
+#   gunicorn -w 2 dashboard_gas_completo:server &
+#   python DataGas/carga_gas.py --url http://127.0.0.1:8000 --usuarios 1,5,10,20 --duracion 30
+
+PESTANAS = ['tab-general', 'tab-campo', 'tab-cuenca', 'tab-departamento', 'tab-mensual']
+
+# Pestaña dueña de los callbacks del filtro, por el prefijo del id de sus salidas
+PESTANA_POR_PREFIJO = {'general': 'tab-general', 'campo': 'tab-campo', 'cuenca': 'tab-cuenca', 'dept': 'tab-departamento',
+	'mensual': 'tab-mensual'}
+
+PERCENTILES = (50, 90, 99)
+
+
+def parsear_argumentos(argv=None):
+	parser = argparse.ArgumentParser(description="Prueba de carga de los callbacks del dashboard de gas")
+	parser.add_argument('--url', default='http://127.0.0.1:8052', help="URL base del dashboard")
+	parser.add_argument('--usuarios', default='10',
+		help="Usuarios simultáneos; con una lista (p. ej. 1,5,10,20) se corre un escalón por valor")
+	parser.add_argument('--duracion', type=float, default=30, help="Segundos de cada escalón")
+	parser.add_argument('--calentamiento', type=float, default=5,
+		help="Segundos al inicio de cada escalón que no entran en las estadísticas")
+	parser.add_argument('--pausa', type=float, default=1.0,
+		help="Pausa media en segundos entre acciones de un usuario (0 = sin pausa, máxima presión)")
+	parser.add_argument('--mezcla', default='pestana=1,filtro=3',
+		help="Peso de cada acción: cambiar de pestaña y mover el filtro de años")
+	parser.add_argument('--objetivo-p99-ms', type=float, default=1000,
+		help="p99 a partir del cual se considera saturada una pestaña")
+	parser.add_argument('--max-errores', type=float, default=0.01,
+		help="Fracción de errores a partir de la cual se considera saturada una pestaña")
+	parser.add_argument('--timeout', type=float, default=60, help="Segundos de espera de cada pedido")
+	parser.add_argument('--semilla', type=int, default=None, help="Semilla de las acciones de los usuarios")
+	parser.add_argument('--salida', default=None, help="Archivo JSON donde guardar los resultados")
+	args = parser.parse_args(argv)
+	args.usuarios = [int(u) for u in args.usuarios.split(',') if u]
+	args.mezcla = {accion: float(peso) for accion, peso in (p.split('=') for p in args.mezcla.split(',') if p)}
+	return args
+
+
+# --- Pedidos ---
+
+def separar_salidas(salida):
+	"""[(id, propiedad)] de la cadena output de un callback ('..a.children...b.data..' o 'a.children')"""
+	if salida.startswith('..'):
+		partes = salida[2:-2].split('...')
+	else:
+		partes = [salida]
+	return [tuple(parte.rsplit('.', 1)) for parte in partes]
+
+
+class Conexion:
+	"""Conexión HTTP persistente (keep-alive) de un usuario virtual"""
+
+	def __init__(self, url, timeout):
+		partes = urlsplit(url)
+		clase = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+		self._crear = lambda: clase(partes.netloc, timeout=timeout)
+		self.base = partes.path.rstrip('/')
+		self.http = self._crear()
+
+	def pedir(self, metodo, ruta, cuerpo=None):
+		"""(estado, bytes de la respuesta); reabre la conexión si el servidor la cerró"""
+		encabezados = {'Content-Type': 'application/json'} if cuerpo is not None else {}
+		for intento in range(2):
+			try:
+				self.http.request(metodo, self.base + ruta, body=cuerpo, headers=encabezados)
+				respuesta = self.http.getresponse()
+				return respuesta.status, respuesta.read()
+			except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+				self.http.close()
+				self.http = self._crear()
+				if intento:
+					raise
+
+	def cerrar(self):
+		self.http.close()
+
+
+def buscar_componente(nodo, id_componente):
+	"""Props del componente con ese id dentro del layout de Dash, o None"""
+	if isinstance(nodo, dict):
+		props = nodo.get('props', {})
+		if props.get('id') == id_componente:
+			return props
+		hijos = props.get('children')
+		return buscar_componente(hijos, id_componente) if hijos is not None else None
+	if isinstance(nodo, list):
+		for hijo in nodo:
+			encontrado = buscar_componente(hijo, id_componente)
+			if encontrado is not None:
+				return encontrado
+	return None
+
+
+class Tablero:
+	"""Callbacks del servidor y rango de años del dashboard, leídos de sus rutas de Dash.
+
+	pestana es el callback que arma el contenido (render_content) y filtros, por
+	pestaña, los callbacks que actualizan sus componentes al mover el filtro (la
+	pestaña mensual tiene uno por gráfica, con el filtro entre otras entradas). En modo
+	cliente (GAS_FILTRO_CLIENTE=1) filtros solo trae las pestañas con componentes
+	que el navegador no recalcula.
+	"""
+
+	def __init__(self, url, timeout=60):
+		conexion = Conexion(url, timeout)
+		try:
+			estado, cuerpo = conexion.pedir('GET', '/_dash-dependencies')
+			if estado != 200:
+				raise RuntimeError(f"{url}/_dash-dependencies respondió {estado}")
+			dependencias = json.loads(cuerpo)
+			_, cuerpo = conexion.pedir('GET', '/_dash-layout')
+			slider = buscar_componente(json.loads(cuerpo), 'year-slider')
+		finally:
+			conexion.cerrar()
+		if slider is None:
+			raise RuntimeError("El layout no tiene el filtro de años (year-slider)")
+		self.anios = (int(slider['min']), int(slider['max']))
+
+		self.pestana, self.filtros = None, {}
+		for dependencia in dependencias:
+			if dependencia.get('clientside_function'):
+				continue
+			salidas = separar_salidas(dependencia['output'])
+			entradas = [(e['id'], e['property']) for e in dependencia['inputs']]
+			if ('tab-content', 'children') in salidas:
+				self.pestana = dependencia
+				self.filtro_cliente = ('cambio-vacio', 'data') in entradas
+			elif ('year-slider', 'value') in entradas:
+				prefijo = salidas[0][0].split('-', 1)[0]
+				if prefijo in PESTANA_POR_PREFIJO:
+					self.filtros.setdefault(PESTANA_POR_PREFIJO[prefijo], []).append(dependencia)
+		if self.pestana is None:
+			raise RuntimeError("No se encontró el callback que arma las pestañas (tab-content.children)")
+
+	def cuerpo(self, dependencia, valores, cambiado):
+		"""Cuerpo JSON del pedido de un callback; valores da el valor de cada (id, propiedad)"""
+		def props(lista):
+			return [{'id': p['id'], 'property': p['property'], 'value': valores.get((p['id'], p['property']))}
+				for p in lista]
+		salidas = [{'id': i, 'property': p} for i, p in separar_salidas(dependencia['output'])]
+		return json.dumps({
+			'output': dependencia['output'],
+			# Con una sola salida el navegador la manda sola, no en lista
+			'outputs': salidas if dependencia['output'].startswith('..') else salidas[0],
+			'inputs': props(dependencia['inputs']),
+			'state': props(dependencia.get('state', [])),
+			'changedPropIds': [f'{cambiado[0]}.{cambiado[1]}'],
+		}).encode('utf-8')
+
+
+# --- Usuarios virtuales ---
+
+def rango_aleatorio(rng, anios):
+	"""Rango de años como los que elige un usuario: todo, los últimos años, un año o una ventana"""
+	primero, ultimo = anios
+	tipo = rng.choices(['todo', 'ultimos', 'uno', 'ventana'], weights=[2, 3, 2, 3])[0]
+	if tipo == 'todo':
+		return [primero, ultimo]
+	if tipo == 'ultimos':
+		return [max(primero, ultimo - rng.randint(1, 5)), ultimo]
+	if tipo == 'uno':
+		anio = rng.randint(primero, ultimo)
+		return [anio, anio]
+	inicio = rng.randint(primero, ultimo)
+	return [inicio, rng.randint(inicio, ultimo)]
+
+
+class Usuario:
+	"""Usuario virtual: abre el tablero en la pestaña general y luego cambia de pestaña o mueve el filtro"""
+
+	def __init__(self, tablero, args, registros, rng):
+		self.tablero, self.args, self.registros, self.rng = tablero, args, registros, rng
+		self.conexion = Conexion(args.url, args.timeout)
+		self.pestana = 'tab-general'
+		self.rango = list(tablero.anios)
+		self.vacia = False
+
+	def valores(self):
+		return {('tabs', 'value'): self.pestana, ('year-slider', 'value'): self.rango,
+			('tab-vacia', 'data'): self.vacia, ('cambio-vacio', 'data'): self.vacia}
+
+	def enviar(self, dependencia, cambiado, tipo):
+		"""Enviar un pedido de callback y anotar (etiqueta, fin, segundos, estado, bytes)"""
+		cuerpo = self.tablero.cuerpo(dependencia, self.valores(), cambiado)
+		etiqueta = f"{self.pestana.replace('tab-', '')}/{tipo}"
+		inicio = time.perf_counter()
+		try:
+			estado, respuesta = self.conexion.pedir('POST', '/_dash-update-component', cuerpo)
+		except OSError:
+			estado, respuesta = 0, b''
+		fin = time.perf_counter()
+		self.registros.append((etiqueta, fin, fin - inicio, estado, len(respuesta)))
+		return estado, respuesta
+
+	def armar_pestana(self, cambiado):
+		# 'pestana' al cambiar de pestaña; 'rango' cuando lo dispara el filtro y solo revisa si el rango quedó sin datos
+		tipo = 'pestana' if cambiado == ('tabs', 'value') else 'rango'
+		estado, respuesta = self.enviar(self.tablero.pestana, cambiado, tipo)
+		if estado == 200:
+			self.vacia = json.loads(respuesta)['response'].get('tab-vacia', {}).get('data', self.vacia)
+
+	def accion(self):
+		mezcla = self.args.mezcla
+		if self.rng.choices(list(mezcla), weights=list(mezcla.values()))[0] == 'pestana':
+			self.pestana = self.rng.choice([p for p in PESTANAS if p != self.pestana])
+			self.armar_pestana(('tabs', 'value'))
+			return
+		self.rango = rango_aleatorio(self.rng, self.tablero.anios)
+		# Como el navegador: render_content (que casi siempre responde 204) y el filtro de la
+		# pestaña. En modo cliente render_content solo corre si el rango pasa a tener o no
+		# datos, algo que aquí no se sabe de antemano, así que se omite
+		if not self.tablero.filtro_cliente:
+			self.armar_pestana(('year-slider', 'value'))
+		if not self.vacia:
+			for dependencia in self.tablero.filtros.get(self.pestana, []):
+				self.enviar(dependencia, ('year-slider', 'value'), 'filtro')
+
+	def correr(self, hasta):
+		try:
+			self.armar_pestana(('tabs', 'value'))
+			while time.perf_counter() < hasta:
+				if self.args.pausa > 0:
+					time.sleep(min(self.rng.expovariate(1 / self.args.pausa), max(0, hasta - time.perf_counter())))
+				if time.perf_counter() < hasta:
+					self.accion()
+		finally:
+			self.conexion.cerrar()
+
+
+def correr_escalon(tablero, args, usuarios, rng):
+	"""Registros de un escalón con usuarios simultáneos durante args.duracion segundos"""
+	registros = []
+	inicio = time.perf_counter()
+	hasta = inicio + args.calentamiento + args.duracion
+	hilos = []
+	for _ in range(usuarios):
+		usuario = Usuario(tablero, args, registros, random.Random(rng.random()))
+		hilos.append(threading.Thread(target=usuario.correr, args=(hasta,), daemon=True))
+	for hilo in hilos:
+		hilo.start()
+	for hilo in hilos:
+		hilo.join()
+	medidos = inicio + args.calentamiento
+	return [r for r in registros if r[1] >= medidos], time.perf_counter() - medidos
+
+
+# --- Resultados ---
+
+def resumir(registros, segundos):
+	"""Estadísticas por etiqueta y en total: pedidos, por segundo, errores, sin cambios (204), percentiles y bytes"""
+	grupos = {}
+	for registro in registros:
+		grupos.setdefault(registro[0], []).append(registro)
+	grupos = dict(sorted(grupos.items()))
+	grupos['total'] = registros
+	resumen = {}
+	for etiqueta, filas in grupos.items():
+		if not filas:
+			continue
+		latencias = np.array([f[2] for f in filas]) * 1000
+		estados = np.array([f[3] for f in filas])
+		con_cuerpo = np.array([f[4] for f in filas if f[3] == 200])
+		errores = int(((estados < 200) | (estados >= 400)).sum())
+		resumen[etiqueta] = {
+			'pedidos': len(filas),
+			'por_segundo': round(len(filas) / segundos, 2),
+			'errores': errores,
+			'tasa_errores': round(errores / len(filas), 4),
+			'sin_cambios': int((estados == 204).sum()),
+			**{f'p{p}_ms': round(float(np.percentile(latencias, p)), 1) for p in PERCENTILES},
+			'max_ms': round(float(latencias.max()), 1),
+			'kb_promedio': round(float(con_cuerpo.mean()) / 1024, 1) if len(con_cuerpo) else 0.0,
+			'kb_max': round(float(con_cuerpo.max()) / 1024, 1) if len(con_cuerpo) else 0.0,
+		}
+	return resumen
+
+
+def tabla(resumen):
+	"""Tabla de texto con una línea por etiqueta"""
+	lineas = [f"{'PEDIDO':<24}{'PEDIDOS':>9}{'POR S':>8}{'ERRORES':>9}{'204':>6}{'P50 MS':>9}{'P90 MS':>9}"
+		f"{'P99 MS':>9}{'MAX MS':>9}{'KB PROM':>9}{'KB MAX':>9}"]
+	for etiqueta, r in resumen.items():
+		lineas.append(f"{etiqueta:<24}{r['pedidos']:>9,}{r['por_segundo']:>8.1f}{r['tasa_errores']:>9.1%}"
+			f"{r['sin_cambios']:>6}{r['p50_ms']:>9.0f}{r['p90_ms']:>9.0f}{r['p99_ms']:>9.0f}{r['max_ms']:>9.0f}"
+			f"{r['kb_promedio']:>9.1f}{r['kb_max']:>9.1f}")
+	return '\n'.join(lineas)
+
+
+def saturadas(escalones, objetivo_p99_ms, max_errores):
+	"""{etiqueta: usuarios} con el primer escalón en que cada pedido pasó el p99 objetivo o la tasa de errores"""
+	primeras = {}
+	for escalon in escalones:
+		for etiqueta, r in escalon['resumen'].items():
+			if etiqueta == 'total' or etiqueta in primeras:
+				continue
+			if r['p99_ms'] > objetivo_p99_ms or r['tasa_errores'] > max_errores:
+				primeras[etiqueta] = escalon['usuarios']
+	return primeras
+
+
+def main(argv=None):
+	args = parsear_argumentos(argv)
+	try:
+		tablero = Tablero(args.url, args.timeout)
+	except OSError as error:
+		print(f"No se pudo conectar con el dashboard en {args.url}: {error}")
+		return 1
+	modo = 'cliente' if tablero.filtro_cliente else 'servidor'
+	print(f"Dashboard en {args.url}: años {tablero.anios[0]}-{tablero.anios[1]}, filtro en el {modo}, "
+		f"{sum(len(d) for d in tablero.filtros.values())} callbacks de filtro")
+
+	rng = random.Random(args.semilla)
+	escalones = []
+	for usuarios in args.usuarios:
+		print(f"\n{usuarios} usuarios durante {args.duracion:.0f} s (+{args.calentamiento:.0f} s de calentamiento)...")
+		registros, segundos = correr_escalon(tablero, args, usuarios, rng)
+		resumen = resumir(registros, segundos)
+		escalones.append({'usuarios': usuarios, 'segundos': round(segundos, 2), 'resumen': resumen})
+		print(tabla(resumen))
+
+	primeras = saturadas(escalones, args.objetivo_p99_ms, args.max_errores)
+	if primeras:
+		print(f"\nPEDIDOS SATURADOS (p99 > {args.objetivo_p99_ms:.0f} ms o errores > {args.max_errores:.0%}):")
+		for etiqueta, usuarios in sorted(primeras.items(), key=lambda e: e[1]):
+			print(f"{etiqueta:<24} desde {usuarios} usuarios")
+	else:
+		print(f"\nNingún pedido pasó el p99 objetivo ({args.objetivo_p99_ms:.0f} ms) ni la tasa de errores")
+
+	if args.salida:
+		resultado = {
+			'fecha': datetime.now().isoformat(timespec='seconds'),
+			'url': args.url,
+			'parametros': {'duracion': args.duracion, 'calentamiento': args.calentamiento, 'pausa': args.pausa,
+				'mezcla': args.mezcla, 'filtro': modo},
+			'escalones': escalones,
+			'saturados': primeras,
+		}
+		with open(args.salida, 'w', encoding='utf-8') as f:
+			json.dump(resultado, f, ensure_ascii=False, indent=1)
+		print(f"\nResultados guardados en {args.salida}")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
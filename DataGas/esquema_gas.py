@@ -0,0 +1,64 @@
+import pandas as pd
+
+
+# Esquema de la tabla de hechos de producción y de sus resúmenes, compartido por
+# el ETL, el almacén Parquet y el dashboard. Las dimensiones de texto se guardan
+# como categóricas, AÑO como entero pequeño, MES como categórica ordenada por
+# calendario (sus códigos int8 son el número de mes menos uno) y todas las
+# métricas como float64.
+
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+	'septiembre', 'octubre', 'noviembre', 'diciembre']
+
+COLUMNAS_METRICAS = [
+	'PRODUCCION FISCALIZADA', 'GAS LIFT', 'GAS REINYECTADO', 'GAS QUEMADO',
+	'CONSUMO EN CAMPO', 'ENVIADO A PLANTA', 'GAS TRANSFORMADO', 'ENTREGADO A GASEODUCTOS'
+]
+COLUMNAS_DIMENSION = ['CAMPO', 'CAMPO_LIMPIO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA']
+
+TIPO_MES = pd.CategoricalDtype(MESES, ordered=True)
+
+# Tipo declarado de cada columna conocida
+TIPOS = {
+	'AÑO': 'int16',
+	'MES': TIPO_MES,
+	**{c: 'category' for c in COLUMNAS_DIMENSION},
+	**{c: 'float64' for c in COLUMNAS_METRICAS},
+}
+
+
+class ErrorEsquema(ValueError):
+	"""Los datos no cumplen el esquema declarado"""
+
+
+def aplicar_esquema(df, requeridas=()):
+	"""Copia de df con las columnas conocidas convertidas a los tipos de TIPOS.
+
+	Las columnas que no están en el esquema se dejan igual. Lanza ErrorEsquema si
+	falta alguna columna de requeridas, si AÑO tiene valores nulos o no numéricos,
+	o si MES trae un mes que no está en MESES.
+	"""
+	faltantes = [c for c in requeridas if c not in df.columns]
+	if faltantes:
+		raise ErrorEsquema(f"Faltan columnas requeridas: {faltantes}")
+	df = df.copy(deep=False)
+	for col in df.columns:
+		tipo = TIPOS.get(col)
+		if tipo is None or df[col].dtype == tipo:
+			continue
+		if col == 'AÑO':
+			anios = pd.to_numeric(df[col], errors='coerce')
+			if anios.isna().any():
+				raise ErrorEsquema(f"AÑO tiene {int(anios.isna().sum())} valores nulos o no numéricos")
+			df[col] = anios.astype(tipo)
+		elif col == 'MES':
+			meses = df[col].astype('string').str.strip().str.lower()
+			desconocidos = set(meses.dropna()) - set(MESES)
+			if desconocidos:
+				raise ErrorEsquema(f"Meses desconocidos en MES: {sorted(desconocidos)}")
+			df[col] = meses.astype(object).astype(tipo)
+		elif tipo == 'float64':
+			df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+		else:
+			df[col] = df[col].astype(tipo)
+	return df
@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+	import resource
+except ImportError:  # Windows
+	resource = None
+
+
+# Registro de las etapas de una corrida del ETL: tiempo, filas de entrada y de
+# salida y memoria pico de cada etapa, para guardarlo como reporte JSON.
+#
+# El pico de memoria es el de cada etapa y no el del proceso desde que arrancó.
+# En Linux se reinicia el pico de memoria residente (VmHWM) al empezar la etapa
+# y se lee al terminar; en otros sistemas se usa el pico de lo asignado por
+# Python (tracemalloc). El pico incluye lo que dejaron las etapas anteriores,
+# así que también se guarda lo que la etapa sumó sobre la memoria que había al
+# empezar. Los procesos de los pools (lectura y escritura en paralelo) se miden
+# aparte con RUSAGE_CHILDREN.
+
+
+def _rusage_mb(quien):
+	"""ru_maxrss de getrusage en MB, o None si no se puede medir"""
+	if resource is None:
+		return None
+	pico = resource.getrusage(quien).ru_maxrss
+	# Linux informa KB y macOS bytes
+	return round(pico / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def _reiniciar_pico_residente():
+	"""Llevar el pico de memoria residente del proceso a la actual (Linux); False si no se puede"""
+	try:
+		with open('/proc/self/clear_refs', 'w') as f:
+			f.write('5')
+		return True
+	except OSError:
+		return False
+
+
+def _estado_mb(campo):
+	"""Campo de /proc/self/status en MB (VmHWM = pico residente, VmRSS = residente actual)"""
+	with open('/proc/self/status') as f:
+		for linea in f:
+			if linea.startswith(campo + ':'):
+				return int(linea.split()[1]) / 1024
+	return None
+
+
+class MedidorMemoria:
+	"""Pico de memoria del proceso y de sus hijos entre iniciar() y terminar()"""
+
+	def iniciar(self):
+		self.residente = _reiniciar_pico_residente()
+		if self.residente:
+			self.inicio = _estado_mb('VmRSS')
+		else:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start()
+			tracemalloc.reset_peak()
+			self.inicio = tracemalloc.get_traced_memory()[0] / (1 << 20)
+		self.hijos_antes = _rusage_mb(resource.RUSAGE_CHILDREN) if resource else None
+
+	def terminar(self):
+		"""(pico del proceso, pico menos la memoria al iniciar, pico del mayor hijo terminado o None), en MB
+
+		El de los hijos solo se conoce si supera al de los hijos de intervalos
+		anteriores: RUSAGE_CHILDREN guarda el máximo de todos los que terminaron.
+		"""
+		if self.residente:
+			pico = _estado_mb('VmHWM')
+		else:
+			pico = tracemalloc.get_traced_memory()[1] / (1 << 20)
+		hijos = _rusage_mb(resource.RUSAGE_CHILDREN) if resource else None
+		return round(pico, 1), round(max(pico - self.inicio, 0), 1), hijos if hijos is not None and hijos > (self.hijos_antes or 0) else None
+
+
+class Etapa:
+	"""Medición de una etapa; filas_entrada y filas_salida las completa quien la ejecuta"""
+
+	def __init__(self, nombre, filas_entrada=None):
+		self.nombre = nombre
+		self.filas_entrada = filas_entrada
+		self.filas_salida = None
+		self.segundos = None
+		self.memoria_pico_mb = None
+		self.memoria_extra_mb = None
+		self.memoria_hijos_mb = None
+
+	def como_dict(self):
+		return {
+			'etapa': self.nombre,
+			'segundos': self.segundos,
+			'filas_entrada': self.filas_entrada,
+			'filas_salida': self.filas_salida,
+			'memoria_pico_mb': self.memoria_pico_mb,
+			'memoria_extra_mb': self.memoria_extra_mb,
+			'memoria_hijos_mb': self.memoria_hijos_mb,
+		}
+
+
+class RegistroEtapas:
+	"""Etapas de una corrida en orden, con los parámetros con que se ejecutó"""
+
+	def __init__(self, parametros=None):
+		self.parametros = dict(parametros or {})
+		self.inicio = datetime.now()
+		self.etapas = []
+
+	@contextmanager
+	def etapa(self, nombre, filas_entrada=None):
+		"""Medir el bloque como la etapa nombre, con el pico de memoria de la etapa sola"""
+		etapa = Etapa(nombre, filas_entrada)
+		medidor = MedidorMemoria()
+		medidor.iniciar()
+		inicio = time.perf_counter()
+		try:
+			yield etapa
+		finally:
+			etapa.segundos = round(time.perf_counter() - inicio, 3)
+			etapa.memoria_pico_mb, etapa.memoria_extra_mb, etapa.memoria_hijos_mb = medidor.terminar()
+			self.etapas.append(etapa)
+
+	def memoria_pico_mb(self):
+		"""Mayor pico de memoria de las etapas, del proceso o de un hijo"""
+		picos = [v for e in self.etapas for v in (e.memoria_pico_mb, e.memoria_hijos_mb) if v is not None]
+		return max(picos, default=None)
+
+	def como_dict(self):
+		return {
+			'inicio': self.inicio.isoformat(timespec='seconds'),
+			'segundos_total': round(sum(e.segundos for e in self.etapas), 3),
+			'memoria_pico_mb': self.memoria_pico_mb(),
+			'parametros': self.parametros,
+			'etapas': [e.como_dict() for e in self.etapas],
+		}
+
+	def resumen(self):
+		"""Tabla de texto con una línea por etapa"""
+		lineas = [f"{'ETAPA':<12}{'SEGUNDOS':>10}{'FILAS ENTRADA':>15}{'FILAS SALIDA':>14}{'PICO MB':>10}{'+MB':>8}{'HIJOS MB':>10}"]
+		for e in self.etapas:
+			valores = ['-' if v is None else f'{v:,}'
+				for v in (e.filas_entrada, e.filas_salida, e.memoria_pico_mb, e.memoria_extra_mb, e.memoria_hijos_mb)]
+			lineas.append(f'{e.nombre:<12}{e.segundos:>10.2f}{valores[0]:>15}{valores[1]:>14}'
+				f'{valores[2]:>10}{valores[3]:>8}{valores[4]:>10}')
+		return '\n'.join(lineas)
+
+	def guardar(self, ruta):
+		"""Escribir el reporte JSON de forma atómica"""
+		with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+			json.dump(self.como_dict(), f, ensure_ascii=False, indent=1)
+		os.replace(ruta + '.tmp', ruta)
+		return ruta
@@ -0,0 +1,397 @@
+import argparse
+import glob
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from almacen_gas import guardar_almacen
+from campos_gas import MAPEO_CAMPOS, CampoResolver
+from esquema_gas import COLUMNAS_METRICAS, MESES, aplicar_esquema
+from lectura_gas import COLUMNAS_HOJA, extraer_anio, limpiar_encabezado
+from reportes_gas import escribir_libro, escribir_reportes, leer_sumatoria
+
+
+# Generador de datos sintéticos de producción para pruebas de escala. Primero
+# aprende un perfil de los Produccion_Fiscalizada_Gas_YYYY.xlsx reales (nombres
+# de hojas, variantes de encabezado por año, campos con su contrato, empresa,
+# departamento, municipio y cuenca, y distribuciones de los valores) y con ese
+# perfil escribe libros con la misma forma, o la tabla de hechos en Parquet, con
+# más campos y más años. Con la misma semilla y el mismo perfil los datos salen
+# iguales.
+#
+#   python DataGas/generador_gas.py --destino sinteticos_x10 --escala 10 --anios 24
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Métricas de destino del gas; en los libros reales suman la producción fiscalizada
+COLUMNAS_DESTINO = COLUMNAS_METRICAS[1:]
+
+# Encabezados de los libros que son otro nombre de una columna de COLUMNAS_HOJA
+ALIAS_COLUMNAS = {'OPERADOR': 'EMPRESA'}
+
+# Cuantiles que se guardan de cada distribución aprendida
+CUANTILES = np.linspace(0, 1, 41)
+
+PATRON_HOJA = re.compile(r'([a-zA-Záéíóúñ]+)([- ]?)(\d{2})$')
+
+
+def parsear_argumentos(argv=None):
+	parser = argparse.ArgumentParser(description="Generador de datos sintéticos de producción de gas")
+	parser.add_argument('--entrada', default=DIR_REPO,
+		help="Carpeta con los Produccion_Fiscalizada_Gas_YYYY.xlsx reales de los que se aprende el perfil")
+	parser.add_argument('--destino', required=True, help="Carpeta donde se escriben los datos sintéticos")
+	parser.add_argument('--perfil', default=None,
+		help="Perfil JSON: si existe se usa, si no se aprende de --entrada y se guarda ahí")
+	parser.add_argument('--escala', type=float, default=1, help="Factor sobre la cantidad de campos")
+	parser.add_argument('--anios', type=int, default=None, help="Cantidad de años (por defecto, los del perfil)")
+	parser.add_argument('--anio-inicial', type=int, default=None, help="Primer año (por defecto, el del perfil)")
+	parser.add_argument('--semilla', type=int, default=0, help="Semilla de los números aleatorios")
+	parser.add_argument('--formato', choices=['libros', 'hechos'], default='libros',
+		help="libros: Produccion_Fiscalizada_Gas_YYYY.xlsx y Excel de cuencas; hechos: tabla de hechos en Parquet")
+	parser.add_argument('--procesos', type=int, default=1, help="Procesos para escribir los libros")
+	return parser.parse_args(argv)
+
+
+# --- Perfil ---
+
+def clave_columna(encabezado):
+	"""Columna de COLUMNAS_HOJA (o AÑO/MES) a la que corresponde un encabezado original, o None"""
+	if encabezado is None:
+		return None
+	texto = ' '.join(limpiar_encabezado(encabezado).split())
+	if 'PRODUCCION' in texto and 'FISCALIZADA' in texto:
+		return 'PRODUCCION FISCALIZADA'
+	texto = ALIAS_COLUMNAS.get(texto, texto)
+	return texto if texto in COLUMNAS_HOJA or texto in ('AÑO', 'MES') else None
+
+
+def leer_hojas_crudas(archivo):
+	"""(nombres de hojas, [(hoja, encabezado, DataFrame)]) de un libro, con todas las columnas de cada hoja.
+
+	A diferencia de lectura_gas, aquí las métricas se reconocen sin importar los
+	espacios de sus encabezados, para aprender sus valores aunque el ETL no las lea.
+	"""
+	libro = load_workbook(archivo, read_only=True)
+	try:
+		hojas = []
+		for nombre in libro.sheetnames[1:]:
+			filas = libro[nombre].iter_rows(values_only=True)
+			encabezado = list(next(filas, ()))
+			while encabezado and encabezado[-1] is None:
+				encabezado.pop()
+			claves = [clave_columna(c) for c in encabezado]
+			posiciones = {c: i for i, c in reversed(list(enumerate(claves))) if c is not None}
+			datos = [[fila[i] if i < len(fila) else None for i in posiciones.values()] for fila in filas]
+			df = pd.DataFrame(datos, columns=list(posiciones))
+			hojas.append((nombre, tuple(encabezado), df.dropna(subset=['CAMPO'])))
+		return libro.sheetnames, hojas
+	finally:
+		libro.close()
+
+
+def _cuantiles(valores):
+	valores = np.asarray(valores, dtype=np.float64)
+	return np.round(np.quantile(valores, CUANTILES), 4).tolist() if len(valores) else [0.0, 0.0]
+
+
+def _pesos(serie):
+	"""[[valor, cantidad], ...] de una serie, de mayor a menor cantidad"""
+	return [[str(valor), int(cantidad)] for valor, cantidad in serie.value_counts().items()]
+
+
+def _cuencas_resumen(entrada):
+	"""CAMPO_LIMPIO -> CUENCA de produccion_gas_resumenes.xlsx, si existe"""
+	ruta = os.path.join(entrada, 'produccion_gas_resumenes.xlsx')
+	if not os.path.exists(ruta):
+		return {}
+	sumatoria = leer_sumatoria(ruta, usecols=['CAMPO_LIMPIO', 'CUENCA'])
+	sumatoria = sumatoria.dropna().drop_duplicates('CAMPO_LIMPIO')
+	return dict(zip(sumatoria['CAMPO_LIMPIO'].astype(str), sumatoria['CUENCA'].astype(str)))
+
+
+def aprender_perfil(entrada):
+	"""Perfil (diccionario serializable a JSON) de los libros de la carpeta entrada.
+
+	Guarda la forma de cada libro (primera hoja, separador del nombre de las hojas
+	y encabezado de cada hoja mensual), los campos con sus atributos y el reparto
+	de su producción entre los destinos, y las distribuciones de la producción:
+	nivel de cada campo por año, cambio de su percentil de un año al siguiente,
+	ruido mensual, años activos de cada campo y probabilidad de que un campo
+	reporte en un mes.
+	"""
+	archivos = sorted(glob.glob(os.path.join(entrada, 'Produccion_Fiscalizada_Gas_*.xlsx')))
+	if not archivos:
+		raise FileNotFoundError(f"No hay libros Produccion_Fiscalizada_Gas_*.xlsx en {entrada}")
+
+	encabezados, libros, partes = [], [], []
+	for archivo in archivos:
+		anio = extraer_anio(os.path.basename(archivo))
+		nombres, hojas = leer_hojas_crudas(archivo)
+		separadores = pd.Series([m.group(2) for m in map(PATRON_HOJA.match, nombres[1:]) if m], dtype=object)
+		indices = []
+		for nombre, encabezado, df in hojas:
+			if encabezado not in encabezados:
+				encabezados.append(encabezado)
+			indices.append(encabezados.index(encabezado))
+			partes.append(df.assign(AÑO=anio, MES=MESES.index(PATRON_HOJA.match(nombre).group(1).lower()) + 1))
+		libros.append({
+			'anio': anio,
+			'primera_hoja': nombres[0],
+			'separador': separadores.mode().iloc[0] if len(separadores) else '-',
+			'encabezados': indices,
+			'filas_por_hoja': round(float(np.mean([len(df) for _, _, df in hojas])), 1),
+		})
+
+	df = pd.concat(partes, ignore_index=True)
+	for col in COLUMNAS_METRICAS:
+		df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).clip(lower=0) if col in df.columns else 0.0
+	for col in ['CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO']:
+		df[col] = df[col].astype('string').str.strip()
+	df['CAMPO'] = df['CAMPO'].astype(str)
+	anios = sorted(df['AÑO'].unique().tolist())
+
+	# Campos: atributos más frecuentes y reparto de la producción entre los destinos
+	cuencas = _cuencas_resumen(entrada)
+	atributos = df.groupby('CAMPO')[['CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO']].agg(
+		lambda s: s.mode().iloc[0] if s.notna().any() else '')
+	destinos = df.groupby('CAMPO')[COLUMNAS_DESTINO].sum()
+	reparto = destinos.div(destinos.sum(axis=1).replace(0, np.nan), axis=0).fillna(0).round(4)
+	campos = [
+		[campo, fila['CONTRATO'], fila['EMPRESA'], fila['DEPARTAMENTO'], fila['MUNICIPIO'],
+			cuencas.get(MAPEO_CAMPOS.get(campo, campo), ''), reparto.loc[campo].tolist()]
+		for campo, fila in atributos.iterrows()
+	]
+
+	# Producción por campo y año: nivel (log de la media de los meses con producción),
+	# cambio del percentil del campo entre años consecutivos y ruido de cada mes
+	# alrededor de su media
+	positivos = df[df['PRODUCCION FISCALIZADA'] > 0]
+	nivel = np.log(positivos.groupby(['CAMPO', 'AÑO'])['PRODUCCION FISCALIZADA'].mean())
+	percentil = nivel.groupby(level='AÑO').rank(pct=True)
+	variacion = percentil.groupby(level='CAMPO').diff().dropna()
+	ruido = np.log(positivos['PRODUCCION FISCALIZADA']) - nivel.reindex(
+		pd.MultiIndex.from_frame(positivos[['CAMPO', 'AÑO']])).to_numpy()
+
+	meses_campo = df.drop_duplicates(['CAMPO', 'AÑO', 'MES']).groupby(['CAMPO', 'AÑO']).size()
+	empresas = df.dropna(subset=['EMPRESA']).drop_duplicates(['CAMPO', 'AÑO']).sort_values(['CAMPO', 'AÑO'])
+	cambio_empresa = empresas.groupby('CAMPO')['EMPRESA'].apply(lambda s: (s != s.shift()).iloc[1:]).mean()
+
+	return {
+		'anios': anios,
+		'encabezados': [list(e) for e in encabezados],
+		'libros': libros,
+		'campos': campos,
+		'empresas': _pesos(df.drop_duplicates(['CAMPO', 'EMPRESA'])['EMPRESA'].dropna()),
+		'produccion': {
+			'nivel': _cuantiles(nivel),
+			'variacion_percentil': _cuantiles(variacion),
+			'ruido_mensual': _cuantiles(ruido),
+			'prob_cero': round(float((df['PRODUCCION FISCALIZADA'] == 0).mean()), 4),
+		},
+		'actividad': {
+			'fraccion_anios': _cuantiles(df.groupby('CAMPO')['AÑO'].nunique() / len(anios)),
+			'prob_mes': round(float(meses_campo.sum() / (len(meses_campo) * 12)), 4),
+			'prob_cambio_empresa': round(float(cambio_empresa), 4) if pd.notna(cambio_empresa) else 0.0,
+		},
+	}
+
+
+def guardar_perfil(perfil, ruta):
+	with open(ruta, 'w', encoding='utf-8') as f:
+		json.dump(perfil, f, ensure_ascii=False, indent=1)
+	return ruta
+
+
+def cargar_perfil(ruta):
+	with open(ruta, encoding='utf-8') as f:
+		return json.load(f)
+
+
+# --- Generación ---
+
+def _muestrear(cuantiles, tamano, rng):
+	"""Muestras de la distribución descrita por sus cuantiles (interpolación lineal)"""
+	return np.interp(rng.random(tamano), np.linspace(0, 1, len(cuantiles)), cuantiles)
+
+
+def generar_campos(perfil, escala=1, rng=None):
+	"""DataFrame de los campos sintéticos: CAMPO, CONTRATO, EMPRESA, DEPARTAMENTO, MUNICIPIO, CUENCA.
+
+	Cada campo copia los atributos de un campo real; las copias de más llevan el
+	nombre del campo real con un número ('APIAY 2'), así que DEPARTAMENTO,
+	MUNICIPIO y EMPRESA mantienen sus cardinalidades y solo crece CAMPO. El
+	reparto entre destinos de cada campo se devuelve aparte, alineado con las filas.
+	"""
+	rng = rng if rng is not None else np.random.default_rng(0)
+	base = perfil['campos']
+	total = max(1, int(round(len(base) * escala)))
+	origen = np.arange(total) % len(base)
+	copia = np.arange(total) // len(base)
+	filas = []
+	for i, c in zip(origen, copia):
+		campo, contrato, empresa, departamento, municipio, cuenca, _ = base[i]
+		nombre = campo if c == 0 else f'{campo} {c + 1}'
+		filas.append((nombre, nombre if contrato == campo else contrato, empresa, departamento, municipio, cuenca))
+	campos = pd.DataFrame(filas, columns=['CAMPO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO', 'CUENCA'])
+	reparto = np.array([base[i][6] for i in origen], dtype=np.float64).reshape(total, len(COLUMNAS_DESTINO))
+	return campos, reparto
+
+
+def generar_hechos(perfil, escala=1, anios=None, anio_inicial=None, semilla=0):
+	"""(hechos, campos) sintéticos a partir de un perfil.
+
+	hechos tiene una fila por campo y mes con AÑO, MES (nombre), los atributos de
+	COLUMNAS_HOJA y las métricas; campos es la tabla de generar_campos con la cuenca
+	de cada campo. Cada campo está activo una racha de años seguidos (su largo sigue
+	la fracción de años activos aprendida y la racha da la vuelta al final del
+	periodo, para que todos los años tengan en promedio los mismos campos) y en
+	cada año activo reporta cada mes con la probabilidad aprendida. El nivel de un
+	campo es un percentil que cambia de un año a otro como en los datos reales, así
+	que la distribución de niveles de cada año es la aprendida.
+	"""
+	rng = np.random.default_rng(semilla)
+	anios = anios or len(perfil['anios'])
+	anio_inicial = anio_inicial or perfil['anios'][0]
+	if anio_inicial + anios - 1 > 2099:
+		# extraer_anio solo reconoce años 20XX en el nombre del archivo
+		raise ValueError(f"El último año ({anio_inicial + anios - 1}) no puede pasar de 2099")
+	produccion, actividad = perfil['produccion'], perfil['actividad']
+	campos, reparto = generar_campos(perfil, escala, rng)
+	n = len(campos)
+
+	# Racha de años activos de cada campo y una fila por campo y año
+	duracion = np.clip(np.rint(_muestrear(actividad['fraccion_anios'], n, rng) * anios), 1, anios).astype(np.int64)
+	inicio = rng.integers(0, anios, n)
+	campo_anio = np.repeat(np.arange(n), duracion)
+	desfase = np.arange(len(campo_anio)) - np.repeat(np.cumsum(duracion) - duracion, duracion)
+	primero = desfase == 0
+
+	# Nivel de cada campo por año: percentil inicial más los cambios de cada año
+	paso = _muestrear(produccion['variacion_percentil'], len(campo_anio), rng)
+	paso[primero] = rng.random(n)
+	# El percentil rebota en 0 y 1 para que siga repartido de forma uniforme
+	percentil = np.abs(pd.Series(paso).groupby(campo_anio).cumsum().to_numpy()) % 2
+	percentil = np.where(percentil > 1, 2 - percentil, percentil)
+	nivel = np.interp(percentil, CUANTILES, produccion['nivel'])
+
+	# Empresa de cada campo por año: la del campo real, con cambios ocasionales
+	empresas = pd.Series([e for e, _ in perfil['empresas']] or [''], dtype=object)
+	pesos = np.array([p for _, p in perfil['empresas']] or [1], dtype=np.float64)
+	empresa = pd.Series(np.where(primero, campos['EMPRESA'].to_numpy()[campo_anio], None), dtype=object)
+	cambio = ~primero & (rng.random(len(campo_anio)) < actividad['prob_cambio_empresa'])
+	empresa[cambio] = empresas.to_numpy()[rng.choice(len(empresas), cambio.sum(), p=pesos / pesos.sum())]
+	empresa = empresa.groupby(campo_anio).ffill().to_numpy()
+
+	# Una fila por campo, año y mes en que reporta
+	fila_anio = np.repeat(np.arange(len(campo_anio)), 12)
+	mes = np.tile(np.arange(12), len(campo_anio))
+	reporta = rng.random(len(fila_anio)) < actividad['prob_mes']
+	fila_anio, mes = fila_anio[reporta], mes[reporta]
+	campo = campo_anio[fila_anio]
+
+	valor = np.exp(nivel[fila_anio] + _muestrear(produccion['ruido_mensual'], len(fila_anio), rng))
+	valor[rng.random(len(fila_anio)) < produccion['prob_cero']] = 0
+	valor = np.round(valor, 2)
+
+	hechos = pd.DataFrame({
+		'AÑO': anio_inicial + (inicio[campo] + desfase[fila_anio]) % anios,
+		'MES': np.asarray(MESES)[mes],
+		'CAMPO': campos['CAMPO'].to_numpy()[campo],
+		'CONTRATO': campos['CONTRATO'].to_numpy()[campo],
+		'EMPRESA': empresa[fila_anio],
+		'DEPARTAMENTO': campos['DEPARTAMENTO'].to_numpy()[campo],
+		'MUNICIPIO': campos['MUNICIPIO'].to_numpy()[campo],
+		'PRODUCCION FISCALIZADA': valor,
+	})
+	destinos = np.round(valor[:, None] * reparto[campo], 2)
+	for i, col in enumerate(COLUMNAS_DESTINO):
+		hechos[col] = destinos[:, i]
+	hechos['MES'] = hechos['MES'].astype(pd.CategoricalDtype(MESES, ordered=True))
+	hechos = hechos.sort_values(['AÑO', 'MES', 'CAMPO'], kind='stable', ignore_index=True)
+	return hechos, campos
+
+
+def libro_de_referencia(perfil, posicion, anios):
+	"""Libro real cuya forma copia el año sintético número posicion (las épocas se estiran a anios)"""
+	libros = perfil['libros']
+	return libros[min(len(libros) - 1, posicion * len(libros) // anios)]
+
+
+def hojas_libro(perfil, referencia, anio, hechos_anio):
+	"""Hojas (nombre -> DataFrame) de un libro sintético con la forma de referencia.
+
+	Cada hoja mensual lleva el encabezado original de la hoja del mismo mes del
+	libro de referencia, con sus saltos de línea, su orden y sus alias.
+	"""
+	resumen = hechos_anio.pivot_table(index='CAMPO', columns='MES', values='PRODUCCION FISCALIZADA',
+		aggfunc='sum', observed=True).round(2).reset_index()
+	resumen.columns = [str(c) for c in resumen.columns]
+	hojas = {referencia['primera_hoja']: resumen}
+	for mes, df_mes in hechos_anio.groupby('MES', observed=True):
+		numero = MESES.index(mes)
+		encabezado = perfil['encabezados'][referencia['encabezados'][min(numero, len(referencia['encabezados']) - 1)]]
+		valores = df_mes.assign(MES=numero + 1)
+		hoja = pd.DataFrame({
+			str(original): valores[clave].to_numpy() if clave else None
+			for original, clave in ((e, clave_columna(e)) for e in encabezado)
+		})
+		hojas[f"{mes}{referencia['separador']}{anio % 100:02d}"] = hoja
+	return hojas
+
+
+def tabla_cuencas(campos):
+	"""Excel de cuencas de los campos sintéticos: CAMPO (ya con MAPEO_CAMPOS aplicado) y CUENCA"""
+	cuencas = campos[['CAMPO', 'CUENCA']].assign(CAMPO=CampoResolver().limpiar(campos['CAMPO']))
+	return cuencas[cuencas['CUENCA'] != ''].drop_duplicates('CAMPO')
+
+
+def escribir_libros(perfil, hechos, campos, destino, procesos=1):
+	"""Escribir un Produccion_Fiscalizada_Gas_YYYY.xlsx por año y cuencas_campos_gas.xlsx en destino"""
+	os.makedirs(destino, exist_ok=True)
+	anios = sorted(hechos['AÑO'].unique())
+	libros = {}
+	for posicion, (anio, hechos_anio) in enumerate(hechos.groupby('AÑO')):
+		referencia = libro_de_referencia(perfil, posicion, len(anios))
+		ruta = os.path.join(destino, f'Produccion_Fiscalizada_Gas_{anio}.xlsx')
+		libros[ruta] = hojas_libro(perfil, referencia, anio, hechos_anio)
+	escribir_reportes(libros, procesos=procesos)
+	escribir_libro(os.path.join(destino, 'cuencas_campos_gas.xlsx'), {'Cuencas': tabla_cuencas(campos)})
+	return list(libros)
+
+
+def escribir_hechos(hechos, campos, destino):
+	"""Escribir la tabla de hechos (con CAMPO_LIMPIO y CUENCA) en el almacén Parquet de destino"""
+	resolver = CampoResolver(tabla_cuencas(campos))
+	hechos = hechos.assign(CAMPO_LIMPIO=resolver.limpiar(hechos['CAMPO']))
+	hechos['CUENCA'] = resolver.cuencas(hechos['CAMPO_LIMPIO'])
+	return guardar_almacen({'Hechos': aplicar_esquema(hechos)}, destino)
+
+
+def main(argv=None):
+	args = parsear_argumentos(argv)
+	if args.perfil and os.path.exists(args.perfil):
+		perfil = cargar_perfil(args.perfil)
+		print(f"Perfil cargado: {args.perfil}")
+	else:
+		perfil = aprender_perfil(args.entrada)
+		print(f"Perfil aprendido de {len(perfil['libros'])} libros y {len(perfil['campos'])} campos")
+		if args.perfil:
+			print(f"Perfil guardado: {guardar_perfil(perfil, args.perfil)}")
+
+	hechos, campos = generar_hechos(perfil, args.escala, args.anios, args.anio_inicial, args.semilla)
+	print(f"Generados {len(hechos):,} registros de {len(campos):,} campos entre "
+		f"{hechos['AÑO'].min()} y {hechos['AÑO'].max()}")
+	if args.formato == 'hechos':
+		print(f"Tabla de hechos escrita en: {escribir_hechos(hechos, campos, args.destino)}")
+	else:
+		rutas = escribir_libros(perfil, hechos, campos, args.destino, args.procesos)
+		print(f"{len(rutas)} libros escritos en: {args.destino}")
+	return hechos
+
+
+if __name__ == '__main__':
+	main()
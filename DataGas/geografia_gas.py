@@ -0,0 +1,146 @@
+import json
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+# Referencia geográfica de los departamentos para el mapa del dashboard. La tabla
+# de coordenadas se arma una vez al importar el módulo y se cruza con los totales
+# por departamento con un merge. La geometría opcional (GeoJSON de departamentos)
+# se prepara una vez al iniciar: ids normalizados, coordenadas redondeadas y solo
+# lo que necesita el mapa, para servirla como un archivo aparte que el navegador
+# guarda en caché en lugar de repetirla en cada figura.
+
+# Nombres que la fuente de datos y los GeoJSON más comunes escriben distinto
+ALIAS_DEPARTAMENTOS = {
+	'LA GUAJIRA': 'GUAJIRA',
+	'VALLE': 'VALLE DEL CAUCA',
+	'BOGOTA D.C.': 'BOGOTA',
+	'BOGOTA, D.C.': 'BOGOTA',
+	'SANTAFE DE BOGOTA D.C': 'BOGOTA',
+	'ARCHIPIELAGO DE SAN ANDRES, PROVIDENCIA Y SANTA CATALINA': 'SAN ANDRES Y PROVIDENCIA',
+	'SAN ANDRES': 'SAN ANDRES Y PROVIDENCIA',
+}
+
+# Propiedades donde suelen venir los nombres de departamento en los GeoJSON de Colombia
+PROPIEDADES_NOMBRE = ('DPTO_CNMBR', 'NOMBRE_DPT', 'DPTO', 'NAME_1', 'name', 'NOMBRE')
+
+
+def clave_departamento(nombre):
+	"""Nombre de departamento en mayúsculas, sin tildes ni espacios repetidos y con los alias unificados"""
+	texto = unicodedata.normalize('NFKD', str(nombre))
+	texto = ''.join(c for c in texto if not unicodedata.combining(c))
+	texto = ' '.join(texto.upper().split())
+	return ALIAS_DEPARTAMENTOS.get(texto, texto)
+
+
+# Coordenadas aproximadas de las capitales de departamento
+COORDENADAS_DEPARTAMENTOS = pd.DataFrame([
+	('ARAUCA', 7.0889, -70.7591),
+	('BOYACA', 5.4544, -73.3624),
+	('CASANARE', 5.3356, -72.4056),
+	('CESAR', 10.4636, -73.2532),
+	('CUNDINAMARCA', 4.7110, -74.0721),
+	('HUILA', 2.9273, -75.2819),
+	('LA GUAJIRA', 11.5444, -72.9072),
+	('META', 4.1420, -73.6266),
+	('PUTUMAYO', 0.5136, -76.3567),
+	('SANTANDER', 7.1193, -73.1227),
+	('TOLIMA', 4.4389, -75.2322),
+	('NORTE DE SANTANDER', 7.8939, -72.5078),
+	('ANTIOQUIA', 6.2442, -75.5812),
+	('CORDOBA', 8.7479, -75.8814),
+	('MAGDALENA', 11.2408, -74.1990),
+	('BOLIVAR', 10.3910, -75.4794),
+	('VALLE DEL CAUCA', 3.4516, -76.5320),
+	('CAUCA', 2.4418, -76.6063),
+	('NARIÑO', 1.2136, -77.2811),
+	('CHOCO', 5.6837, -76.6581),
+	('SUCRE', 9.3017, -75.3975),
+	('ATLANTICO', 10.9685, -74.7813),
+	('CALDAS', 5.0689, -75.5174),
+	('QUINDIO', 4.5389, -75.6661),
+	('RISARALDA', 4.8133, -75.6961),
+	('CAQUETA', 1.6145, -75.6062),
+	('VICHADA', 6.1167, -67.4167),
+	('GUAVIARE', 2.5649, -72.6409),
+	('VAUPES', 1.2500, -70.2333),
+	('GUAINIA', 2.5833, -67.9167),
+	('AMAZONAS', -4.2158, -69.9406),
+	('SAN ANDRES Y PROVIDENCIA', 12.5847, -81.7006),
+], columns=['CLAVE', 'lat', 'lon'])
+COORDENADAS_DEPARTAMENTOS['CLAVE'] = COORDENADAS_DEPARTAMENTOS['CLAVE'].map(clave_departamento)
+
+
+def ubicar_departamentos(departamentos, centros=None):
+	"""(claves, lat, lon) de cada departamento, en el mismo orden.
+
+	Primero se usa la capital; si no está, el centro de su geometría (centros,
+	de preparar_geojson) y, si tampoco, un punto cerca del centro del país
+	corrido según su posición para que no se superpongan.
+	"""
+	claves = pd.Series([clave_departamento(d) for d in departamentos], name='CLAVE')
+	referencia = COORDENADAS_DEPARTAMENTOS
+	if centros is not None:
+		referencia = pd.concat([referencia, centros[~centros['CLAVE'].isin(referencia['CLAVE'])]], ignore_index=True)
+	ubicados = claves.to_frame().merge(referencia, on='CLAVE', how='left')
+	posicion = np.arange(len(claves)) * 0.1
+	lat = ubicados['lat'].fillna(pd.Series(4.5 + posicion)).to_numpy()
+	lon = ubicados['lon'].fillna(pd.Series(-74.0 + posicion)).to_numpy()
+	return claves.to_numpy(), lat, lon
+
+
+def _redondear_anillo(anillo, decimales):
+	"""Anillo con coordenadas redondeadas y sin puntos repetidos seguidos"""
+	puntos = np.round(np.asarray(anillo, dtype=np.float64)[:, :2], decimales)
+	distintos = np.ones(len(puntos), dtype=bool)
+	distintos[1:] = np.any(puntos[1:] != puntos[:-1], axis=1)
+	return puntos[distintos].tolist()
+
+
+def _redondear_geometria(geometria, decimales):
+	if geometria['type'] == 'Polygon':
+		poligonos = [geometria['coordinates']]
+	elif geometria['type'] == 'MultiPolygon':
+		poligonos = geometria['coordinates']
+	else:
+		return None
+	resultado = []
+	for poligono in poligonos:
+		anillos = [_redondear_anillo(anillo, decimales) for anillo in poligono]
+		# Un anillo necesita al menos 4 puntos (el último repite el primero)
+		anillos = [anillo for anillo in anillos if len(anillo) >= 4]
+		if anillos:
+			resultado.append(anillos)
+	if not resultado:
+		return None
+	return {'type': 'MultiPolygon', 'coordinates': resultado}
+
+
+def preparar_geojson(ruta, decimales=3):
+	"""Leer un GeoJSON de departamentos y dejarlo listo para el mapa.
+
+	Devuelve (geojson, centros): cada feature queda con id = clave_departamento
+	de su nombre y solo la geometría, con las coordenadas redondeadas a
+	decimales (3 decimales son ~100 m). centros trae CLAVE, lat y lon del centro
+	del rectángulo que encierra cada departamento.
+	"""
+	with open(ruta, encoding='utf-8') as f:
+		original = json.load(f)
+
+	features, centros = [], []
+	for feature in original.get('features', []):
+		propiedades = feature.get('properties') or {}
+		nombre = next((propiedades[p] for p in PROPIEDADES_NOMBRE if propiedades.get(p)), feature.get('id'))
+		geometria = _redondear_geometria(feature.get('geometry') or {'type': None}, decimales)
+		if nombre is None or geometria is None:
+			continue
+		clave = clave_departamento(nombre)
+		features.append({'type': 'Feature', 'id': clave, 'properties': {}, 'geometry': geometria})
+		puntos = np.array([p for poligono in geometria['coordinates'] for anillo in poligono for p in anillo])
+		(lon_min, lat_min), (lon_max, lat_max) = puntos.min(axis=0), puntos.max(axis=0)
+		centros.append((clave, (lat_min + lat_max) / 2, (lon_min + lon_max) / 2))
+
+	geojson = {'type': 'FeatureCollection', 'features': features}
+	return geojson, pd.DataFrame(centros, columns=['CLAVE', 'lat', 'lon'])
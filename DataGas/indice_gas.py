@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+
+# Índice por año para las consultas del filtro de años del dashboard. Las filas
+# quedan ordenadas por AÑO con el desplazamiento donde empieza cada año, y para
+# cada entidad (campo, cuenca o departamento) se guardan las sumas acumuladas a
+# lo largo de los años. El total de cualquier rango [inicio, fin] es la resta de
+# dos columnas de esa matriz, sin filtrar ni agrupar filas. IndiceMensual suma a
+# eso la serie mes a mes de cada entidad, para la vista mensual.
+
+# Decimales de todas las sumas que entrega el índice. Restar sumas acumuladas deja
+# errores de redondeo de ~1e-9 que no tiene filtrar y agrupar: un rango sin
+# producción daría 1e-11 en lugar de 0 y dos entidades empatadas dejarían de
+# estarlo en los rankings. Los datos traen a lo sumo 5 decimales.
+DECIMALES = 6
+
+
+class IndiceAnual:
+	"""Filas ordenadas por AÑO y sumas acumuladas de valor por entidad y año.
+
+	Con entidad=None toda la tabla es una sola entidad (p. ej. Totales_Anuales).
+	Los totales por entidad son los mismos que df.groupby(entidad, observed=True)
+	sobre las filas del rango: en el orden de las categorías (o alfabético) y solo
+	con las entidades que tienen filas en el rango.
+	"""
+
+	def __init__(self, df, entidad=None, valor='PRODUCCION FISCALIZADA'):
+		if not df['AÑO'].is_monotonic_increasing:
+			df = df.sort_values('AÑO', kind='stable', ignore_index=True)
+		self.df = df
+		self.entidad = entidad
+		self.valor = valor
+
+		anios_filas = df['AÑO'].to_numpy()
+		self.anios = np.unique(anios_filas)
+		self._desde = np.searchsorted(anios_filas, np.append(self.anios, np.iinfo(np.int64).max))
+		self._anios_filas = anios_filas
+
+		if entidad is None:
+			codigos, self.categorias = np.zeros(len(df), dtype=np.int64), pd.Index([None])
+		elif isinstance(df[entidad].dtype, pd.CategoricalDtype):
+			codigos, self.categorias = df[entidad].cat.codes.to_numpy(np.int64), df[entidad].cat.categories
+		else:
+			codigos, self.categorias = pd.factorize(df[entidad], sort=True)
+		self.categorias = pd.Index(self.categorias, name=entidad)
+
+		# Suma de cada año con todas las filas, para el total y los KPIs
+		n_anios = len(self.anios)
+		columna = np.searchsorted(self.anios, anios_filas)
+		valores = np.nan_to_num(df[valor].to_numpy(np.float64))
+		self.suma_anual = np.round(np.bincount(columna, weights=valores, minlength=n_anios), DECIMALES)
+		self._total_acum = np.concatenate([[0.0], np.cumsum(self.suma_anual)])
+
+		# Matrices entidad x año con la suma y el número de filas (los nulos de entidad no cuentan, como en groupby)
+		validos = codigos >= 0
+		celda = codigos[validos] * n_anios + columna[validos]
+		tamano = len(self.categorias) * n_anios
+		self.suma = np.round(np.bincount(celda, weights=valores[validos], minlength=tamano), DECIMALES).reshape(-1, n_anios)
+		self.conteo = np.bincount(celda, minlength=tamano).reshape(-1, n_anios)
+		ceros = np.zeros((len(self.categorias), 1))
+		self._suma_acum = np.hstack([ceros, np.cumsum(self.suma, axis=1)])
+		self._conteo_acum = np.hstack([ceros.astype(np.int64), np.cumsum(self.conteo, axis=1)])
+
+		# Posiciones de las filas de cada entidad, en orden de año
+		self._orden = np.argsort(codigos, kind='stable')
+		self._desde_entidad = np.searchsorted(codigos[self._orden], np.arange(len(self.categorias) + 1))
+
+	def columnas(self, inicio, fin):
+		"""Posiciones [i, j) de los años del rango [inicio, fin] en self.anios"""
+		return np.searchsorted(self.anios, inicio, 'left'), np.searchsorted(self.anios, fin, 'right')
+
+	def filas(self, inicio, fin):
+		"""Filas de los años del rango, en el orden del índice"""
+		i, j = self.columnas(inicio, fin)
+		return self.df.iloc[self._desde[i]:self._desde[j]]
+
+	def totales(self, inicio, fin):
+		"""Suma de valor por entidad en el rango (solo entidades con filas en el rango)"""
+		i, j = self.columnas(inicio, fin)
+		presentes = (self._conteo_acum[:, j] - self._conteo_acum[:, i]) > 0
+		suma = np.round(self._suma_acum[:, j] - self._suma_acum[:, i], DECIMALES)
+		return pd.Series(suma[presentes], index=self.categorias[presentes], name=self.valor)
+
+	def total(self, inicio, fin):
+		"""Suma de valor de todas las filas del rango"""
+		i, j = self.columnas(inicio, fin)
+		return round(float(self._total_acum[j] - self._total_acum[i]), DECIMALES)
+
+	def por_anio(self, inicio, fin):
+		"""(años, suma de valor de cada año) del rango, solo años con filas"""
+		i, j = self.columnas(inicio, fin)
+		return self.anios[i:j], self.suma_anual[i:j]
+
+	def por_anio_entidad(self, inicio, fin):
+		"""Suma por (AÑO, entidad) en el rango, ordenada por año y entidad como groupby([AÑO, entidad])"""
+		i, j = self.columnas(inicio, fin)
+		anio, entidad = np.nonzero(self.conteo[:, i:j].T)
+		return pd.DataFrame({
+			'AÑO': self.anios[i:j][anio],
+			self.entidad: self.categorias[entidad],
+			self.valor: self.suma[entidad, i + anio],
+		})
+
+	def filas_entidad(self, nombre, inicio, fin):
+		"""Filas de una entidad en los años del rango"""
+		codigo = self.categorias.get_loc(nombre)
+		posiciones = self._orden[self._desde_entidad[codigo]:self._desde_entidad[codigo + 1]]
+		anios = self._anios_filas[posiciones]
+		desde, hasta = np.searchsorted(anios, inicio, 'left'), np.searchsorted(anios, fin, 'right')
+		return self.df.iloc[posiciones[desde:hasta]]
+
+	def como_columnas(self):
+		"""Arreglos del índice en listas (para JSON), para repetir las consultas de rango en el navegador"""
+		return {
+			'decimales': DECIMALES,
+			'anios': self.anios.tolist(),
+			'entidades': None if self.entidad is None else [str(c) for c in self.categorias],
+			'suma_anual': self.suma_anual.tolist(),
+			'total_acum': self._total_acum.tolist(),
+			'suma_acum': self._suma_acum.tolist(),
+			'conteo_acum': self._conteo_acum.tolist(),
+		}
+
+	def kpis(self, inicio, fin):
+		"""Total, (año, valor) del mejor y del peor año y variación % del último año frente al anterior"""
+		anios, valores = self.por_anio(inicio, fin)
+		if len(anios) == 0:
+			return None
+		mejor, peor = int(np.argmax(valores)), int(np.argmin(valores))
+		with np.errstate(divide='ignore', invalid='ignore'):
+			var_ult = (valores[-1] - valores[-2]) / valores[-2] * 100 if len(valores) > 1 else 0
+		return {
+			'total': self.total(inicio, fin),
+			'mejor': (anios[mejor], valores[mejor]),
+			'peor': (anios[peor], valores[peor]),
+			'var_ult': var_ult,
+		}
+
+
+class IndiceMensual(IndiceAnual):
+	"""IndiceAnual de una tabla mensual con la serie mes a mes de cada entidad y del total.
+
+	Los meses se numeran como periodos, AÑO * 12 + número de mes - 1, así que el
+	periodo siguiente a diciembre es enero del año siguiente. Las series quedan
+	compactas: un valor por (entidad, periodo), ordenadas por entidad y periodo,
+	con el desplazamiento donde empieza cada entidad. MES debe ser la categórica
+	del esquema (TIPO_MES); las filas sin mes no entran en las series.
+	"""
+
+	def __init__(self, df, entidad=None, valor='PRODUCCION FISCALIZADA'):
+		super().__init__(df, entidad, valor)
+		meses = self.df['MES'].cat.codes.to_numpy(np.int64)
+		periodos = self.df['AÑO'].to_numpy(np.int64) * 12 + meses
+		valores = np.nan_to_num(self.df[valor].to_numpy(np.float64))
+		if entidad is None:
+			codigos = np.zeros(len(self.df), dtype=np.int64)
+		else:
+			codigos = self.categorias.get_indexer(self.df[entidad])
+		con_mes = meses >= 0
+		primero = int(periodos[con_mes].min()) if con_mes.any() else 0
+		n_periodos = int(periodos[con_mes].max()) - primero + 1 if con_mes.any() else 0
+
+		# Total de todas las entidades por periodo (solo periodos con filas)
+		columna = periodos[con_mes] - primero
+		suma = np.round(np.bincount(columna, weights=valores[con_mes], minlength=n_periodos), DECIMALES)
+		presentes = np.bincount(columna, minlength=n_periodos) > 0
+		self.periodos_total = np.flatnonzero(presentes) + primero
+		self.valores_total = suma[presentes]
+
+		# Una celda por (entidad, periodo) con filas; np.unique deja las claves ordenadas
+		validos = con_mes & (codigos >= 0)
+		claves, posicion = np.unique(codigos[validos] * n_periodos + periodos[validos] - primero, return_inverse=True)
+		self._valores = np.round(np.bincount(posicion, weights=valores[validos], minlength=len(claves)), DECIMALES)
+		entidades, self._periodos = np.divmod(claves, max(n_periodos, 1))
+		self._periodos += primero
+		self._desde_serie = np.searchsorted(entidades, np.arange(len(self.categorias) + 1))
+
+	def serie(self, nombre, inicio, fin):
+		"""(periodos, valores) mes a mes de una entidad (None = total) en los años del rango"""
+		if nombre is None:
+			periodos, valores = self.periodos_total, self.valores_total
+		else:
+			codigo = self.categorias.get_loc(nombre)
+			desde, hasta = self._desde_serie[codigo], self._desde_serie[codigo + 1]
+			periodos, valores = self._periodos[desde:hasta], self._valores[desde:hasta]
+		i, j = np.searchsorted(periodos, inicio * 12, 'left'), np.searchsorted(periodos, fin * 12 + 11, 'right')
+		return periodos[i:j], valores[i:j]
@@ -0,0 +1,132 @@
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from manifiesto_gas import hash_archivo
+
+
+# Instantánea binaria de los datos ya limpios del dashboard. Se guarda junto al
+# libro de resúmenes con la huella (hash, mtime y tamaño) de los archivos de los
+# que salió; mientras esos archivos no cambien, arrancar el dashboard es solo
+# leer la instantánea en lugar de abrir y limpiar el Excel.
+#
+# Hay dos formatos: 'pickle' (un solo archivo) y 'arrow' (una carpeta con un
+# archivo Arrow IPC por DataFrame). Los archivos Arrow se abren con memory map y
+# las columnas numéricas quedan como vistas de solo lectura sobre el archivo, así
+# que todos los procesos que los abren (p. ej. los workers de gunicorn) comparten
+# las mismas páginas de memoria en lugar de tener cada uno su copia.
+
+# Subir este número cuando cambie la limpieza de datos del dashboard
+VERSION_INSTANTANEA = 2
+
+FORMATOS = ('pickle', 'arrow')
+ARCHIVO_CABECERA = 'cabecera.json'
+
+
+def _huella(fuentes, anterior=None):
+	"""Huella de cada fuente; reutiliza el hash de anterior si mtime y tamaño no cambiaron"""
+	anterior = anterior or {}
+	huella = {}
+	for ruta in fuentes:
+		stat = os.stat(ruta)
+		previa = anterior.get(ruta)
+		if previa and previa['mtime'] == stat.st_mtime and previa['tamano'] == stat.st_size:
+			huella[ruta] = previa
+		else:
+			huella[ruta] = {'hash': hash_archivo(ruta), 'mtime': stat.st_mtime, 'tamano': stat.st_size}
+	return huella
+
+
+def _cabecera(fuentes):
+	return {'version': VERSION_INSTANTANEA, 'pandas': pd.__version__, 'fuentes': sorted(fuentes)}
+
+
+def _vigente(cabecera, fuentes):
+	"""True si la cabecera guardada corresponde a las fuentes tal como están ahora"""
+	if {k: v for k, v in cabecera.items() if k not in ('huella', 'tablas')} != _cabecera(fuentes):
+		return False
+	huella = cabecera['huella']
+	return all(huella[r]['hash'] == h['hash'] for r, h in _huella(fuentes, huella).items())
+
+
+def _abrir_arrow(ruta):
+	import pyarrow as pa
+	with pa.memory_map(ruta) as fuente:
+		tabla = pa.ipc.open_file(fuente).read_all()
+	# split_blocks evita juntar las columnas en bloques nuevos, así las numéricas
+	# siguen apuntando al archivo
+	return tabla.to_pandas(split_blocks=True)
+
+
+def leer_instantanea(ruta, fuentes, formato='pickle'):
+	"""Datos de la instantánea si sigue vigente para fuentes, si no None"""
+	try:
+		if formato == 'arrow':
+			with open(os.path.join(ruta, ARCHIVO_CABECERA), encoding='utf-8') as f:
+				cabecera = json.load(f)
+			if not _vigente(cabecera, fuentes):
+				return None
+			return tuple(_abrir_arrow(os.path.join(ruta, nombre)) for nombre in cabecera['tablas'])
+		with open(ruta, 'rb') as f:
+			if not _vigente(pickle.load(f), fuentes):
+				return None
+			# Los datos van después de la cabecera, así que solo se leen si sirven
+			return pickle.load(f)
+	except (OSError, EOFError, KeyError, ValueError, pickle.UnpicklingError):
+		return None
+
+
+def guardar_instantanea(ruta, fuentes, datos, formato='pickle'):
+	"""Escribir cabecera (con la huella de fuentes) y datos de forma atómica.
+
+	En formato 'arrow' datos es una tupla de DataFrames; la cabecera se escribe al
+	final, así que una instantánea a medias nunca se toma como vigente.
+	"""
+	cabecera = {**_cabecera(fuentes), 'huella': _huella(fuentes)}
+	sufijo = f'.{os.getpid()}.tmp'
+	if formato == 'arrow':
+		import pyarrow.feather as feather
+		os.makedirs(ruta, exist_ok=True)
+		cabecera['tablas'] = [f'{i}.arrow' for i in range(len(datos))]
+		for nombre, df in zip(cabecera['tablas'], datos):
+			destino = os.path.join(ruta, nombre)
+			# Sin compresión para poder leerlo con memory map sin copiar
+			feather.write_feather(df, destino + sufijo, compression='uncompressed')
+			os.replace(destino + sufijo, destino)
+		destino = os.path.join(ruta, ARCHIVO_CABECERA)
+		with open(destino + sufijo, 'w', encoding='utf-8') as f:
+			json.dump(cabecera, f, ensure_ascii=False, indent=1)
+		os.replace(destino + sufijo, destino)
+		return
+	with open(ruta + sufijo, 'wb') as f:
+		pickle.dump(cabecera, f, protocol=pickle.HIGHEST_PROTOCOL)
+		pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+	os.replace(ruta + sufijo, ruta)
+
+
+def cargar_con_instantanea(ruta, fuentes, construir, formato='pickle'):
+	"""Datos desde la instantánea o, si no está vigente, desde construir() guardando una nueva.
+
+	Si falta alguna fuente no se usa ni se escribe la instantánea. En formato
+	'arrow' los datos recién construidos se vuelven a abrir desde los archivos
+	para que este proceso también use la memoria compartida.
+	"""
+	if formato not in FORMATOS:
+		raise ValueError(f"Formato de instantánea desconocido: {formato}")
+	if not all(os.path.exists(r) for r in fuentes):
+		return construir()
+	datos = leer_instantanea(ruta, fuentes, formato)
+	if datos is not None:
+		print(f"⚡ Datos cargados desde la instantánea: {ruta}")
+		return datos
+	datos = construir()
+	try:
+		guardar_instantanea(ruta, fuentes, datos, formato)
+	except OSError as e:
+		print(f"⚠️ No se pudo guardar la instantánea ({e})")
+		return datos
+	if formato == 'arrow':
+		return leer_instantanea(ruta, fuentes, formato) or datos
+	return datos
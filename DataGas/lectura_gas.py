@@ -0,0 +1,303 @@
+import hashlib
+import os
+import re
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+import numpy as np
+import pandas as pd
+
+from esquema_gas import COLUMNAS_METRICAS
+
+
+# Lectura y normalización de las hojas mensuales de Produccion_Fiscalizada_Gas_YYYY.xlsx.
+# Cada hoja se devuelve ya normalizada (solo las columnas que usa el ETL, con
+# encabezados en mayúsculas, alias de PRODUCCION FISCALIZADA y columnas AÑO/MES),
+# de modo que el resultado es el mismo sin importar si se lee en serie o repartido
+# en un pool de procesos.
+
+# Columnas de las hojas mensuales que usa el ETL; AÑO y MES salen del nombre del
+# archivo y de la hoja
+COLUMNAS_HOJA = ['CAMPO', 'CONTRATO', 'EMPRESA', 'DEPARTAMENTO', 'MUNICIPIO'] + COLUMNAS_METRICAS
+
+
+def extraer_anio(nombre_archivo):
+	"""Año del archivo a partir de su nombre, o None si no se encuentra"""
+	match = re.search(r'(20\d{2})', nombre_archivo)
+	return int(match.group(1)) if match else None
+
+
+@lru_cache(maxsize=None)
+def extraer_mes(hoja):
+	"""Mes en minúsculas a partir del nombre de la hoja (p. ej. 'enero-13'), o None"""
+	mes_match = re.match(r'([a-zA-Záéíóúñ]+)[- ]?\d{2}', hoja)
+	return mes_match.group(1).lower() if mes_match else None
+
+
+def limpiar_encabezado(columna):
+	"""Encabezado de columna sin saltos de línea, sin espacios en los extremos y en mayúsculas"""
+	return str(columna).replace('\n', ' ').replace('\r', ' ').strip().upper()
+
+
+def columna_produccion(columnas):
+	"""Columna de producción fiscalizada con otro nombre que hay que copiar a PRODUCCION FISCALIZADA"""
+	prod_cols = [c for c in columnas if 'PRODUCCION' in c and 'FISCALIZADA' in c]
+	if prod_cols and prod_cols[0] != 'PRODUCCION FISCALIZADA':
+		return prod_cols[0]
+	return None
+
+
+# Plan de lectura de un formato de encabezado: índices de las columnas a leer y
+# el nombre final de cada una
+PlanHoja = namedtuple('PlanHoja', ['columnas', 'nombres'])
+
+# Planes ya calculados en este proceso, por huella del encabezado original
+_planes = {}
+
+
+def huella_encabezado(encabezado):
+	"""Huella (SHA-1) de la fila de encabezado tal como viene en la hoja"""
+	return hashlib.sha1(repr(tuple(_recortar(tuple(encabezado)))).encode('utf-8')).hexdigest()
+
+
+def crear_plan(encabezado):
+	"""Plan de lectura para una fila de encabezado: qué columnas leer y cómo llamarlas.
+
+	Los encabezados se limpian con limpiar_encabezado y la columna de producción
+	fiscalizada con otro nombre se lee directamente como PRODUCCION FISCALIZADA.
+	Las columnas que no están en COLUMNAS_HOJA no se leen.
+	"""
+	nombres = [limpiar_encabezado(c) for c in _nombres_encabezado(_recortar(tuple(encabezado)))]
+	prod_col = columna_produccion(nombres)
+	if prod_col is not None:
+		nombres = ['' if c == 'PRODUCCION FISCALIZADA' else c for c in nombres]
+		nombres[nombres.index(prod_col)] = 'PRODUCCION FISCALIZADA'
+	posiciones = {}
+	for i, nombre in enumerate(nombres):
+		if nombre in COLUMNAS_HOJA:
+			posiciones.setdefault(nombre, i)
+	columnas = sorted(posiciones.values())
+	return PlanHoja(columnas, [nombres[i] for i in columnas])
+
+
+def plan_hoja(encabezado):
+	"""Plan de lectura del encabezado, calculado una sola vez por formato"""
+	huella = huella_encabezado(encabezado)
+	plan = _planes.get(huella)
+	if plan is None:
+		plan = _planes[huella] = crear_plan(encabezado)
+		print(f"Nuevo formato de encabezado {huella[:10]}: se leen {len(plan.columnas)} columnas")
+	return plan
+
+
+def listar_tareas(archivos):
+	"""Lista ordenada de (archivo, hoja, año, mes) con todas las hojas mensuales a leer"""
+	tareas = []
+	for archivo in archivos:
+		nombre_archivo = os.path.basename(archivo)
+		anio = extraer_anio(nombre_archivo)
+		if anio is None:
+			print(f"No se pudo extraer el año de: {nombre_archivo}")
+			continue
+		with pd.ExcelFile(archivo) as xls:
+			hojas = xls.sheet_names
+		for hoja in hojas[1:]:  # Omitir la primera hoja (Campos Mpcpd)
+			mes = extraer_mes(hoja)
+			if mes is None:
+				print(f"No se pudo extraer el mes de la hoja: {hoja}")
+				continue
+			tareas.append((archivo, hoja, anio, mes))
+	return tareas
+
+
+# Libro abierto por el proceso actual; las tareas llegan agrupadas por archivo,
+# así que cada trabajador abre cada libro una sola vez.
+_libro_abierto = {}
+
+
+def _abrir_libro(archivo):
+	if archivo not in _libro_abierto:
+		for xls in _libro_abierto.values():
+			xls.close()
+		_libro_abierto.clear()
+		_libro_abierto[archivo] = pd.ExcelFile(archivo)
+	return _libro_abierto[archivo]
+
+
+def leer_hoja(tarea, lector='pandas'):
+	"""Leer y normalizar una hoja mensual; tarea es (archivo, hoja, año, mes).
+
+	lector='pandas' usa pd.read_excel; lector='streaming' recorre la hoja fila a
+	fila con openpyxl sin cargarla completa como objetos de Python.
+	"""
+	archivo, hoja, anio, mes = tarea
+	xls = _abrir_libro(archivo)
+	if lector == 'streaming':
+		return leer_hoja_streaming(xls.book[hoja], anio, mes)
+	encabezado = next(xls.book[hoja].iter_rows(max_row=1, values_only=True), ())
+	plan = plan_hoja(encabezado)
+	df = pd.read_excel(xls, sheet_name=hoja, usecols=plan.columnas)
+	df.columns = plan.nombres
+	df['AÑO'] = anio
+	df['MES'] = mes
+	return df
+
+
+# Textos que pandas interpreta como nulos al leer Excel
+TEXTOS_NULOS = {
+	'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+	'<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+
+class _BufferColumna:
+	"""Columna que se llena celda a celda en un arreglo tipado.
+
+	Empieza como enteros (int64), pasa a reales (float64) al llegar un decimal o
+	un nulo y solo queda como lista de objetos si aparece un texto o una fecha,
+	igual que la inferencia de tipos de pd.read_excel. Los textos repetidos se
+	guardan una sola vez.
+	"""
+
+	__slots__ = ('tipo', 'datos', 'textos')
+
+	def __init__(self):
+		self.tipo = 'q'
+		self.datos = array('q')
+		self.textos = {}
+
+	def _a_reales(self):
+		self.tipo = 'd'
+		self.datos = array('d', self.datos)
+
+	def _a_objetos(self):
+		self.tipo = 'O'
+		self.datos = list(self.datos)
+
+	def agregar(self, valor):
+		if isinstance(valor, str) and valor in TEXTOS_NULOS:
+			valor = None
+		elif type(valor) is float and valor.is_integer() and abs(valor) < 2 ** 63:
+			valor = int(valor)  # pandas convierte a entero los reales sin decimales
+		if self.tipo == 'q':
+			if type(valor) is int and -2 ** 63 <= valor < 2 ** 63:
+				self.datos.append(valor)
+				return
+			if valor is None or type(valor) is float:
+				self._a_reales()
+			else:
+				self._a_objetos()
+		if self.tipo == 'd':
+			if valor is None:
+				self.datos.append(np.nan)
+				return
+			if type(valor) in (int, float):
+				self.datos.append(valor)
+				return
+			self._a_objetos()
+		if valor is None:
+			valor = np.nan
+		elif isinstance(valor, str):
+			valor = self.textos.setdefault(valor, valor)
+		self.datos.append(valor)
+
+	def serie(self):
+		if self.tipo == 'q':
+			return pd.Series(np.frombuffer(self.datos, dtype=np.int64))
+		if self.tipo == 'd':
+			return pd.Series(np.frombuffer(self.datos, dtype=np.float64))
+		return pd.Series(self.datos)
+
+
+def _recortar(fila):
+	"""Quitar las celdas vacías al final de la fila"""
+	fin = len(fila)
+	while fin and fila[fin - 1] is None:
+		fin -= 1
+	return fila[:fin]
+
+
+def _nombres_encabezado(encabezado):
+	"""Nombres de columna como los asigna pandas: 'Unnamed: i' para vacíos y sufijos .1, .2 a duplicados"""
+	nombres, vistos = [], {}
+	for i, valor in enumerate(encabezado):
+		nombre = f'Unnamed: {i}' if valor is None else valor
+		if nombre in vistos:
+			vistos[nombre] += 1
+			nombre = f'{nombre}.{vistos[nombre]}'
+		vistos.setdefault(nombre, 0)
+		nombres.append(nombre)
+	return nombres
+
+
+def leer_hoja_streaming(hoja_openpyxl, anio, mes):
+	"""Leer una hoja mensual fila a fila y devolverla ya normalizada.
+
+	Cada celda de las columnas del plan va directo a un buffer tipado, así que
+	nunca se tiene en memoria la hoja completa como objetos de Python.
+	"""
+	filas = hoja_openpyxl.iter_rows(values_only=True)
+	plan = plan_hoja(next(filas, ()))
+	buffers = [_BufferColumna() for _ in plan.columnas]
+	vacias = 0
+	for fila in filas:
+		fila = _recortar(fila)
+		if not fila:
+			# Las filas vacías solo cuentan si después viene una fila con datos
+			vacias += 1
+			continue
+		for _ in range(vacias):
+			for buffer in buffers:
+				buffer.agregar(None)
+		vacias = 0
+		for i, buffer in zip(plan.columnas, buffers):
+			buffer.agregar(fila[i] if i < len(fila) else None)
+
+	df = pd.concat([buffer.serie() for buffer in buffers], axis=1) if buffers else pd.DataFrame()
+	df.columns = plan.nombres
+	df['AÑO'] = anio
+	df['MES'] = mes
+	return df
+
+
+def _cerrar_libros():
+	for xls in _libro_abierto.values():
+		xls.close()
+	_libro_abierto.clear()
+
+
+def leer_libros(archivos, procesos=1, lector='pandas'):
+	"""Leer las hojas mensuales de cada archivo, en serie o con un pool de procesos.
+
+	Devuelve un diccionario archivo -> (hojas leídas, DataFrames normalizados) en el
+	orden de archivos. procesos=1 lee en el proceso actual; procesos>1 reparte las
+	hojas entre ese número de procesos y procesos=0 usa todos los núcleos. lector
+	es 'pandas' o 'streaming' (ver leer_hoja).
+	"""
+	tareas = listar_tareas(archivos)
+	if procesos == 0:
+		procesos = os.cpu_count() or 1
+	procesos = min(procesos, len(tareas))
+	if procesos <= 1:
+		try:
+			hojas_df = [leer_hoja(tarea, lector) for tarea in tareas]
+		finally:
+			_cerrar_libros()
+	else:
+		# Bloques de hojas contiguas para que cada trabajador reutilice el libro abierto
+		chunksize = max(1, len(tareas) // (procesos * 4))
+		with ProcessPoolExecutor(max_workers=procesos) as pool:
+			hojas_df = list(pool.map(partial(leer_hoja, lector=lector), tareas, chunksize=chunksize))
+	libros = {archivo: ([], []) for archivo in archivos}
+	for (archivo, hoja, _, _), df in zip(tareas, hojas_df):
+		libros[archivo][0].append(hoja)
+		libros[archivo][1].append(df)
+	return libros
+
+
+def leer_archivos(archivos, procesos=1, lector='pandas'):
+	"""Lista de DataFrames de todas las hojas mensuales, en el orden de archivos y hojas"""
+	libros = leer_libros(archivos, procesos, lector)
+	return [df for _, dfs in libros.values() for df in dfs]
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import pickle
+
+from lectura_gas import leer_libros
+
+
+# Ingesta incremental: un manifiesto guarda hash, mtime y hojas de cada
+# Produccion_Fiscalizada_Gas_YYYY.xlsx junto con sus DataFrames ya normalizados.
+# En cada corrida solo se vuelven a leer los archivos nuevos o modificados.
+
+# Subir este número cuando cambie la normalización de lectura_gas para invalidar el caché
+VERSION_LECTURA = 2
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+
+
+def hash_archivo(archivo, bloque=1 << 20):
+	"""SHA-256 del contenido del archivo"""
+	h = hashlib.sha256()
+	with open(archivo, 'rb') as f:
+		for trozo in iter(lambda: f.read(bloque), b''):
+			h.update(trozo)
+	return h.hexdigest()
+
+
+def cargar_manifiesto(dir_cache):
+	"""Manifiesto guardado, o uno vacío si no existe o es de otra versión"""
+	ruta = os.path.join(dir_cache, ARCHIVO_MANIFIESTO)
+	try:
+		with open(ruta, encoding='utf-8') as f:
+			manifiesto = json.load(f)
+	except (FileNotFoundError, json.JSONDecodeError):
+		return {'version': VERSION_LECTURA, 'archivos': {}}
+	if manifiesto.get('version') != VERSION_LECTURA:
+		print("Versión de caché distinta, se leerán todos los archivos de nuevo")
+		return {'version': VERSION_LECTURA, 'archivos': {}}
+	return manifiesto
+
+
+def guardar_manifiesto(dir_cache, manifiesto):
+	"""Escribir el manifiesto de forma atómica"""
+	ruta = os.path.join(dir_cache, ARCHIVO_MANIFIESTO)
+	with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+		json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+	os.replace(ruta + '.tmp', ruta)
+
+
+def _ruta_cache(dir_cache, archivo):
+	return os.path.join(dir_cache, os.path.splitext(os.path.basename(archivo))[0] + '.pkl')
+
+
+def _entrada_vigente(entrada, archivo, dir_cache, stat):
+	"""Hash del archivo si la entrada del manifiesto sigue vigente, si no None"""
+	if entrada is None or not os.path.exists(_ruta_cache(dir_cache, archivo)):
+		return None
+	# Mismo tamaño y mtime: se asume sin cambios sin volver a calcular el hash
+	if entrada['mtime'] == stat.st_mtime and entrada['tamano'] == stat.st_size:
+		return entrada['hash']
+	hash_actual = hash_archivo(archivo)
+	return hash_actual if hash_actual == entrada['hash'] else None
+
+
+def leer_archivos_incremental(archivos, dir_cache, procesos=1, lector='pandas'):
+	"""Lista de DataFrames de todas las hojas mensuales reutilizando el caché por archivo.
+
+	Devuelve lo mismo que lectura_gas.leer_archivos, pero solo lee los archivos
+	nuevos o cuyo contenido cambió desde la corrida anterior. Los dos lectores
+	devuelven lo mismo, así que el caché sirve para ambos.
+	"""
+	os.makedirs(dir_cache, exist_ok=True)
+	manifiesto = cargar_manifiesto(dir_cache)
+	entradas = manifiesto['archivos']
+
+	vigentes, cambiados = {}, []
+	for archivo in archivos:
+		nombre = os.path.basename(archivo)
+		stat = os.stat(archivo)
+		hash_vigente = _entrada_vigente(entradas.get(nombre), archivo, dir_cache, stat)
+		if hash_vigente is None:
+			cambiados.append(archivo)
+		else:
+			vigentes[archivo] = hash_vigente
+			entradas[nombre]['mtime'] = stat.st_mtime
+
+	print(f"Archivos sin cambios (desde caché): {len(vigentes)}, archivos a leer: {len(cambiados)}")
+	for archivo in cambiados:
+		print(f"  leyendo: {os.path.basename(archivo)}")
+
+	libros = leer_libros(cambiados, procesos, lector) if cambiados else {}
+	for archivo, (hojas, dfs) in libros.items():
+		with open(_ruta_cache(dir_cache, archivo), 'wb') as f:
+			pickle.dump(dfs, f, protocol=pickle.HIGHEST_PROTOCOL)
+		stat = os.stat(archivo)
+		entradas[os.path.basename(archivo)] = {
+			'hash': hash_archivo(archivo),
+			'mtime': stat.st_mtime,
+			'tamano': stat.st_size,
+			'hojas': hojas,
+		}
+
+	# Quitar del manifiesto los archivos que ya no existen
+	nombres = {os.path.basename(archivo) for archivo in archivos}
+	for nombre in list(entradas):
+		if nombre not in nombres:
+			del entradas[nombre]
+			ruta = _ruta_cache(dir_cache, nombre)
+			if os.path.exists(ruta):
+				os.remove(ruta)
+	guardar_manifiesto(dir_cache, manifiesto)
+
+	data_original = []
+	for archivo in archivos:
+		if archivo in libros:
+			data_original.extend(libros[archivo][1])
+		else:
+			with open(_ruta_cache(dir_cache, archivo), 'rb') as f:
+				data_original.extend(pickle.load(f))
+	return data_original
@@ -0,0 +1,36 @@
+import threading
+
+
+# Medición del tamaño de las respuestas del dashboard. Cada respuesta de un
+# callback se anota con una etiqueta (pestaña y tipo de actualización) y el
+# medidor guarda, por etiqueta, cuántas hubo y sus bytes; las que pasan del
+# presupuesto se avisan por consola. Los números son de cada worker.
+
+
+class MedidorRespuestas:
+	"""Cantidad, bytes totales, máximo y último tamaño de las respuestas por etiqueta.
+
+	presupuesto_bytes=0 no avisa de ninguna respuesta.
+	"""
+
+	def __init__(self, presupuesto_bytes=0):
+		self.presupuesto_bytes = presupuesto_bytes
+		self._etiquetas = {}
+		self._lock = threading.Lock()
+
+	def registrar(self, etiqueta, tamano):
+		with self._lock:
+			fila = self._etiquetas.setdefault(etiqueta, {'respuestas': 0, 'bytes': 0, 'maximo': 0, 'ultimo': 0})
+			fila['respuestas'] += 1
+			fila['bytes'] += tamano
+			fila['maximo'] = max(fila['maximo'], tamano)
+			fila['ultimo'] = tamano
+		if self.presupuesto_bytes and tamano > self.presupuesto_bytes:
+			print(f"⚠️ Respuesta de {tamano / 1024:.1f} KB en {etiqueta} (presupuesto {self.presupuesto_bytes / 1024:.0f} KB)")
+
+	def estadisticas(self):
+		with self._lock:
+			return {
+				etiqueta: dict(fila, promedio=fila['bytes'] // fila['respuestas'])
+				for etiqueta, fila in sorted(self._etiquetas.items())
+			}
@@ -0,0 +1,219 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# Métricas del dashboard en el formato de texto de Prometheus, sin depender de
+# prometheus_client. Hay histogramas (tiempos y bytes de cada callback por
+# pestaña) y contadores (rangos de años pedidos). Cada worker de gunicorn lleva
+# sus propios números; con una carpeta compartida, cada worker vuelca los suyos
+# cada pocos segundos y /metrics suma los de todos.
+
+# Límites de los histogramas de tiempos (segundos) y de tamaños (bytes)
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_BYTES = (1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20)
+
+
+def _escapar(valor):
+	"""Valor de etiqueta con \\, " y saltos de línea escapados, como pide el formato de texto"""
+	return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas_texto(nombres, valores, extra=''):
+	partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+	if extra:
+		partes.append(extra)
+	return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _proceso_vivo(pid):
+	"""Si el proceso pid sigue corriendo en esta máquina"""
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except PermissionError:
+		# Existe, pero es de otro usuario
+		return True
+	return True
+
+
+def _numero(valor):
+	return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class Histograma:
+	"""Histograma con etiquetas: por cada combinación de valores, conteo por límite, suma y cantidad"""
+
+	tipo = 'histogram'
+
+	def __init__(self, nombre, ayuda, limites, etiquetas=()):
+		self.nombre, self.ayuda, self.limites, self.etiquetas = nombre, ayuda, tuple(limites), tuple(etiquetas)
+		self.series = {}
+
+	def vacio(self):
+		return Histograma(self.nombre, self.ayuda, self.limites, self.etiquetas)
+
+	def observar(self, valor, *valores):
+		serie = self.series.get(valores)
+		if serie is None:
+			serie = self.series[valores] = [[0] * (len(self.limites) + 1), 0.0, 0]
+		serie[0][bisect_left(self.limites, valor)] += 1
+		serie[1] += valor
+		serie[2] += 1
+
+	def sumar(self, series):
+		"""Agregar series de otro worker (mismo formato que self.series)"""
+		for valores, (cubetas, suma, cantidad) in series.items():
+			serie = self.series.setdefault(valores, [[0] * (len(self.limites) + 1), 0.0, 0])
+			serie[0] = [a + b for a, b in zip(serie[0], cubetas)]
+			serie[1] += suma
+			serie[2] += cantidad
+
+	def lineas(self):
+		for valores, (cubetas, suma, cantidad) in sorted(self.series.items()):
+			acumulado = 0
+			for limite, conteo in zip(self.limites + ('+Inf',), cubetas):
+				acumulado += conteo
+				le = limite if limite == '+Inf' else _numero(limite)
+				etiquetas = _etiquetas_texto(self.etiquetas, valores, f'le="{le}"')
+				yield f'{self.nombre}_bucket{etiquetas} {acumulado}'
+			yield f'{self.nombre}_sum{_etiquetas_texto(self.etiquetas, valores)} {_numero(suma)}'
+			yield f'{self.nombre}_count{_etiquetas_texto(self.etiquetas, valores)} {cantidad}'
+
+
+class Contador:
+	"""Contador con etiquetas"""
+
+	tipo = 'counter'
+
+	def __init__(self, nombre, ayuda, etiquetas=()):
+		self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, tuple(etiquetas)
+		self.series = {}
+
+	def vacio(self):
+		return Contador(self.nombre, self.ayuda, self.etiquetas)
+
+	def incrementar(self, *valores, cantidad=1):
+		self.series[valores] = self.series.get(valores, 0) + cantidad
+
+	def sumar(self, series):
+		for valores, cantidad in series.items():
+			self.incrementar(*valores, cantidad=cantidad)
+
+	def lineas(self):
+		for valores, cantidad in sorted(self.series.items()):
+			yield f'{self.nombre}{_etiquetas_texto(self.etiquetas, valores)} {_numero(cantidad)}'
+
+
+class RegistroMetricas:
+	"""Métricas de un worker y su texto para Prometheus.
+
+	Con directorio, volcar() guarda como mucho cada intervalo segundos las
+	métricas de este proceso en <directorio>/<pid>.json y texto() suma las de
+	todos los archivos de la carpeta (este proceso incluido). Los archivos de
+	procesos que ya terminaron se borran al armar el texto, así que sus números
+	dejan de contar (Prometheus lo toma como un reinicio del contador).
+	"""
+
+	def __init__(self, directorio=None, intervalo=5):
+		self.directorio, self.intervalo = directorio, intervalo
+		self._metricas = {}
+		self._lock = threading.Lock()
+		self._ultimo_volcado = 0.0
+		if directorio:
+			os.makedirs(directorio, exist_ok=True)
+
+	def histograma(self, nombre, ayuda, limites, etiquetas=()):
+		return self._metricas.setdefault(nombre, Histograma(nombre, ayuda, limites, etiquetas))
+
+	def contador(self, nombre, ayuda, etiquetas=()):
+		return self._metricas.setdefault(nombre, Contador(nombre, ayuda, etiquetas))
+
+	def observar(self, nombre, valor, *valores):
+		with self._lock:
+			self._metricas[nombre].observar(valor, *valores)
+
+	def incrementar(self, nombre, *valores, cantidad=1):
+		with self._lock:
+			self._metricas[nombre].incrementar(*valores, cantidad=cantidad)
+
+	def _estado(self):
+		with self._lock:
+			return {nombre: [[list(valores), serie] for valores, serie in m.series.items()]
+				for nombre, m in self._metricas.items()}
+
+	def volcar(self, forzar=False):
+		"""Guardar las métricas de este worker en la carpeta compartida, si pasó el intervalo"""
+		ahora = time.monotonic()
+		if not self.directorio or (not forzar and ahora - self._ultimo_volcado < self.intervalo):
+			return
+		self._ultimo_volcado = ahora
+		ruta = os.path.join(self.directorio, f'{os.getpid()}.json')
+		try:
+			with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+				json.dump(self._estado(), f)
+			os.replace(ruta + '.tmp', ruta)
+		except OSError as e:
+			print(f"⚠️ No se pudieron guardar las métricas del worker ({e})")
+
+	def _combinadas(self):
+		"""Métricas de todos los workers de la carpeta: copias vacías sumadas archivo por archivo"""
+		combinadas = {n: m.vacio() for n, m in self._metricas.items()}
+		self.volcar(forzar=True)
+		for ruta in glob.glob(os.path.join(self.directorio, '*.json')):
+			pid = os.path.basename(ruta)[:-len('.json')]
+			if pid.isdigit() and not _proceso_vivo(int(pid)):
+				try:
+					os.remove(ruta)
+				except OSError:
+					pass
+				continue
+			try:
+				with open(ruta, encoding='utf-8') as f:
+					estado = json.load(f)
+			except (OSError, ValueError):
+				continue
+			for nombre, series in estado.items():
+				if nombre in combinadas:
+					combinadas[nombre].sumar({tuple(valores): serie for valores, serie in series})
+		return combinadas
+
+	def texto(self):
+		"""Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)"""
+		if self.directorio:
+			metricas = self._combinadas()
+			series = {n: list(m.lineas()) for n, m in metricas.items()}
+		else:
+			with self._lock:
+				metricas = dict(self._metricas)
+				series = {n: list(m.lineas()) for n, m in metricas.items()}
+		lineas = []
+		for nombre, m in metricas.items():
+			lineas.append(f'# HELP {nombre} {m.ayuda}')
+			lineas.append(f'# TYPE {nombre} {m.tipo}')
+			lineas.extend(series[nombre])
+		return '\n'.join(lineas) + '\n'
+
+
+class Cronometrado:
+	"""Envoltorio de un objeto que suma en anotar(segundos) el tiempo de cada método que se le llama"""
+
+	def __init__(self, objeto, anotar):
+		self._objeto, self._anotar = objeto, anotar
+
+	def __getattr__(self, nombre):
+		atributo = getattr(self._objeto, nombre)
+		if not callable(atributo):
+			return atributo
+
+		def medido(*args, **kwargs):
+			inicio = time.perf_counter()
+			try:
+				return atributo(*args, **kwargs)
+			finally:
+				self._anotar(time.perf_counter() - inicio)
+		return medido
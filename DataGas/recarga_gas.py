@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+	import fcntl
+except ImportError:  # Windows
+	fcntl = None
+
+
+# Recarga en caliente de los datos del dashboard. DatosVersionados guarda una
+# referencia a la versión actual de los datos; un hilo revisa cada cierto tiempo
+# los archivos de origen y, cuando cambian, construye la versión nueva en segundo
+# plano y reemplaza la referencia de una sola vez. Cada callback toma la
+# referencia al empezar, así que trabaja siempre con una versión completa.
+
+Version = namedtuple('Version', ['numero', 'datos', 'firma'])
+
+
+def firma_archivos(rutas):
+	"""(ruta, mtime, tamaño) de cada archivo, con None para los que no existen"""
+	firma = []
+	for ruta in rutas:
+		try:
+			stat = os.stat(ruta)
+			firma.append((ruta, stat.st_mtime, stat.st_size))
+		except OSError:
+			firma.append((ruta, None, None))
+	return tuple(firma)
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+	"""Intentar tomar un bloqueo exclusivo sobre ruta sin esperar; entrega True si se tomó.
+
+	Sirve para que, de todos los workers que ven el cambio, solo uno reconstruya
+	los datos y el resto los lea ya listos en la siguiente revisión. Donde no hay
+	fcntl se entrega siempre True.
+	"""
+	if fcntl is None:
+		yield True
+		return
+	with open(ruta, 'a') as f:
+		try:
+			fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except OSError:
+			yield False
+			return
+		try:
+			yield True
+		finally:
+			fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class DatosVersionados:
+	"""Datos recargables con reemplazo atómico de la versión actual.
+
+	cargar() construye los datos y fuentes() devuelve las rutas de las que salen.
+	Cada intervalo segundos se compara la firma de las fuentes; un cambio se
+	recarga cuando la firma se mantiene igual en dos revisiones seguidas, para no
+	leer archivos que el ETL todavía está escribiendo. intervalo=0 desactiva la
+	recarga.
+	"""
+
+	def __init__(self, cargar, fuentes, intervalo=30, ruta_bloqueo=None):
+		self.cargar = cargar
+		self.fuentes = fuentes
+		self.intervalo = intervalo
+		self.ruta_bloqueo = ruta_bloqueo
+		self._actual = Version(1, cargar(), firma_archivos(fuentes()))
+		self._pid_hilo = None
+		self._lock = threading.Lock()
+
+	def actual(self):
+		"""Versión actual; la primera llamada en cada proceso arranca el hilo de revisión"""
+		if self.intervalo and self._pid_hilo != os.getpid():
+			# Los hilos no sobreviven al fork de gunicorn, así que se arrancan por proceso
+			with self._lock:
+				if self._pid_hilo != os.getpid():
+					self._pid_hilo = os.getpid()
+					threading.Thread(target=self._revisar_siempre, daemon=True).start()
+		return self._actual
+
+	def _revisar_siempre(self):
+		pendiente = None
+		while True:
+			time.sleep(self.intervalo)
+			try:
+				pendiente = self.revisar(pendiente)
+			except Exception as e:
+				print(f"⚠️ No se pudieron recargar los datos ({e}), se sigue con la versión {self._actual.numero}")
+				pendiente = None
+
+	def revisar(self, pendiente=None):
+		"""Recargar si las fuentes cambiaron y su firma es igual a pendiente (la de la revisión anterior).
+
+		Devuelve la firma que queda pendiente de confirmar, o None.
+		"""
+		firma = firma_archivos(self.fuentes())
+		if firma == self._actual.firma:
+			return None
+		if firma != pendiente:
+			return firma
+		if self.ruta_bloqueo is None:
+			self._reemplazar(firma)
+			return None
+		with bloqueo_archivo(self.ruta_bloqueo) as tomado:
+			if not tomado:
+				# Otro worker está reconstruyendo; se reintenta en la siguiente revisión
+				return firma
+			self._reemplazar(firma)
+		return None
+
+	def _reemplazar(self, firma):
+		datos = self.cargar()
+		# Una sola asignación: los callbacks en curso siguen con la versión que ya tomaron
+		self._actual = Version(self._actual.numero + 1, datos, firma)
+		print(f"🔄 Datos recargados (versión {self._actual.numero})")
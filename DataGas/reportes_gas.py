@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl import Workbook
+
+from almacen_gas import parquet_disponible
+
+
+# Escritura de los reportes del ETL (produccion_gas_resumenes.xlsx y
+# serie_tiempo_gas.xlsx). Los libros se escriben en modo write_only de openpyxl:
+# cada fila va directo al archivo, así que la memoria no crece con el tamaño de
+# la hoja. Opcionalmente cada hoja se escribe también como CSV o Parquet junto al
+# libro, y los distintos archivos se pueden escribir en paralelo.
+
+# Filas que se convierten a valores de Python de una vez al escribir una hoja
+FILAS_POR_BLOQUE = 10000
+
+# Filas de datos que caben en una hoja de Excel (1.048.576 menos el encabezado)
+FILAS_MAXIMAS_EXCEL = 1048575
+
+FORMATOS_EXTRA = ('csv', 'parquet')
+
+# Hoja de la sumatoria anual por campo: el ETL la escribe como Sumatoria_Anual y
+# los libros anteriores la llaman Sumatoria_Anual_Producción_Gas
+HOJAS_SUMATORIA = ('Sumatoria_Anual', 'Sumatoria_Anual_Producción_Gas')
+
+
+def leer_sumatoria(ruta, **kwargs):
+	"""Hoja de la sumatoria anual de un libro de resúmenes, con el nombre actual o el anterior"""
+	with pd.ExcelFile(ruta) as libro:
+		nombre = next((h for h in HOJAS_SUMATORIA if h in libro.sheet_names), HOJAS_SUMATORIA[0])
+		return libro.parse(nombre, **kwargs)
+
+
+def _filas(df):
+	"""Filas de df como tuplas de valores de Python, con None en lugar de los nulos"""
+	for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+		bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+		columnas = [bloque[c].astype(object).where(bloque[c].notna(), None) for c in bloque.columns]
+		yield from zip(*columnas)
+
+
+def escribir_libro(ruta, hojas):
+	"""Escribir un libro de Excel con una hoja por DataFrame (nombre -> DataFrame), sin índice"""
+	libro = Workbook(write_only=True)
+	for nombre, df in hojas.items():
+		hoja = libro.create_sheet(nombre)
+		hoja.append(list(df.columns))
+		for fila in _filas(df):
+			hoja.append(fila)
+	# Escritura atómica para que nadie lea un libro a medias
+	libro.save(ruta + '.tmp')
+	os.replace(ruta + '.tmp', ruta)
+	return ruta
+
+
+def ruta_hermana(ruta, hoja, formato):
+	"""Ruta del archivo <libro>_<hoja>.<formato> junto al libro"""
+	return f'{os.path.splitext(ruta)[0]}_{hoja}.{formato}'
+
+
+def escribir_hermanos(ruta, hojas, formato):
+	"""Escribir cada hoja del libro como un archivo CSV o Parquet aparte"""
+	rutas = []
+	for nombre, df in hojas.items():
+		ruta_hoja = ruta_hermana(ruta, nombre, formato)
+		# Parquet exige nombres de columna de texto (las series usan los años como columnas)
+		df = df.rename(columns=str)
+		if formato == 'csv':
+			df.to_csv(ruta_hoja + '.tmp', index=False, encoding='utf-8-sig')
+		else:
+			df.to_parquet(ruta_hoja + '.tmp', index=False, engine='pyarrow')
+		os.replace(ruta_hoja + '.tmp', ruta_hoja)
+		rutas.append(ruta_hoja)
+	return rutas
+
+
+def _escribir(tarea):
+	ruta, hojas, formato = tarea
+	if formato == 'xlsx':
+		return [escribir_libro(ruta, hojas)]
+	return escribir_hermanos(ruta, hojas, formato)
+
+
+def escribir_reportes(libros, formatos=(), procesos=1):
+	"""Escribir los libros (ruta -> {hoja: DataFrame}) y sus copias en otros formatos.
+
+	formatos es una lista con 'csv' y/o 'parquet'. procesos=1 escribe en el
+	proceso actual; procesos>1 reparte los archivos entre ese número de procesos
+	y procesos=0 usa todos los núcleos. Devuelve las rutas escritas.
+	"""
+	formatos = list(formatos)
+	for formato in formatos:
+		if formato not in FORMATOS_EXTRA:
+			raise ValueError(f"Formato de reporte desconocido: {formato}")
+	if 'parquet' in formatos and not parquet_disponible():
+		print("pyarrow no está instalado, no se escriben los reportes Parquet")
+		formatos.remove('parquet')
+	tareas = [(ruta, hojas, formato) for ruta, hojas in libros.items() for formato in ['xlsx'] + formatos]
+	if procesos == 0:
+		procesos = os.cpu_count() or 1
+	procesos = min(procesos, len(tareas))
+	if procesos <= 1:
+		escritas = [_escribir(tarea) for tarea in tareas]
+	else:
+		with ProcessPoolExecutor(max_workers=procesos) as pool:
+			escritas = list(pool.map(_escribir, tareas))
+	return [ruta for rutas in escritas for ruta in rutas]
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+# Reducción de series largas para dibujarlas. LTTB (Largest-Triangle-Three-Buckets,
+# Steinarsson 2013) reparte los puntos interiores en cubetas y de cada una conserva
+# el que forma el triángulo más grande con el punto ya elegido de la cubeta anterior
+# y el promedio de la siguiente. Así se mantienen los picos y valles que se ven en
+# la gráfica con muchos menos puntos. Con tantos puntos como píxeles de ancho, la
+# línea dibujada es prácticamente igual a la de la serie completa.
+
+
+def lttb(x, y, umbral):
+	"""Posiciones (ordenadas) de los umbral puntos de (x, y) que conserva LTTB.
+
+	El primero y el último se conservan siempre. Si la serie tiene umbral puntos
+	o menos, o umbral es menor que 3, se devuelven todas las posiciones.
+	"""
+	n = len(x)
+	if umbral >= n or umbral < 3:
+		return np.arange(n)
+	x = np.asarray(x, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+
+	# umbral - 2 cubetas sobre los puntos interiores [1, n - 1)
+	bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+	inicios, finales = bordes[:-1], bordes[1:]
+	tamanos = finales - inicios
+
+	# Promedio de cada cubeta; el de la siguiente a la última es el último punto
+	promedio_x = np.append(np.add.reduceat(x[:-1], inicios) / tamanos, x[-1])
+	promedio_y = np.append(np.add.reduceat(y[:-1], inicios) / tamanos, y[-1])
+
+	elegidos = np.empty(umbral, dtype=np.int64)
+	elegidos[0], elegidos[-1] = 0, n - 1
+	a = 0
+	for k in range(umbral - 2):
+		i, j = inicios[k], finales[k]
+		cx, cy = promedio_x[k + 1], promedio_y[k + 1]
+		# Doble del área del triángulo (a, punto, promedio de la cubeta siguiente)
+		areas = np.abs((x[a] - cx) * (y[i:j] - y[a]) - (x[a] - x[i:j]) * (cy - y[a]))
+		a = i + int(np.argmax(areas))
+		elegidos[k + 1] = a
+	return elegidos
+
+
+def ventana(x, desde, hasta):
+	"""slice de las posiciones de x (ordenado) entre desde y hasta, con un punto más a cada lado.
+
+	El punto de afuera hace que la línea llegue hasta los bordes de la gráfica
+	cuando se muestra solo una parte de la serie.
+	"""
+	i = max(0, int(np.searchsorted(x, desde, 'left')) - 1)
+	j = min(len(x), int(np.searchsorted(x, hasta, 'right')) + 1)
+	return slice(i, j)
@@ -0,0 +1,149 @@
+// Filtro de años en el navegador (GAS_FILTRO_CLIENTE=1).
+//
+// El dashboard envía una vez, en el store datos-cliente, los índices por año de
+// cada tabla (años, sumas acumuladas por entidad y por año). Con eso estas
+// funciones recalculan los KPIs y las barras de totales de cada rango sin ir al
+// servidor, con las mismas cuentas que IndiceAnual en DataGas/indice_gas.py.
+
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    // Posiciones [i, j) de los años del rango en indice.anios
+    function columnas(indice, rango) {
+        let i = 0;
+        while (i < indice.anios.length && indice.anios[i] < rango[0]) i++;
+        let j = i;
+        while (j < indice.anios.length && indice.anios[j] <= rango[1]) j++;
+        return [i, j];
+    }
+
+    // acum[j] - acum[i] redondeado a indice.decimales, como np.round en IndiceAnual
+    function resta(indice, acum, i, j) {
+        const escala = Math.pow(10, indice.decimales);
+        return Math.round((acum[j] - acum[i]) * escala) / escala;
+    }
+
+    // [entidad, total] de las entidades con filas en el rango, de mayor a menor
+    function totales(indice, rango) {
+        const [i, j] = columnas(indice, rango);
+        const filas = [];
+        indice.entidades.forEach(function (entidad, e) {
+            if (indice.conteo_acum[e][j] - indice.conteo_acum[e][i] > 0) {
+                filas.push([entidad, resta(indice, indice.suma_acum[e], i, j)]);
+            }
+        });
+        // sort es estable: los empates quedan en el orden de las entidades, como
+        // sort_values(kind='stable') en el servidor
+        return filas.sort(function (a, b) { return b[1] - a[1]; });
+    }
+
+    // Mismo texto que f"{x:,.0f}" en Python
+    function miles(x) {
+        return x.toFixed(0).replace(/\B(?=(\d{3})+(?!\d))/g, ',');
+    }
+
+    // Mismo texto que str(round(x, 1)) en Python
+    function redondeo(x) {
+        const r = Math.round(x * 10) / 10;
+        return Number.isInteger(r) ? r + '.0' : String(r);
+    }
+
+    // Copia de la figura con otros datos en la primera traza y, si se pasa, otro layout
+    function conDatos(figura, datos, layout) {
+        return Object.assign({}, figura, {
+            data: [Object.assign({}, figura.data[0], datos)].concat(figura.data.slice(1)),
+            layout: layout ? Object.assign({}, figura.layout, layout) : figura.layout
+        });
+    }
+
+    function vacio(indice, rango) {
+        const [i, j] = columnas(indice, rango);
+        return i === j;
+    }
+
+    function sinCambios() {
+        throw window.dash_clientside.PreventUpdate;
+    }
+
+    window.dash_clientside.filtro_gas = {
+        // Avisar al servidor solo cuando el rango pasa a tener o dejar de tener datos
+        cambio_vacio: function (rango, pestana, datos, vacia) {
+            const claves = {'tab-general': 'general', 'tab-campo': 'campo', 'tab-cuenca': 'cuenca', 'tab-departamento': 'departamento', 'tab-mensual': 'mensual'};
+            const sinDatos = vacio(datos[claves[pestana]], rango);
+            if (sinDatos === vacia) sinCambios();
+            return sinDatos;
+        },
+
+        general: function (rango, datos, timeline, barras, variacion) {
+            const indice = datos.general;
+            const [i, j] = columnas(indice, rango);
+            if (i === j) sinCambios();
+            const anios = indice.anios.slice(i, j);
+            const valores = indice.suma_anual.slice(i, j);
+            const n = valores.length;
+
+            let mejor = 0, peor = 0;
+            for (let k = 1; k < n; k++) {
+                if (valores[k] > valores[mejor]) mejor = k;
+                if (valores[k] < valores[peor]) peor = k;
+            }
+            const varUlt = n > 1 ? (valores[n - 1] - valores[n - 2]) / valores[n - 2] * 100 : 0;
+            const [estiloVar, estiloTarjeta] = datos.estilos_variacion[varUlt >= 0 ? 'positiva' : 'negativa'];
+            const variaciones = valores.map(function (v, k) {
+                return k === 0 ? null : (v - valores[k - 1]) / valores[k - 1] * 100;
+            });
+
+            return [
+                miles(resta(indice, indice.total_acum, i, j)),
+                String(anios[mejor]), miles(valores[mejor]),
+                String(anios[peor]), miles(valores[peor]),
+                varUlt.toFixed(1) + '%', estiloVar, estiloTarjeta,
+                conDatos(timeline, {x: anios, y: valores}),
+                conDatos(barras, {x: anios, y: valores},
+                         {yaxis: Object.assign({}, barras.layout.yaxis, {range: [0, Math.max.apply(null, valores) * 1.15]})}),
+                conDatos(variacion, {x: anios, y: variaciones})
+            ];
+        },
+
+        campo: function (rango, datos, top) {
+            if (vacio(datos.campo, rango)) sinCambios();
+            const filas = totales(datos.campo, rango).slice(0, 10);
+            const valores = filas.map(function (f) { return f[1]; });
+            return [conDatos(top, {x: filas.map(function (f) { return f[0]; }), y: valores,
+                                   marker: Object.assign({}, top.data[0].marker, {color: valores})})];
+        },
+
+        cuenca: function (rango, datos, total) {
+            if (vacio(datos.cuenca, rango)) sinCambios();
+            const filas = totales(datos.cuenca, rango);
+            const valores = filas.map(function (f) { return f[1]; });
+            return [conDatos(total, {x: filas.map(function (f) { return f[0]; }), y: valores,
+                                     marker: Object.assign({}, total.data[0].marker, {color: valores})})];
+        },
+
+        departamento: function (rango, datos, ranking) {
+            if (vacio(datos.departamento, rango)) sinCambios();
+            const filas = totales(datos.departamento, rango);
+            const total = filas.reduce(function (s, f) { return s + f[1]; }, 0);
+            const top3 = filas.slice(0, 3).reduce(function (s, f) { return s + f[1]; }, 0);
+            const top10 = filas.slice(0, 10);
+            const participacion = top10.map(function (f) { return f[1] / total * 100; });
+
+            return [
+                String(filas.length),
+                filas[0][0],
+                miles(filas[0][1]),
+                (filas[0][1] / total * 100).toFixed(1) + '% of total',
+                (total > 0 ? top3 / total * 100 : 0).toFixed(1) + '%',
+                miles(total),
+                conDatos(ranking, {
+                    y: top10.map(function (f, k) { return f[0] + ' (' + redondeo(participacion[k]) + '%)'; }),
+                    x: top10.map(function (f) { return f[1]; }),
+                    marker: Object.assign({}, ranking.data[0].marker, {color: datos.colores_ranking.slice(0, top10.length)}),
+                    text: top10.map(function (f) { return miles(f[1]); }),
+                    customdata: top10.map(function (f, k) { return [f[0], participacion[k], k + 1]; })
+                })
+            ];
+        }
+    };
+})();
@@ -0,0 +1,27 @@
+// Vista de las gráficas mensuales.
+//
+// Cada vez que una gráfica mensual cambia de tamaño o de zoom, se guarda en su
+// store <gráfica>-vista el ancho del área de dibujo en píxeles y el rango visible
+// del eje x (null sin zoom). El servidor elige con eso cuántos puntos mandar de
+// cada serie y de qué meses (ver series_mensuales en dashboard_gas_completo.py).
+
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    window.dash_clientside.mensual_gas = {
+        vista: function (relayout, id, anterior) {
+            const contenedor = document.getElementById(id);
+            const gd = contenedor && (contenedor.querySelector('.js-plotly-plot') || contenedor);
+            if (!gd || !gd._fullLayout) throw window.dash_clientside.PreventUpdate;
+            const eje = gd._fullLayout.xaxis;
+            const vista = {
+                ancho: Math.round(gd._fullLayout._size.w),
+                rango: eje.autorange ? null : eje.range.slice(),
+                // El zoom es de un rango de años; al cambiar el filtro el servidor lo descarta
+                revision: gd.layout.uirevision === undefined ? null : gd.layout.uirevision
+            };
+            if (JSON.stringify(vista) === JSON.stringify(anterior)) throw window.dash_clientside.PreventUpdate;
+            return vista;
+        }
+    };
+})();
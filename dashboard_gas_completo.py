@@ -1,15 +1,79 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Output, Input
+import plotly.io as pio
+from dash import Dash, dcc, html, Output, Input, State, Patch, ClientsideFunction, ctx
+from dash.exceptions import PreventUpdate
+from flask import Response, g, has_request_context, jsonify, request
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
 # Configuración de datos - Análisis Real con tus archivos Excel
+import functools
+import hashlib
+import json
 import os
+import sys
+import time
 
-def cargar_datos():
-    """Cargar datos reales de Excel con manejo de rutas para local y producción"""
+# Módulos compartidos con el ETL (carpeta DataGas)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DataGas'))
+from cache_vistas_gas import CacheVistas
+from almacen_gas import DIR_ALMACEN, almacen_completo, cargar_tabla, parquet_disponible
+from esquema_gas import aplicar_esquema
+from geografia_gas import preparar_geojson, ubicar_departamentos
+from indice_gas import IndiceAnual, IndiceMensual
+from medidor_gas import MedidorRespuestas
+from metricas_gas import LIMITES_BYTES, LIMITES_SEGUNDOS, Cronometrado, RegistroMetricas
+from instantanea_gas import cargar_con_instantanea
+from recarga_gas import DatosVersionados
+from reportes_gas import leer_sumatoria
+from submuestreo_gas import lttb, ventana
+
+TABLAS_DASHBOARD = ['Totales_Anuales', 'Anual_Por_Cuenca', 'Anual_Por_Campo', 'Sumatoria_Anual']
+# Tabla de la vista mensual: por campo o, con resúmenes anteriores a Mensual_Por_Campo, solo el total
+TABLAS_MENSUALES = ['Mensual_Por_Campo', 'Totales_Mensuales']
+
+# Formato de la instantánea: 'arrow' (memory map compartido entre workers de gunicorn) o 'pickle'
+FORMATO_INSTANTANEA = os.environ.get('GAS_INSTANTANEA', 'arrow' if parquet_disponible() else 'pickle')
+
+# Segundos entre revisiones de los archivos de datos para recargarlos sin reiniciar (0 = sin recarga)
+INTERVALO_RECARGA = int(os.environ.get('GAS_INTERVALO_RECARGA', 30))
+
+# Caché de pestañas ya armadas: MB en memoria por worker (0 = sin caché) y carpeta opcional compartida entre workers
+CACHE_VISTAS_MB = int(os.environ.get('GAS_CACHE_VISTAS_MB', 64))
+CACHE_VISTAS_DIR = os.environ.get('GAS_CACHE_VISTAS_DIR') or None
+
+# Filtrar por año en el navegador: los totales por año se envían una vez y los KPIs y las
+# barras de totales se recalculan en JavaScript (assets/filtro_cliente.js) sin ir al servidor
+FILTRO_CLIENTE = os.environ.get('GAS_FILTRO_CLIENTE', '0') == '1'
+
+# KB a partir de los cuales una respuesta de callback se avisa por consola (0 = sin aviso)
+PRESUPUESTO_RESPUESTA_KB = int(os.environ.get('GAS_PRESUPUESTO_RESPUESTA_KB', 0))
+
+# Tiempos y bytes de cada callback por pestaña en /metrics, formato de Prometheus (GAS_METRICAS=0 los desactiva)
+METRICAS = os.environ.get('GAS_METRICAS', '1') != '0'
+# Carpeta compartida para que /metrics sume las métricas de todos los workers de gunicorn
+METRICAS_DIR = os.environ.get('GAS_METRICAS_DIR') or None
+
+# Puntos por píxel de ancho de cada gráfica mensual, repartidos entre sus series (se reducen con LTTB)
+PUNTOS_POR_PIXEL_MENSUAL = float(os.environ.get('GAS_MENSUAL_PUNTOS_PIXEL', 2))
+
+# Mapa de departamentos: 'burbujas' en las capitales o 'coropletas' (necesita el GeoJSON de departamentos)
+MODO_MAPA = os.environ.get('GAS_MAPA', 'burbujas')
+
+# Fondo del mapa de burbujas: 'white-bg' funciona sin red; 'open-street-map' descarga teselas de internet
+FONDO_MAPA = os.environ.get('GAS_MAPA_FONDO', 'white-bg')
+
+# GeoJSON de los departamentos de Colombia (opcional); se prepara una vez al iniciar
+RUTA_GEOJSON = os.environ.get('GAS_GEOJSON_DEPARTAMENTOS',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DataGas', 'departamentos_colombia.geojson'))
+
+# Contorno del país (Natural Earth 1:10m), de referencia en el mapa sin teselas cuando no hay departamentos
+RUTA_CONTORNO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DataGas', 'contorno_colombia.geojson')
+
+def ruta_datos():
+    """Ruta del Excel de resúmenes para local o producción"""
     
     # Rutas para desarrollo local
     ruta_local_excel = r'D:\Analisis producción de gas 2025\Bases_produccion_gas\produccion_gas_resumenes.xlsx'
@@ -30,6 +94,20 @@ def cargar_datos():
         ruta_excel = ruta_prod_excel
         ruta_serie_tiempo = ruta_prod_serie
         print("☁️ Cargando datos desde producción")
+    return ruta_excel
+
+def cargar_datos(ruta_excel):
+    """Cargar los resúmenes desde el almacén Parquet o, si no está, desde el Excel"""
+    
+    # Preferir el almacén Parquet generado por el ETL; el Excel queda como respaldo
+    dir_almacen = os.path.join(os.path.dirname(ruta_excel), DIR_ALMACEN)
+    if almacen_completo(dir_almacen, TABLAS_DASHBOARD):
+        try:
+            df_anual, df_cuenca, df_campo, df_departamento = [cargar_tabla(dir_almacen, t) for t in TABLAS_DASHBOARD]
+            print(f"✅ Datos cargados exitosamente desde el almacén Parquet: {dir_almacen}")
+            return df_anual, df_cuenca, df_campo, df_departamento, cargar_mensual(ruta_excel, dir_almacen)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el almacén Parquet ({e}), usando Excel")
     
     try:
         # Cargar datos principales
@@ -42,41 +120,118 @@ def cargar_datos():
         df_campo = pd.read_excel(ruta_excel, sheet_name='Anual_Por_Campo')
         df_campo.columns = df_campo.columns.str.strip()
 
-        df_departamento = pd.read_excel(ruta_excel, sheet_name='Sumatoria_Anual_Producción_Gas')
+        df_departamento = leer_sumatoria(ruta_excel)
         df_departamento.columns = df_departamento.columns.str.strip()
         
         print(f"✅ Datos cargados exitosamente desde: {ruta_excel}")
-        return df_anual, df_cuenca, df_campo, df_departamento
+        return df_anual, df_cuenca, df_campo, df_departamento, cargar_mensual(ruta_excel, dir_almacen)
         
     except FileNotFoundError as e:
         print(f"❌ Error: No se encontraron los archivos Excel: {e}")
         print("📧 Contacta al administrador para configurar los archivos de datos")
         # Retornar DataFrames vacíos para evitar errores
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
     except Exception as e:
         print(f"❌ Error inesperado al cargar datos: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+def cargar_mensual(ruta_excel, dir_almacen):
+    """Producción mensual por campo desde el almacén Parquet o el Excel; con resúmenes
+    anteriores a Mensual_Por_Campo, solo el total mensual (Totales_Mensuales)"""
+    for nombre in TABLAS_MENSUALES:
+        if almacen_completo(dir_almacen, [nombre]):
+            try:
+                return cargar_tabla(dir_almacen, nombre)
+            except Exception as e:
+                print(f"⚠️ No se pudo leer {nombre} del almacén Parquet ({e}), usando Excel")
+    try:
+        with pd.ExcelFile(ruta_excel) as libro:
+            for nombre in TABLAS_MENSUALES:
+                if nombre in libro.sheet_names:
+                    df_mensual = libro.parse(nombre)
+                    df_mensual.columns = df_mensual.columns.str.strip()
+                    return df_mensual
+    except Exception as e:
+        print(f"⚠️ No se pudo leer la producción mensual ({e})")
+    print("⚠️ No hay producción mensual en los datos; la vista mensual queda vacía")
+    return pd.DataFrame(columns=['AÑO', 'MES', 'PRODUCCION FISCALIZADA'])
+
+def limpiar_datos(df_anual, df_cuenca, df_campo, df_departamento, df_mensual):
+    """Quitar filas sin producción o sin año válido y aplicar el esquema compartido"""
+    # Limpiar datos
+    df_anual = df_anual.dropna(subset=['PRODUCCION FISCALIZADA'])
+    df_cuenca = df_cuenca.dropna(subset=['PRODUCCION FISCALIZADA'])
+    df_campo = df_campo.dropna(subset=['PRODUCCION FISCALIZADA'])
+    df_departamento = df_departamento.dropna(subset=['PRODUCCION FISCALIZADA'])
+    df_mensual = df_mensual.dropna(subset=['PRODUCCION FISCALIZADA'])
+
+    # Convertir AÑO a numérico
+    df_anual['AÑO'] = pd.to_numeric(df_anual['AÑO'], errors='coerce')
+    df_cuenca['AÑO'] = pd.to_numeric(df_cuenca['AÑO'], errors='coerce')
+    df_campo['AÑO'] = pd.to_numeric(df_campo['AÑO'], errors='coerce')
+    df_departamento['AÑO'] = pd.to_numeric(df_departamento['AÑO'], errors='coerce')
+    df_mensual['AÑO'] = pd.to_numeric(df_mensual['AÑO'], errors='coerce')
+
+    # Remover filas con años inválidos
+    df_anual = df_anual.dropna(subset=['AÑO'])
+    df_cuenca = df_cuenca.dropna(subset=['AÑO'])
+    df_campo = df_campo.dropna(subset=['AÑO'])
+    df_departamento = df_departamento.dropna(subset=['AÑO'])
+    df_mensual = df_mensual.dropna(subset=['AÑO', 'MES'])
+
+    # Tipos del esquema compartido con el ETL (AÑO int16, dimensiones categóricas, métricas float64)
+    df_anual = aplicar_esquema(df_anual, ['AÑO', 'PRODUCCION FISCALIZADA'])
+    df_cuenca = aplicar_esquema(df_cuenca, ['AÑO', 'CUENCA', 'PRODUCCION FISCALIZADA'])
+    df_campo = aplicar_esquema(df_campo, ['AÑO', 'CAMPO_LIMPIO', 'PRODUCCION FISCALIZADA'])
+    df_departamento = aplicar_esquema(df_departamento, ['AÑO', 'DEPARTAMENTO', 'PRODUCCION FISCALIZADA'])
+    df_mensual = aplicar_esquema(df_mensual, ['AÑO', 'MES', 'PRODUCCION FISCALIZADA'])
+    return df_anual, df_cuenca, df_campo, df_departamento, df_mensual
 
-# Cargar datos reales
-df_anual, df_cuenca, df_campo, df_departamento = cargar_datos()
+def fuentes_datos(ruta_excel):
+    """Archivos de los que salen los datos: el Excel y, si está completo, el almacén Parquet"""
+    dir_almacen = os.path.join(os.path.dirname(ruta_excel), DIR_ALMACEN)
+    fuentes = [ruta_excel]
+    if almacen_completo(dir_almacen, TABLAS_DASHBOARD):
+        fuentes += [os.path.join(dir_almacen, f'{t}.parquet') for t in TABLAS_DASHBOARD]
+        # Las tablas mensuales son opcionales: los almacenes anteriores no traen Mensual_Por_Campo
+        fuentes += [os.path.join(dir_almacen, f'{t}.parquet') for t in TABLAS_MENSUALES if almacen_completo(dir_almacen, [t])]
+    return fuentes
 
-# Limpiar datos
-df_anual = df_anual.dropna(subset=['PRODUCCION FISCALIZADA'])
-df_cuenca = df_cuenca.dropna(subset=['PRODUCCION FISCALIZADA'])
-df_campo = df_campo.dropna(subset=['PRODUCCION FISCALIZADA'])
-df_departamento = df_departamento.dropna(subset=['PRODUCCION FISCALIZADA'])
+def ruta_instantanea(ruta_excel):
+    ruta = os.path.splitext(ruta_excel)[0] + '.instantanea'
+    return ruta + '.pkl' if FORMATO_INSTANTANEA == 'pickle' else ruta
 
-# Convertir AÑO a numérico
-df_anual['AÑO'] = pd.to_numeric(df_anual['AÑO'], errors='coerce')
-df_cuenca['AÑO'] = pd.to_numeric(df_cuenca['AÑO'], errors='coerce')
-df_campo['AÑO'] = pd.to_numeric(df_campo['AÑO'], errors='coerce')
-df_departamento['AÑO'] = pd.to_numeric(df_departamento['AÑO'], errors='coerce')
+def cargar_datos_limpios(ruta_excel):
+    """Datos limpios desde la instantánea junto al Excel, reconstruida solo si cambian las fuentes"""
+    return cargar_con_instantanea(ruta_instantanea(ruta_excel), fuentes_datos(ruta_excel),
+                                  lambda: limpiar_datos(*cargar_datos(ruta_excel)),
+                                  formato=FORMATO_INSTANTANEA)
 
-# Remover filas con años inválidos
-df_anual = df_anual.dropna(subset=['AÑO'])
-df_cuenca = df_cuenca.dropna(subset=['AÑO'])
-df_campo = df_campo.dropna(subset=['AÑO'])
-df_departamento = df_departamento.dropna(subset=['AÑO'])
+def indexar_datos(df_anual, df_cuenca, df_campo, df_departamento, df_mensual):
+    """Índices por año de cada tabla, para que el filtro de años no tenga que filtrar ni agrupar"""
+    return (IndiceAnual(df_anual),
+            IndiceAnual(df_cuenca, 'CUENCA'),
+            IndiceAnual(df_campo, 'CAMPO_LIMPIO'),
+            IndiceAnual(df_departamento, 'DEPARTAMENTO'),
+            IndiceMensual(df_mensual, 'CAMPO_LIMPIO' if 'CAMPO_LIMPIO' in df_mensual.columns else None))
+
+# Cargar datos reales; se recargan en segundo plano cuando el ETL publica datos nuevos
+ruta_excel = ruta_datos()
+datos = DatosVersionados(lambda: indexar_datos(*cargar_datos_limpios(ruta_excel)), lambda: fuentes_datos(ruta_excel),
+                         intervalo=INTERVALO_RECARGA, ruta_bloqueo=ruta_instantanea(ruta_excel) + '.lock')
+cache_vistas = CacheVistas(maximo_bytes=CACHE_VISTAS_MB << 20, directorio=CACHE_VISTAS_DIR)
+medidor_respuestas = MedidorRespuestas(presupuesto_bytes=PRESUPUESTO_RESPUESTA_KB << 10)
+
+# Métricas de los callbacks por pestaña y tipo de pedido (ver etiqueta_respuesta)
+metricas = RegistroMetricas(directorio=METRICAS_DIR)
+for nombre, ayuda in [
+        ('gas_callback_filtro_segundos', "Consultas al índice por año del callback (filtrar y sumar el rango)"),
+        ('gas_callback_figuras_segundos', "Resto del callback: armado de figuras y componentes, o lectura de la caché de vistas"),
+        ('gas_callback_serializacion_segundos', "Pedido fuera del callback: Dash lee el pedido y serializa la respuesta"),
+        ('gas_callback_total_segundos', "Pedido completo a /_dash-update-component")]:
+    metricas.histograma(nombre, ayuda, LIMITES_SEGUNDOS, ('pestana', 'tipo'))
+metricas.histograma('gas_respuesta_bytes', "Bytes de la respuesta del callback", LIMITES_BYTES, ('pestana', 'tipo'))
+metricas.contador('gas_rango_pedidos_total', "Pedidos de cada pestaña por rango de años", ('pestana', 'inicio', 'fin'))
 
 # Configuración de colores y estilo - KuenKa Branding
 colores = ['#00a693', '#008b7a', '#006b5d', '#004d40', '#66c2b3', '#4db8a6', '#33ad99', '#1a9b8c', '#80ccc0', '#99d6cc', '#b3e0d9']
@@ -85,192 +240,542 @@ color_secundario = '#ffc107'  # Amarillo KuenKa
 color_texto = '#2c3e50'  # Azul oscuro para texto
 color_fondo = '#f8f9fa'  # Fondo claro
 
+# Plantilla KuenKa para todas las figuras: fondo blanco, fuente y títulos de la marca
+# y, de la plantilla 'plotly', solo el estilo de ejes, hover y barra de colores. Sin
+# los valores por tipo de traza pesa ~1 KB en lugar de ~7 KB por figura en cada respuesta.
+_base = pio.templates['plotly'].layout
+pio.templates['kuenka'] = go.layout.Template(layout=go.Layout(
+    autotypenumbers=_base.autotypenumbers, xaxis=_base.xaxis, yaxis=_base.yaxis,
+    hovermode=_base.hovermode, hoverlabel=_base.hoverlabel, coloraxis=_base.coloraxis,
+    title=dict(x=_base.title.x, font=dict(family='Segoe UI', size=20, color=color_texto)),
+    font=dict(family='Segoe UI', size=14, color=color_texto),
+    colorway=colores, plot_bgcolor='white', paper_bgcolor='white',
+    legend=dict(tracegroupgap=0)
+))
+pio.templates.default = 'kuenka'
+
+# Con orjson instalado, Dash y la caché de vistas serializan las respuestas mucho más rápido
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
+
 # Inicializar app
-app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Los componentes de cada pestaña tienen sus propios callbacks y no siempre están en el layout
+app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
 app.title = "KuenKa - Gas Production Executive Dashboard"
 server = app.server  # Necesario para el despliegue
 
-# Layout principal con branding KuenKa
-app.layout = dbc.Container([
-    # Encabezado con branding KuenKa
-    dbc.Row([
-        dbc.Col([
-            html.Div([
+@server.route('/estado/cache')
+def estado_cache():
+    """Aciertos y fallos de la caché de pestañas de este worker"""
+    return jsonify(cache_vistas.estadisticas())
+
+# Prefijo de los ids de los componentes de cada pestaña
+PESTANA_POR_PREFIJO = {'general': 'general', 'campo': 'campo', 'cuenca': 'cuenca', 'dept': 'departamento', 'mensual': 'mensual'}
+
+def props_pedido(cuerpo):
+    """Entradas y estados de un pedido de callback que son de un solo componente"""
+    props = [p for clave in ('inputs', 'state') if isinstance(cuerpo.get(clave), list) for p in cuerpo[clave]]
+    return [p for p in props if isinstance(p, dict)]
+
+def etiqueta_respuesta(cuerpo):
+    """Pestaña y tipo de un pedido de callback.
+
+    'general/pestana' al armar la pestaña, 'general/rango' cuando el filtro dispara
+    render_content solo para revisar si el rango quedó sin datos y 'general/filtro'
+    al actualizar los componentes con el filtro. En la vista mensual, 'mensual/zoom'
+    cuando el navegador informa otro ancho o zoom de una gráfica. El cuerpo lo arma
+    el cliente: una pestaña que no es del dashboard queda como 'otra'.
+    """
+    salida = str(cuerpo.get('output', ''))
+    cambios = [str(c) for c in cuerpo.get('changedPropIds') or []]
+    if salida.startswith('..tab-content.'):
+        valor = next((p.get('value') for p in props_pedido(cuerpo) if p.get('id') == 'tabs'), '')
+        pestana = valor.replace('tab-', '') if isinstance(valor, str) and valor in INDICE_PESTANA else 'otra'
+        tipo = 'rango' if any(c.startswith(('year-slider.', 'cambio-vacio.')) for c in cambios) else 'pestana'
+        return f"{pestana}/{tipo}"
+    prefijo = salida.lstrip('.').split('-', 1)[0]
+    tipo = 'zoom' if any(c.endswith('-vista.data') for c in cambios) else 'filtro'
+    return f"{PESTANA_POR_PREFIJO.get(prefijo, 'otra')}/{tipo}"
+
+def rango_pedido(cuerpo):
+    """(inicio, fin) del filtro de años que trae un pedido de callback, llevado a los años de los datos, o None"""
+    for prop in props_pedido(cuerpo):
+        if prop.get('id') == 'year-slider' and isinstance(prop.get('value'), list):
+            # Los años los manda el cliente: fuera de los datos darían una serie nueva por cada valor
+            anios = datos.actual().datos[0].anios
+            try:
+                inicio, fin = (min(max(int(a), anios[0]), anios[-1]) for a in prop['value'][:2])
+            except (TypeError, ValueError):
+                return None
+            return str(inicio), str(fin)
+    return None
+
+def anotar_medicion(clave, segundos):
+    """Sumar segundos a una parte de la medición del pedido en curso (filtro o callback)"""
+    if has_request_context() and 'medicion' in g:
+        g.medicion[clave] += segundos
+
+def medir_callback(funcion):
+    """Callback que anota cuánto tarda en la medición del pedido"""
+    @functools.wraps(funcion)
+    def medido(*args):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            anotar_medicion('callback', time.perf_counter() - inicio)
+    return medido
+
+def indices_medidos(indices):
+    """Índices que anotan el tiempo de cada consulta como tiempo de filtro del pedido"""
+    if not METRICAS:
+        return indices
+    return tuple(Cronometrado(indice, functools.partial(anotar_medicion, 'filtro')) for indice in indices)
+
+@server.before_request
+def iniciar_medicion():
+    if METRICAS and request.path.endswith('/_dash-update-component'):
+        g.medicion = {'inicio': time.perf_counter(), 'filtro': 0.0, 'callback': 0.0}
+
+def registrar_metricas(cuerpo, etiqueta, tamano):
+    """Repartir el tiempo del pedido en filtro, figuras y serialización y anotarlo con los bytes"""
+    medicion = g.medicion
+    total = time.perf_counter() - medicion['inicio']
+    pestana, tipo = etiqueta.split('/', 1)
+    metricas.observar('gas_callback_filtro_segundos', medicion['filtro'], pestana, tipo)
+    metricas.observar('gas_callback_figuras_segundos', max(0.0, medicion['callback'] - medicion['filtro']), pestana, tipo)
+    metricas.observar('gas_callback_serializacion_segundos', max(0.0, total - medicion['callback']), pestana, tipo)
+    metricas.observar('gas_callback_total_segundos', total, pestana, tipo)
+    metricas.observar('gas_respuesta_bytes', tamano, pestana, tipo)
+    rango = rango_pedido(cuerpo)
+    if rango and tipo != 'rango':
+        metricas.incrementar('gas_rango_pedidos_total', pestana, *rango)
+    metricas.volcar()
+
+@server.after_request
+def medir_respuesta(respuesta):
+    """Anotar los bytes de cada respuesta de callback por pestaña y, con GAS_METRICAS, sus tiempos.
+
+    Solo cuentan las respuestas con datos (200) o sin cambios (204); los pedidos
+    con error no dejan series en las métricas.
+    """
+    if (request.path.endswith('/_dash-update-component') and respuesta.status_code in (200, 204)
+            and not respuesta.direct_passthrough):
+        cuerpo = request.get_json(silent=True)
+        if not isinstance(cuerpo, dict):
+            return respuesta
+        etiqueta, tamano = etiqueta_respuesta(cuerpo), len(respuesta.get_data())
+        medidor_respuestas.registrar(etiqueta, tamano)
+        if 'medicion' in g:
+            registrar_metricas(cuerpo, etiqueta, tamano)
+    return respuesta
+
+@server.route('/estado/respuestas')
+def estado_respuestas():
+    """Bytes de las respuestas de callbacks de este worker por pestaña"""
+    return jsonify(medidor_respuestas.estadisticas())
+
+if METRICAS:
+    @server.route('/metrics')
+    def exponer_metricas():
+        """Métricas de los callbacks en el formato de texto de Prometheus"""
+        return Response(metricas.texto(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def cargar_geometria(ruta, que='departamentos'):
+    """GeoJSON ya preparado y en bytes, con sus centros; (None, None) si no hay archivo"""
+    if not os.path.exists(ruta):
+        return None, None
+    try:
+        geojson, centros = preparar_geojson(ruta)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ No se pudo leer la geometría de {que} ({e})")
+        return None, None
+    print(f"🗺️ Geometría de {que} lista para el mapa ({len(geojson['features'])} features)")
+    return json.dumps(geojson, separators=(',', ':')).encode(), centros
+
+def responder_geojson(contenido, etag):
+    """GeoJSON preparado con ETag, para que el navegador no lo vuelva a bajar"""
+    if contenido is None:
+        return jsonify({'error': 'sin geometría'}), 404
+    respuesta = Response(contenido, mimetype='application/json')
+    respuesta.set_etag(etag)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = 86400
+    return respuesta.make_conditional(request)
+
+# La geometría se sirve aparte y las figuras solo llevan su URL: el navegador la descarga
+# una vez y la guarda en caché, en lugar de recibirla en cada respuesta del mapa
+GEOMETRIA_DEPARTAMENTOS, CENTROS_DEPARTAMENTOS = cargar_geometria(RUTA_GEOJSON)
+if MODO_MAPA == 'coropletas' and GEOMETRIA_DEPARTAMENTOS is None:
+    print(f"⚠️ GAS_MAPA=coropletas necesita {RUTA_GEOJSON}; el mapa queda de burbujas")
+URL_GEOMETRIA = '/geo/departamentos.json'
+ETAG_GEOMETRIA = hashlib.sha1(GEOMETRIA_DEPARTAMENTOS).hexdigest() if GEOMETRIA_DEPARTAMENTOS else None
+GEOMETRIA_CONTORNO, _ = cargar_geometria(RUTA_CONTORNO, 'contorno del país')
+URL_CONTORNO = '/geo/contorno.json'
+ETAG_CONTORNO = hashlib.sha1(GEOMETRIA_CONTORNO).hexdigest() if GEOMETRIA_CONTORNO else None
+
+@server.route(URL_GEOMETRIA)
+def geometria_departamentos():
+    """GeoJSON preparado de los departamentos"""
+    return responder_geojson(GEOMETRIA_DEPARTAMENTOS, ETAG_GEOMETRIA)
+
+@server.route(URL_CONTORNO)
+def geometria_contorno():
+    """GeoJSON preparado del contorno del país"""
+    return responder_geojson(GEOMETRIA_CONTORNO, ETAG_CONTORNO)
+
+# Layout principal con branding KuenKa; es una función para que el filtro de años
+# refleje la versión de los datos vigente al abrir la página
+def crear_layout():
+    version = datos.actual()
+    df_anual = version.datos[0].df
+    return dbc.Container([
+        # Encabezado con branding KuenKa
+        dbc.Row([
+            dbc.Col([
                 html.Div([
-                    html.H1("KuenKa Energy Research", 
-                           style={'color': color_primario, 'fontWeight': 'bold', 'fontSize': '42px', 'marginBottom': '0'}),
-                    html.H3("Gas Production Executive Dashboard", 
-                           style={'color': color_texto, 'fontWeight': '300', 'fontSize': '24px', 'marginTop': '0'}),
-
-                ], className="text-center")
-            ], style={
-                'background': f'linear-gradient(135deg, {color_fondo} 0%, #ffffff 100%)',
-                'padding': '30px',
-                'borderRadius': '15px',
-                'boxShadow': '0 8px 32px rgba(0, 166, 147, 0.1)',
-                'border': f'1px solid {color_primario}20',
-                'marginBottom': '30px'
-            })
-        ], width=12)
-    ]),
-    
-    # Filtro de año con estilo KuenKa
-    dbc.Row([
-        dbc.Col([
-            html.Label("Filter by Year:", style={'fontWeight': 'bold', 'color': color_texto, 'fontSize': '18px', 'marginBottom': '15px'}),
-            dcc.RangeSlider(
-                id='year-slider',
-                min=int(df_anual['AÑO'].min()),
-                max=int(df_anual['AÑO'].max()),
-                value=[int(df_anual['AÑO'].min()), int(df_anual['AÑO'].max())],
-                marks={year: {'label': str(year), 'style': {'color': color_texto, 'fontSize': '14px', 'fontWeight': '500'}} 
-                       for year in range(int(df_anual['AÑO'].min()), int(df_anual['AÑO'].max()) + 1)},
-                step=1,
-                tooltip={"placement": "bottom", "always_visible": True}
-            )
-        ], width=12, style={
-            'padding': '20px 30px', 
-            'backgroundColor': 'white', 
-            'borderRadius': '10px',
-            'boxShadow': '0 4px 12px rgba(0, 0, 0, 0.08)',
-            'marginBottom': '20px'
-        })
-    ], className="mb-4"),
-    
-    # Pestañas con estilo KuenKa
-    dcc.Tabs(id="tabs", value="tab-general", 
-             style={'height': '60px', 'marginBottom': '20px'},
-             children=[
-        dcc.Tab(label="General Analysis", value="tab-general", 
-                style={
-                    'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px', 
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                },
-                selected_style={
-                    'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                }),
-        dcc.Tab(label="Production by Field", value="tab-campo",
-                style={
-                    'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                },
-                selected_style={
-                    'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                }),
-        dcc.Tab(label="Production by Basin", value="tab-cuenca",
-                style={
-                    'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                },
-                selected_style={
-                    'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
-                    'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
-                }),
-        dcc.Tab(label="Production by Department", value="tab-departamento",
-                style={
-                    'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
-                    'borderRadius': '8px 8px 0 0'
-                },
-                selected_style={
-                    'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
-                    'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
-                    'borderRadius': '8px 8px 0 0'
+                    html.Div([
+                        html.H1("KuenKa Energy Research", 
+                               style={'color': color_primario, 'fontWeight': 'bold', 'fontSize': '42px', 'marginBottom': '0'}),
+                        html.H3("Gas Production Executive Dashboard", 
+                               style={'color': color_texto, 'fontWeight': '300', 'fontSize': '24px', 'marginTop': '0'}),
+
+                    ], className="text-center")
+                ], style={
+                    'background': f'linear-gradient(135deg, {color_fondo} 0%, #ffffff 100%)',
+                    'padding': '30px',
+                    'borderRadius': '15px',
+                    'boxShadow': '0 8px 32px rgba(0, 166, 147, 0.1)',
+                    'border': f'1px solid {color_primario}20',
+                    'marginBottom': '30px'
                 })
-    ]),
-    
-    # Contenido de las pestañas
-    html.Div(id="tab-content", style={'padding': '0 10px'})
-    
-], fluid=True, style={
-    'backgroundColor': color_fondo, 
-    'minHeight': '100vh', 
-    'padding': '20px',
-    'fontFamily': '"Segoe UI", Tahoma, Geneva, Verdana, sans-serif'
-})
-
-# Callbacks para las pestañas
-@app.callback(Output('tab-content', 'children'),
-              [Input('tabs', 'value'),
-               Input('year-slider', 'value')])
-def render_content(active_tab, year_range):
-    # Filtrar datos por año
-    df_anual_filtered = df_anual[
-        (df_anual['AÑO'] >= year_range[0]) & 
-        (df_anual['AÑO'] <= year_range[1])
-    ]
-    
-    df_cuenca_filtered = df_cuenca[
-        (df_cuenca['AÑO'] >= year_range[0]) & 
-        (df_cuenca['AÑO'] <= year_range[1])
-    ]
+            ], width=12)
+        ]),
     
-    df_campo_filtered = df_campo[
-        (df_campo['AÑO'] >= year_range[0]) & 
-        (df_campo['AÑO'] <= year_range[1])
-    ]
+        # Filtro de año con estilo KuenKa
+        dbc.Row([
+            dbc.Col([
+                html.Label("Filter by Year:", style={'fontWeight': 'bold', 'color': color_texto, 'fontSize': '18px', 'marginBottom': '15px'}),
+                dcc.RangeSlider(
+                    id='year-slider',
+                    min=int(df_anual['AÑO'].min()),
+                    max=int(df_anual['AÑO'].max()),
+                    value=[int(df_anual['AÑO'].min()), int(df_anual['AÑO'].max())],
+                    marks={year: {'label': str(year), 'style': {'color': color_texto, 'fontSize': '14px', 'fontWeight': '500'}} 
+                           for year in range(int(df_anual['AÑO'].min()), int(df_anual['AÑO'].max()) + 1)},
+                    step=1,
+                    tooltip={"placement": "bottom", "always_visible": True}
+                )
+            ], width=12, style={
+                'padding': '20px 30px', 
+                'backgroundColor': 'white', 
+                'borderRadius': '10px',
+                'boxShadow': '0 4px 12px rgba(0, 0, 0, 0.08)',
+                'marginBottom': '20px'
+            })
+        ], className="mb-4"),
     
-    df_departamento_filtered = df_departamento[
-        (df_departamento['AÑO'] >= year_range[0]) & 
-        (df_departamento['AÑO'] <= year_range[1])
-    ]
+        # Pestañas con estilo KuenKa
+        dcc.Tabs(id="tabs", value="tab-general", 
+                 style={'height': '60px', 'marginBottom': '20px'},
+                 children=[
+            dcc.Tab(label="General Analysis", value="tab-general", 
+                    style={
+                        'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px', 
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    },
+                    selected_style={
+                        'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    }),
+            dcc.Tab(label="Production by Field", value="tab-campo",
+                    style={
+                        'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    },
+                    selected_style={
+                        'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    }),
+            dcc.Tab(label="Production by Basin", value="tab-cuenca",
+                    style={
+                        'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    },
+                    selected_style={
+                        'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    }),
+            dcc.Tab(label="Production by Department", value="tab-departamento",
+                    style={
+                        'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    },
+                    selected_style={
+                        'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
+                        'borderRadius': '8px 8px 0 0', 'marginRight': '5px'
+                    }),
+            dcc.Tab(label="Monthly Analysis", value="tab-mensual",
+                    style={
+                        'backgroundColor': 'white', 'color': color_texto, 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}20',
+                        'borderRadius': '8px 8px 0 0'
+                    },
+                    selected_style={
+                        'backgroundColor': color_primario, 'color': 'white', 'padding': '15px 30px',
+                        'fontSize': '16px', 'fontWeight': '600', 'border': f'2px solid {color_primario}',
+                        'borderRadius': '8px 8px 0 0'
+                    })
+        ]),
     
+        # Contenido de las pestañas; tab-vacia indica si se está mostrando el aviso de rango sin datos
+        html.Div(id="tab-content", style={'padding': '0 10px'}),
+        dcc.Store(id="tab-vacia", data=False),
+        # En modo cliente: datos para filtrar en el navegador y aviso de que el rango pasó a tener o no datos
+        *([dcc.Store(id="datos-cliente", data=datos_cliente(version)),
+           dcc.Store(id="cambio-vacio")] if FILTRO_CLIENTE else [])
+    
+    ], fluid=True, style={
+        'backgroundColor': color_fondo, 
+        'minHeight': '100vh', 
+        'padding': '20px',
+        'fontFamily': '"Segoe UI", Tahoma, Geneva, Verdana, sans-serif'
+    })
+
+app.layout = crear_layout
+
+# Posición del índice de cada pestaña en los datos cargados
+INDICE_PESTANA = {'tab-general': 0, 'tab-cuenca': 1, 'tab-campo': 2, 'tab-departamento': 3, 'tab-mensual': 4}
+
+# Callbacks para las pestañas. render_content arma la estructura de la pestaña al
+# cambiar de pestaña; al mover el filtro de años cada pestaña actualiza solo sus
+# componentes (ver actualizar_tab_*), salvo cuando el rango pasa a tener o dejar
+# de tener datos y cambia la estructura.
+# En modo cliente el navegador avisa con cambio-vacio solo cuando el rango pasa a tener o no datos,
+# así que mover el filtro no llega al servidor.
+@app.callback([Output('tab-content', 'children'),
+               Output('tab-vacia', 'data')],
+              [Input('tabs', 'value'),
+               Input('cambio-vacio', 'data') if FILTRO_CLIENTE else Input('year-slider', 'value')],
+              [State('year-slider', 'value'),
+               State('tab-vacia', 'data')])
+@medir_callback
+def render_content(active_tab, _, year_range, vacia):
+    # Una sola versión de los datos para toda la respuesta, aunque haya una recarga en curso
+    version = datos.actual()
+    indices = indices_medidos(version.datos)
+    inicio, fin = int(year_range[0]), int(year_range[1])
+    sin_datos = indices[INDICE_PESTANA[active_tab]].filas(inicio, fin).empty
+    if ctx.triggered_id in ('year-slider', 'cambio-vacio') and vacia == sin_datos:
+        raise PreventUpdate
+    # La firma de las fuentes identifica la versión de los datos igual en todos los workers
+    contenido = cache_vistas.obtener((active_tab, inicio, fin, version.firma),
+                                     lambda: crear_pestana(indices, active_tab, inicio, fin))
+    return contenido, sin_datos
+
+def actualizar_componentes(nombre, active_tab, year_range, construir):
+    """Valores nuevos de los componentes de una pestaña para el rango, desde la caché de vistas"""
+    version = datos.actual()
+    inicio, fin = int(year_range[0]), int(year_range[1])
+    indice = indices_medidos(version.datos)[INDICE_PESTANA[active_tab]]
+    if indice.filas(inicio, fin).empty:
+        # render_content reemplaza la pestaña por el aviso de rango sin datos
+        raise PreventUpdate
+    return cache_vistas.obtener((nombre, inicio, fin, version.firma), lambda: construir(indice, inicio, fin))
+
+def registrar_actualizacion(nombre, active_tab, salidas, construir):
+    """Registrar el callback del filtro de años de una pestaña.
+
+    construir(indice, inicio, fin) devuelve un valor por cada salida; en modo
+    cliente se dejan fuera las salidas que actualiza el navegador.
+    """
+    posiciones = [i for i, salida in enumerate(salidas) if not (FILTRO_CLIENTE and salida in SALIDAS_CLIENTE)]
+    if not posiciones:
+        return
+
+    def actualizar(year_range):
+        valores = actualizar_componentes(nombre, active_tab, year_range, construir)
+        return [valores[i] for i in posiciones]
+
+    actualizar.__name__ = f'actualizar_{nombre}'
+    app.callback([Output(*salidas[i]) for i in posiciones],
+                 Input('year-slider', 'value'),
+                 prevent_initial_call=True)(medir_callback(actualizar))
+
+def crear_pestana(indices, active_tab, inicio, fin):
+    indice_anual, indice_cuenca, indice_campo, indice_departamento, indice_mensual = indices
+
+    # Cada pestaña toma sus filas y totales del rango de años desde el índice
     if active_tab == 'tab-general':
-        return crear_tab_general(df_anual_filtered)
+        return crear_tab_general(indice_anual, inicio, fin)
     elif active_tab == 'tab-campo':
-        return crear_tab_campo(df_campo_filtered)
+        return crear_tab_campo(indice_campo, inicio, fin)
     elif active_tab == 'tab-cuenca':
-        return crear_tab_cuenca(df_cuenca_filtered)
+        return crear_tab_cuenca(indice_cuenca, inicio, fin)
     elif active_tab == 'tab-departamento':
-        return crear_tab_departamento(df_departamento_filtered)
+        return crear_tab_departamento(indice_departamento, inicio, fin)
+    elif active_tab == 'tab-mensual':
+        return crear_tab_mensual(indice_mensual, inicio, fin)
 
-def crear_tab_general(df_filtered):
-    """Create general tab content"""
-    
-    # KPIs
-    if not df_filtered.empty:
-        prod_total = df_filtered['PRODUCCION FISCALIZADA'].sum()
-        mejor_año = df_filtered.loc[df_filtered['PRODUCCION FISCALIZADA'].idxmax()]
-        peor_año = df_filtered.loc[df_filtered['PRODUCCION FISCALIZADA'].idxmin()]
-        var_ult = df_filtered['PRODUCCION FISCALIZADA'].pct_change(fill_method=None).iloc[-1] * 100 if len(df_filtered) > 1 else 0
+def kpis_general(indice, inicio, fin):
+    """Total, mejor y peor año y variación del último año en el rango"""
+    kpis = indice.kpis(inicio, fin)
+    if kpis is not None:
+        prod_total = kpis['total']
+        mejor_año = pd.Series({'AÑO': kpis['mejor'][0], 'PRODUCCION FISCALIZADA': kpis['mejor'][1]})
+        peor_año = pd.Series({'AÑO': kpis['peor'][0], 'PRODUCCION FISCALIZADA': kpis['peor'][1]})
+        var_ult = kpis['var_ult']
     else:
         prod_total = 0
         mejor_año = pd.Series({'AÑO': 'N/A', 'PRODUCCION FISCALIZADA': 0})
         peor_año = pd.Series({'AÑO': 'N/A', 'PRODUCCION FISCALIZADA': 0})
         var_ult = 0
+    return prod_total, mejor_año, peor_año, var_ult
+
+def estilos_variacion(var_ult):
+    """Estilos del valor y de la tarjeta de variación según su signo"""
+    estilo_valor = {'fontSize': '28px', 'fontWeight': 'bold', 
+                    'color': color_primario if var_ult >= 0 else '#e74c3c'}
+    estilo_tarjeta = {
+        'boxShadow': f'0 8px 32px rgba(0, 166, 147, 0.15)' if var_ult >= 0 else '0 8px 32px rgba(231, 76, 60, 0.15)', 
+        'border': f'1px solid {color_primario if var_ult >= 0 else "#e74c3c"}30', 
+        'borderRadius': '15px',
+        'background': f'linear-gradient(135deg, #ffffff 0%, {"#f8fffd" if var_ult >= 0 else "#fdf8f8"} 100%)'
+    }
+    return estilo_valor, estilo_tarjeta
+
+def plantilla_hover(x, y, grupo=None, valor_y='%{y}'):
+    """Texto del hover con los nombres de columna, como el de plotly.express"""
+    prefijo = f'{grupo[0]}={grupo[1]}<br>' if grupo else ''
+    return f'{prefijo}{x}=%{{x}}<br>{y}={valor_y}<extra></extra>'
+
+def lineas_por_grupo(df, grupo, titulo, **traza):
+    """Una línea de producción por valor de grupo, en el orden en que aparecen en df (como px.line con color)"""
+    fig = go.Figure()
+    for i, (nombre, filas) in enumerate(df.groupby(grupo, observed=True, sort=False)):
+        fig.add_trace(go.Scatter(
+            x=filas['AÑO'].to_numpy(), y=filas['PRODUCCION FISCALIZADA'].to_numpy(),
+            name=str(nombre), legendgroup=str(nombre), showlegend=True,
+            line=dict(color=colores[i % len(colores)]),
+            hovertemplate=plantilla_hover('AÑO', 'PRODUCCION FISCALIZADA', (grupo, nombre)),
+            **{'mode': 'lines+markers', **traza}
+        ))
+    fig.update_layout(title=titulo, legend_title_text=grupo)
+    return fig
+
+def barras_totales(df, columna, titulo):
+    """Barras de producción total por columna con la escala de color KuenKa"""
+    produccion = df['PRODUCCION FISCALIZADA'].to_numpy()
+    fig = go.Figure(go.Bar(
+        x=df[columna].to_numpy(), y=produccion,
+        marker=dict(color=produccion, coloraxis='coloraxis'),
+        hovertemplate=plantilla_hover(columna, 'PRODUCCION FISCALIZADA', valor_y='%{marker.color}')
+    ))
+    fig.update_layout(
+        title=titulo, barmode='relative',
+        coloraxis=dict(colorscale=[[0, '#e8f5f2'], [1, color_primario]],
+                       colorbar=dict(title=dict(text='PRODUCCION FISCALIZADA')))
+    )
+    return fig
+
+def figura_multiples(filas_por_entidad, subtitulos):
+    """Una gráfica pequeña por entidad, todas en una sola figura de 2 columnas con el eje de años compartido.
+
+    filas_por_entidad trae las filas de cada entidad en el orden de subtitulos.
+    La cuadrícula se arma directamente en el layout (como make_subplots, pero sin
+    validar cada eje por separado, que con 50 campos tarda casi medio segundo).
+    """
+    n = len(subtitulos)
+    n_filas = max(1, -(-n // 2))
+    alto = 320 * n_filas
+    hueco_x, hueco_y = 0.1, 110 / alto
+    ancho_celda = (1 - hueco_x) / 2
+    alto_celda = (1 - hueco_y * (n_filas - 1)) / n_filas
+    
+    layout = {'height': alto, 'font': {'size': 12}, 'showlegend': False, 'margin': {'t': 90}, 'annotations': []}
+    trazas = []
+    for k in range(2 * n_filas):
+        fila, columna = divmod(k, 2)
+        sufijo = '' if k == 0 else str(k + 1)
+        x0 = columna * (ancho_celda + hueco_x)
+        y1 = 1 - fila * (alto_celda + hueco_y)
+        # Todas las celdas comparten el rango de años con la primera
+        layout[f'xaxis{sufijo}'] = {'domain': [x0, x0 + ancho_celda], 'anchor': f'y{sufijo}', 'dtick': 1, 'tickmode': 'linear',
+                                    **({'matches': 'x'} if k else {}),
+                                    **({'title': {'text': 'Year'}} if fila == n_filas - 1 else {})}
+        layout[f'yaxis{sufijo}'] = {'domain': [max(0, y1 - alto_celda), y1], 'anchor': f'x{sufijo}', 'tickformat': ',.0f',
+                                    **({'title': {'text': 'Fiscalized Production'}} if columna == 0 else {})}
+        if k >= n:
+            continue
+        color = colores[k % len(colores)]
+        df = filas_por_entidad[k]
+        trazas.append({
+            'type': 'scatter', 'xaxis': f'x{sufijo}', 'yaxis': f'y{sufijo}',
+            'x': df['AÑO'].to_numpy(), 'y': df['PRODUCCION FISCALIZADA'].to_numpy(), 'mode': 'lines+markers',
+            'line': {'color': color, 'width': 3, 'shape': 'spline'}, 'marker': {'size': 8, 'color': color},
+            'hovertemplate': plantilla_hover('AÑO', 'PRODUCCION FISCALIZADA')
+        })
+        layout['annotations'].append({
+            'text': subtitulos[k], 'font': {'size': 16}, 'showarrow': False,
+            'x': x0 + ancho_celda / 2, 'y': y1, 'xref': 'paper', 'yref': 'paper',
+            'xanchor': 'center', 'yanchor': 'bottom'
+        })
+    return go.Figure(data=trazas, layout=layout)
+
+def subtitulo_multiple(nombre, detalle):
+    """Título de una gráfica pequeña con una segunda línea más chica"""
+    return f"Evolution of {nombre}<br><span style='font-size:12px'>{detalle}</span>" if detalle else f"Evolution of {nombre}"
+
+def variacion_porcentual(df_filtered):
+    var_pct = df_filtered[['AÑO', 'PRODUCCION FISCALIZADA']].copy()
+    var_pct['VARIACION %'] = var_pct['PRODUCCION FISCALIZADA'].pct_change(fill_method=None) * 100
+    return var_pct
+
+def crear_tab_general(indice, inicio, fin):
+    """Create general tab content"""
+    
+    df_filtered = indice.filas(inicio, fin)
+    
+    # KPIs
+    prod_total, mejor_año, peor_año, var_ult = kpis_general(indice, inicio, fin)
+    estilo_var, estilo_tarjeta_var = estilos_variacion(var_ult)
+    
+    anios = df_filtered['AÑO'].to_numpy()
+    produccion = df_filtered['PRODUCCION FISCALIZADA'].to_numpy()
     
     # Gráfica de línea de tiempo
-    fig_timeline = px.line(df_filtered, x='AÑO', y='PRODUCCION FISCALIZADA',
-                          title='Timeline - Annual Gas Production',
-                          markers=True, line_shape='spline')
-    fig_timeline.update_traces(line=dict(color=color_primario, width=4),
-                              marker=dict(size=8, color=color_primario))
+    fig_timeline = go.Figure(go.Scatter(
+        x=anios, y=produccion, mode='lines+markers',
+        line=dict(color=color_primario, width=4, shape='spline'),
+        marker=dict(size=8, color=color_primario),
+        hovertemplate=plantilla_hover('AÑO', 'PRODUCCION FISCALIZADA')
+    ))
     fig_timeline.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
+        title='Timeline - Annual Gas Production',
         xaxis_title='Year', yaxis_title='Fiscalized Production',
         yaxis_tickformat=',.0f',
         xaxis=dict(dtick=1, tickmode='linear')
     )
     
     # Gráfica de barras
-    fig_barras = px.bar(df_filtered, x='AÑO', y='PRODUCCION FISCALIZADA',
-                       title='Annual Production - Bar Chart View',
-                       text_auto='.2s')
-    fig_barras.update_traces(marker_color=color_primario, texttemplate='%{y:,.0f}', textposition='outside')
+    fig_barras = go.Figure(go.Bar(
+        x=anios, y=produccion, marker_color=color_primario,
+        texttemplate='%{y:,.0f}', textposition='outside',
+        hovertemplate=plantilla_hover('AÑO', 'PRODUCCION FISCALIZADA')
+    ))
     fig_barras.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
+        title='Annual Production - Bar Chart View',
         xaxis_title='Year', yaxis_title='Fiscalized Production',
         yaxis_tickformat=',.0f',
         showlegend=False,
@@ -279,17 +784,17 @@ def crear_tab_general(df_filtered):
     )
     
     # Gráfica de variación porcentual
-    var_pct = df_filtered[['AÑO', 'PRODUCCION FISCALIZADA']].copy()
-    var_pct['VARIACION %'] = var_pct['PRODUCCION FISCALIZADA'].pct_change(fill_method=None) * 100
+    var_pct = variacion_porcentual(df_filtered)
     
-    fig_variacion = px.line(var_pct, x='AÑO', y='VARIACION %', 
-                           markers=True, title='Annual Percentage Variation')
-    fig_variacion.update_traces(line=dict(color=color_secundario, width=3),
-                               marker=dict(size=6, color=color_secundario))
+    fig_variacion = go.Figure(go.Scatter(
+        x=anios, y=var_pct['VARIACION %'].to_numpy(), mode='lines+markers',
+        line=dict(color=color_secundario, width=3),
+        marker=dict(size=6, color=color_secundario),
+        hovertemplate=plantilla_hover('AÑO', 'VARIACION %')
+    ))
     fig_variacion.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_secundario, family='Segoe UI'),
+        title='Annual Percentage Variation',
+        title_font=dict(color=color_secundario),
         xaxis_title='Year', yaxis_title='Variation %',
         xaxis=dict(dtick=1, tickmode='linear')
     )
@@ -302,7 +807,7 @@ def crear_tab_general(df_filtered):
                     dbc.CardBody([
                         html.H4("Total Production", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{prod_total:,.0f}", className="text-center", 
+                        html.H2(f"{prod_total:,.0f}", className="text-center", id='general-total',
                                style={'fontSize': '28px', 'fontWeight': 'bold', 'color': color_primario})
                     ], style={'padding': '25px'})
                 ], style={
@@ -317,9 +822,9 @@ def crear_tab_general(df_filtered):
                     dbc.CardBody([
                         html.H4("Best Year", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{mejor_año['AÑO']:.0f}", className="text-center", 
+                        html.H2(f"{mejor_año['AÑO']:.0f}", className="text-center", id='general-mejor',
                                style={'fontSize': '28px', 'fontWeight': 'bold', 'color': color_primario}),
-                        html.P(f"{mejor_año['PRODUCCION FISCALIZADA']:,.0f}", className="text-center text-muted",
+                        html.P(f"{mejor_año['PRODUCCION FISCALIZADA']:,.0f}", className="text-center text-muted", id='general-mejor-valor',
                               style={'fontSize': '14px', 'marginBottom': '0'})
                     ], style={'padding': '25px'})
                 ], style={
@@ -334,9 +839,9 @@ def crear_tab_general(df_filtered):
                     dbc.CardBody([
                         html.H4("Lowest Year", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{peor_año['AÑO']:.0f}", className="text-center", 
+                        html.H2(f"{peor_año['AÑO']:.0f}", className="text-center", id='general-peor',
                                style={'fontSize': '28px', 'fontWeight': 'bold', 'color': '#ff9800'}),
-                        html.P(f"{peor_año['PRODUCCION FISCALIZADA']:,.0f}", className="text-center text-muted",
+                        html.P(f"{peor_año['PRODUCCION FISCALIZADA']:,.0f}", className="text-center text-muted", id='general-peor-valor',
                               style={'fontSize': '14px', 'marginBottom': '0'})
                     ], style={'padding': '25px'})
                 ], style={
@@ -352,48 +857,77 @@ def crear_tab_general(df_filtered):
                         html.H4("Last Year Var.", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
                         html.H2(f"{var_ult:.1f}%", 
-                                className="text-center",
-                                style={'fontSize': '28px', 'fontWeight': 'bold', 
-                                      'color': color_primario if var_ult >= 0 else '#e74c3c'})
+                                className="text-center", id='general-var',
+                                style=estilo_var)
                     ], style={'padding': '25px'})
-                ], style={
-                    'boxShadow': f'0 8px 32px rgba(0, 166, 147, 0.15)' if var_ult >= 0 else '0 8px 32px rgba(231, 76, 60, 0.15)', 
-                    'border': f'1px solid {color_primario if var_ult >= 0 else "#e74c3c"}30', 
-                    'borderRadius': '15px',
-                    'background': f'linear-gradient(135deg, #ffffff 0%, {"#f8fffd" if var_ult >= 0 else "#fdf8f8"} 100%)'
-                })
+                ], style=estilo_tarjeta_var, id='general-var-card')
             ], width=3, className="mb-3")
         ], className="mb-5", style={'marginLeft': '10px', 'marginRight': '10px'}),
         
         # Gráficas
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_timeline, style={'height': '400px'})
+                dcc.Graph(id='general-timeline', figure=fig_timeline, style={'height': '400px'})
             ], width=12)
         ], className="mb-3"),
         
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_barras, style={'height': '400px'})
+                dcc.Graph(id='general-barras', figure=fig_barras, style={'height': '400px'})
             ], width=6),
             dbc.Col([
-                dcc.Graph(figure=fig_variacion, style={'height': '400px'})
+                dcc.Graph(id='general-variacion', figure=fig_variacion, style={'height': '400px'})
             ], width=6)
         ])
     ]
 
-def crear_tab_campo(df_filtered):
-    """Create field tab content"""
+SALIDAS_GENERAL = [('general-total', 'children'),
+                   ('general-mejor', 'children'),
+                   ('general-mejor-valor', 'children'),
+                   ('general-peor', 'children'),
+                   ('general-peor-valor', 'children'),
+                   ('general-var', 'children'),
+                   ('general-var', 'style'),
+                   ('general-var-card', 'style'),
+                   ('general-timeline', 'figure'),
+                   ('general-barras', 'figure'),
+                   ('general-variacion', 'figure')]
+
+def componentes_tab_general(indice, inicio, fin):
+    """KPIs y solo los datos de las trazas y el rango del eje de las gráficas de la pestaña general"""
+    df_filtered = indice.filas(inicio, fin)
+    prod_total, mejor_año, peor_año, var_ult = kpis_general(indice, inicio, fin)
+    estilo_var, estilo_tarjeta_var = estilos_variacion(var_ult)
+    var_pct = variacion_porcentual(df_filtered)
+    
+    timeline, barras, variacion = Patch(), Patch(), Patch()
+    for fig, y in ((timeline, df_filtered['PRODUCCION FISCALIZADA']), (barras, df_filtered['PRODUCCION FISCALIZADA']),
+                   (variacion, var_pct['VARIACION %'])):
+        fig['data'][0]['x'] = df_filtered['AÑO'].to_numpy()
+        fig['data'][0]['y'] = y.to_numpy()
+    barras['layout']['yaxis']['range'] = [0, df_filtered['PRODUCCION FISCALIZADA'].max() * 1.15]
+    
+    return [f"{prod_total:,.0f}",
+            f"{mejor_año['AÑO']:.0f}", f"{mejor_año['PRODUCCION FISCALIZADA']:,.0f}",
+            f"{peor_año['AÑO']:.0f}", f"{peor_año['PRODUCCION FISCALIZADA']:,.0f}",
+            f"{var_ult:.1f}%", estilo_var, estilo_tarjeta_var,
+            timeline, barras, variacion]
+
+def datos_tab_campo(indice, inicio, fin):
+    """Filas, totales por campo, top 10 y campos que concentran el 70% de la producción en el rango"""
     
-    if df_filtered.empty:
-        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
+    df_filtered = indice.filas(inicio, fin)
+    
+    # Campos de mayor a menor producción; los empates quedan en el orden de las
+    # categorías (orden estable), igual que en assets/filtro_cliente.js
+    totales = indice.totales(inicio, fin)
+    campos_totales = totales.sort_values(ascending=False, kind='stable').reset_index()
     
     # Top 10 campos por producción total
-    top_campos = df_filtered.groupby('CAMPO_LIMPIO')['PRODUCCION FISCALIZADA'].sum().nlargest(10).reset_index()
+    top_campos = campos_totales.head(10)
     
     # Calcular campos que concentran el 70% de la producción
-    produccion_total = df_filtered['PRODUCCION FISCALIZADA'].sum()
-    campos_totales = df_filtered.groupby('CAMPO_LIMPIO')['PRODUCCION FISCALIZADA'].sum().sort_values(ascending=False).reset_index()
+    produccion_total = indice.total(inicio, fin)
     campos_totales['ACUMULADO'] = campos_totales['PRODUCCION FISCALIZADA'].cumsum()
     campos_totales['PORCENTAJE_ACUM'] = (campos_totales['ACUMULADO'] / produccion_total) * 100
     
@@ -410,258 +944,171 @@ def crear_tab_campo(df_filtered):
             if campo not in campos_70_pct and len(campos_70_pct) < 10:
                 campos_70_pct.append(campo)
     
+    return df_filtered, totales, top_campos, produccion_total, campos_70_pct
+
+def figura_campos_tiempo(df_filtered, top_campos):
     # Serie de tiempo por campo (top 5)
     top_5_campos = top_campos.head(5)['CAMPO_LIMPIO'].tolist()
     df_top_campos = df_filtered[df_filtered['CAMPO_LIMPIO'].isin(top_5_campos)]
     
-    fig_campos_tiempo = px.line(df_top_campos, x='AÑO', y='PRODUCCION FISCALIZADA', 
-                               color='CAMPO_LIMPIO', markers=True,
-                               title='Time Evolution - Top 5 Fields',
-                               color_discrete_sequence=colores)
+    fig_campos_tiempo = lineas_por_grupo(df_top_campos, 'CAMPO_LIMPIO', 'Time Evolution - Top 5 Fields')
     fig_campos_tiempo.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
         xaxis_title='Year', yaxis_title='Fiscalized Production',
         yaxis_tickformat=',.0f',
         xaxis=dict(dtick=1, tickmode='linear')
     )
-    
+    return fig_campos_tiempo
+
+def figura_top_campos(top_campos):
     # Gráfica de barras top campos
-    fig_top_campos = px.bar(top_campos, x='CAMPO_LIMPIO', y='PRODUCCION FISCALIZADA',
-                           color='PRODUCCION FISCALIZADA', 
-                           color_continuous_scale=[[0, '#e8f5f2'], [1, color_primario]],
-                           title='Top 10 Fields by Total Production')
+    fig_top_campos = barras_totales(top_campos, 'CAMPO_LIMPIO', 'Top 10 Fields by Total Production')
     fig_top_campos.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
         xaxis_title='Field', yaxis_title='Total Production',
         yaxis_tickformat=',.0f',
         xaxis={'tickangle': 45}
     )
+    return fig_top_campos
+
+def figura_campos_individuales(indice, inicio, fin, campos_70_pct, totales, produccion_total):
+    """Gráficas pequeñas de los campos que concentran el 70%, en una sola figura"""
+    # Las filas del rango se agrupan una vez para todos los campos
+    grupos = indice.filas(inicio, fin).groupby('CAMPO_LIMPIO', observed=True, sort=False)
+    campos = [campo for campo in campos_70_pct if campo in grupos.groups]
+    subtitulos = [subtitulo_multiple(campo, f"Represents {totales[campo] / produccion_total * 100:.1f}% of total"
+                                     if produccion_total > 0 else None)
+                  for campo in campos]
+    return figura_multiples([grupos.get_group(campo) for campo in campos], subtitulos)
+
+def titulo_campos_principales(campos_70_pct):
+    return f"Main Fields - Concentrate 70% of Production ({len(campos_70_pct)} fields)"
+
+def crear_tab_campo(indice, inicio, fin):
+    """Create field tab content"""
     
-    # Crear gráficas individuales para campos que concentran el 70%
-    campos_individuales = []
-    
-    for i, campo in enumerate(campos_70_pct):
-        try:
-            df_campo = df_filtered[df_filtered['CAMPO_LIMPIO'] == campo]
-            
-            if not df_campo.empty and len(df_campo) > 0:
-                # Crear gráfica individual para el campo
-                fig_individual = px.line(df_campo, x='AÑO', y='PRODUCCION FISCALIZADA',
-                                       markers=True, title=f'Evolution of {campo}',
-                                       line_shape='spline')
-                
-                # Usar un color específico del array de colores
-                color_campo = colores[i % len(colores)]
-                fig_individual.update_traces(line=dict(color=color_campo, width=3),
-                                           marker=dict(size=8, color=color_campo))
-                
-                # Calcular el porcentaje de producción de este campo
-                prod_campo = df_campo['PRODUCCION FISCALIZADA'].sum()
-                if produccion_total > 0:
-                    porcentaje_campo = (prod_campo / produccion_total) * 100
-                    
-                    fig_individual.update_layout(
-                        plot_bgcolor='white', paper_bgcolor='white',
-                        font=dict(family='Segoe UI', size=12, color=color_texto),
-                        title_font=dict(size=16, color=color_texto, family='Segoe UI'),
-                        xaxis_title='Year', yaxis_title='Fiscalized Production',
-                        yaxis_tickformat=',.0f',
-                        height=300,
-                        xaxis=dict(dtick=1, tickmode='linear'),
-                        annotations=[
-                            dict(
-                                text=f"Represents {porcentaje_campo:.1f}% of total",
-                                x=0.5, y=1.05, xref="paper", yref="paper",
-                                showarrow=False, font=dict(size=10, color=color_texto, family='Segoe UI'),
-                                bgcolor="rgba(0, 166, 147, 0.15)", 
-                                bordercolor=color_primario, 
-                                borderwidth=1,
-                                borderpad=4,
-                                xanchor='center',
-                                yanchor='bottom'
-                            )
-                        ]
-                    )
-                else:
-                    fig_individual.update_layout(
-                        plot_bgcolor='white', paper_bgcolor='white',
-                        font=dict(family='Segoe UI', size=12, color=color_texto),
-                        title_font=dict(size=16, color=color_texto, family='Segoe UI'),
-                        xaxis_title='Year', yaxis_title='Fiscalized Production',
-                        yaxis_tickformat=',.0f',
-                        height=300,
-                        xaxis=dict(dtick=1, tickmode='linear')
-                    )
-                
-                campos_individuales.append(
-                    dbc.Col([
-                        dcc.Graph(figure=fig_individual, style={'height': '320px'})
-                    ], width=6, className="mb-3")
-                )
-        except Exception as e:
-            # Si hay error con un campo específico, continúa con el siguiente
-            print(f"Error with field {campo}: {str(e)}")
-            continue
+    if indice.filas(inicio, fin).empty:
+        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
     
-    # Organizar las gráficas individuales en filas de 2 columnas
-    filas_individuales = []
-    for i in range(0, len(campos_individuales), 2):
-        fila = campos_individuales[i:i+2]
-        # Si solo hay una gráfica en la última fila, completar con columna vacía
-        if len(fila) == 1:
-            fila.append(dbc.Col(width=6))
-        filas_individuales.append(dbc.Row(fila))
+    df_filtered, totales, top_campos, produccion_total, campos_70_pct = datos_tab_campo(indice, inicio, fin)
+    fig_campos_tiempo = figura_campos_tiempo(df_filtered, top_campos)
+    fig_top_campos = figura_top_campos(top_campos)
+    fig_individuales = figura_campos_individuales(indice, inicio, fin, campos_70_pct, totales, produccion_total)
     
     return [
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_campos_tiempo, style={'height': '500px'})
+                dcc.Graph(id='campo-tiempo', figure=fig_campos_tiempo, style={'height': '500px'})
             ], width=12)
         ], className="mb-3"),
         
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_top_campos, style={'height': '500px'})
+                dcc.Graph(id='campo-top', figure=fig_top_campos, style={'height': '500px'})
             ], width=12)
         ], className="mb-4"),
         
         # Información sobre los campos principales
         dbc.Row([
             dbc.Col([
-                html.H3(f"Main Fields - Concentrate 70% of Production ({len(campos_70_pct)} fields)", 
-                       className="text-center mb-4",
+                html.H3(titulo_campos_principales(campos_70_pct), 
+                       className="text-center mb-4", id='campo-titulo',
                        style={'color': color_texto, 'fontWeight': '600', 'fontFamily': 'Segoe UI'})
             ], width=12)
         ]),
         
         # Gráficas individuales de campos principales
-        *filas_individuales
+        dcc.Graph(id='campo-individuales', figure=fig_individuales)
     ]
 
-def crear_tab_cuenca(df_filtered):
-    """Create basin tab content"""
-    
-    if df_filtered.empty:
-        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
-    
+SALIDAS_CAMPO = [('campo-tiempo', 'figure'),
+                 ('campo-top', 'figure'),
+                 ('campo-titulo', 'children'),
+                 ('campo-individuales', 'figure')]
+
+def componentes_tab_campo(indice, inicio, fin):
+    """Componentes de la pestaña de campos; la barra del top 10 solo cambia sus datos"""
+    df_filtered, totales, top_campos, produccion_total, campos_70_pct = datos_tab_campo(indice, inicio, fin)
+    
+    # Los campos del top 5 cambian con el rango, así que esa gráfica va completa
+    top = Patch()
+    top['data'][0]['x'] = top_campos['CAMPO_LIMPIO'].to_numpy()
+    top['data'][0]['y'] = top_campos['PRODUCCION FISCALIZADA'].to_numpy()
+    top['data'][0]['marker']['color'] = top_campos['PRODUCCION FISCALIZADA'].to_numpy()
+    
+    return [figura_campos_tiempo(df_filtered, top_campos), top,
+            titulo_campos_principales(campos_70_pct),
+            figura_campos_individuales(indice, inicio, fin, campos_70_pct, totales, produccion_total)]
+
+
+def figura_cuencas_tiempo(df_filtered):
     # Serie de tiempo por cuenca
-    fig_cuencas_tiempo = px.line(df_filtered, x='AÑO', y='PRODUCCION FISCALIZADA', 
-                                color='CUENCA', markers=True,
-                                title='Time Evolution by Basin',
-                                color_discrete_sequence=colores)
+    fig_cuencas_tiempo = lineas_por_grupo(df_filtered, 'CUENCA', 'Time Evolution by Basin')
     fig_cuencas_tiempo.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
         xaxis_title='Year', yaxis_title='Fiscalized Production',
         yaxis_tickformat=',.0f',
         xaxis=dict(dtick=1, tickmode='linear')
     )
-    
+    return fig_cuencas_tiempo
+
+def totales_cuencas(indice, inicio, fin):
+    """Producción por cuenca en el rango, de mayor a menor"""
+    totales = indice.totales(inicio, fin)
+    cuencas_total = totales.reset_index()
+    cuencas_total = cuencas_total.sort_values('PRODUCCION FISCALIZADA', ascending=False, kind='stable')
+    return totales, cuencas_total
+
+def figura_cuencas_total(cuencas_total):
     # Producción total por cuenca
-    cuencas_total = df_filtered.groupby('CUENCA')['PRODUCCION FISCALIZADA'].sum().reset_index()
-    cuencas_total = cuencas_total.sort_values('PRODUCCION FISCALIZADA', ascending=False)
-    
-    fig_cuencas_total = px.bar(cuencas_total, x='CUENCA', y='PRODUCCION FISCALIZADA',
-                              color='PRODUCCION FISCALIZADA', 
-                              color_continuous_scale=[[0, '#e8f5f2'], [1, color_primario]],
-                              title='Total Production by Basin')
+    fig_cuencas_total = barras_totales(cuencas_total, 'CUENCA', 'Total Production by Basin')
     fig_cuencas_total.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
         xaxis_title='Basin', yaxis_title='Total Production',
         yaxis_tickformat=',.0f'
     )
-    
+    return fig_cuencas_total
+
+def figura_area_cuencas(df_filtered):
     # Gráfica de área apilada
-    fig_area = px.area(df_filtered, x='AÑO', y='PRODUCCION FISCALIZADA', 
-                      color='CUENCA', title='Production Composition by Basin',
-                      color_discrete_sequence=colores)
+    fig_area = lineas_por_grupo(df_filtered, 'CUENCA', 'Production Composition by Basin',
+                                mode='lines', stackgroup='1')
     fig_area.update_layout(
-        plot_bgcolor='white', paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
         xaxis_title='Year', yaxis_title='Fiscalized Production',
         yaxis_tickformat=',.0f',
         xaxis=dict(dtick=1, tickmode='linear')
     )
+    return fig_area
+
+def figura_cuencas_individuales(df_filtered, totales):
+    """Gráficas pequeñas de cada cuenca, en una sola figura"""
+    grupos = df_filtered.groupby('CUENCA', observed=True, sort=False)
+    cuencas = df_filtered['CUENCA'].dropna().unique()
+    subtitulos = [subtitulo_multiple(cuenca, f"Total Production: {totales[cuenca]:,.0f}") for cuenca in cuencas]
+    return figura_multiples([grupos.get_group(cuenca) for cuenca in cuencas], subtitulos)
+
+def crear_tab_cuenca(indice, inicio, fin):
+    """Create basin tab content"""
     
-    # Crear gráficas individuales por cuenca
-    cuencas_individuales = []
-    cuencas_unicas = df_filtered['CUENCA'].unique()
-    
-    for i, cuenca in enumerate(cuencas_unicas):
-        df_cuenca = df_filtered[df_filtered['CUENCA'] == cuenca]
-        
-        # Crear gráfica individual para la cuenca
-        fig_individual = px.line(df_cuenca, x='AÑO', y='PRODUCCION FISCALIZADA',
-                               markers=True, title=f'Evolution of {cuenca}',
-                               line_shape='spline')
-        
-        # Usar un color específico del array de colores
-        color_cuenca = colores[i % len(colores)]
-        fig_individual.update_traces(line=dict(color=color_cuenca, width=3),
-                                   marker=dict(size=8, color=color_cuenca))
-        
-        # Calcular el total de producción de esta cuenca
-        total_cuenca = df_cuenca['PRODUCCION FISCALIZADA'].sum()
-        
-        fig_individual.update_layout(
-            plot_bgcolor='white', paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=12, color=color_texto),
-            title_font=dict(size=16, color=color_texto, family='Segoe UI'),
-            xaxis_title='Year', yaxis_title='Fiscalized Production',
-            yaxis_tickformat=',.0f',
-            height=300,
-            xaxis=dict(dtick=1, tickmode='linear'),
-            annotations=[
-                dict(
-                    text=f"Total Production: {total_cuenca:,.0f}",
-                    x=0.5, y=1.05, xref="paper", yref="paper",
-                    showarrow=False, font=dict(size=10, color=color_texto, family='Segoe UI'),
-                    bgcolor="rgba(0, 166, 147, 0.15)", 
-                    bordercolor=color_primario, 
-                    borderwidth=1,
-                    borderpad=4,
-                    xanchor='center',
-                    yanchor='bottom'
-                )
-            ]
-        )
-        
-        cuencas_individuales.append(
-            dbc.Col([
-                dcc.Graph(figure=fig_individual, style={'height': '320px'})
-            ], width=6, className="mb-3")
-        )
+    df_filtered = indice.filas(inicio, fin)
+    if df_filtered.empty:
+        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
     
-    # Organizar las gráficas individuales en filas de 2 columnas
-    filas_individuales = []
-    for i in range(0, len(cuencas_individuales), 2):
-        fila = cuencas_individuales[i:i+2]
-        # Si solo hay una gráfica en la última fila, completar con columna vacía
-        if len(fila) == 1:
-            fila.append(dbc.Col(width=6))
-        filas_individuales.append(dbc.Row(fila))
+    totales, cuencas_total = totales_cuencas(indice, inicio, fin)
+    fig_cuencas_tiempo = figura_cuencas_tiempo(df_filtered)
+    fig_cuencas_total = figura_cuencas_total(cuencas_total)
+    fig_area = figura_area_cuencas(df_filtered)
+    fig_individuales = figura_cuencas_individuales(df_filtered, totales)
     
     return [
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_cuencas_tiempo, style={'height': '450px'})
+                dcc.Graph(id='cuenca-tiempo', figure=fig_cuencas_tiempo, style={'height': '450px'})
             ], width=12)
         ], className="mb-3"),
         
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_cuencas_total, style={'height': '400px'})
+                dcc.Graph(id='cuenca-total', figure=fig_cuencas_total, style={'height': '400px'})
             ], width=6),
             dbc.Col([
-                dcc.Graph(figure=fig_area, style={'height': '400px'})
+                dcc.Graph(id='cuenca-area', figure=fig_area, style={'height': '400px'})
             ], width=6)
         ], className="mb-4"),
         
@@ -675,20 +1122,37 @@ def crear_tab_cuenca(df_filtered):
         ]),
         
         # Gráficas individuales por cuenca
-        *filas_individuales
+        dcc.Graph(id='cuenca-individuales', figure=fig_individuales)
     ]
 
-def crear_tab_departamento(df_filtered):
-    """Create department tab content with interactive maps and analysis"""
-    
-    if df_filtered.empty:
-        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
+SALIDAS_CUENCA = [('cuenca-tiempo', 'figure'),
+                  ('cuenca-total', 'figure'),
+                  ('cuenca-area', 'figure'),
+                  ('cuenca-individuales', 'figure')]
+
+def componentes_tab_cuenca(indice, inicio, fin):
+    """Componentes de la pestaña de cuencas; la barra de totales solo cambia sus datos"""
+    df_filtered = indice.filas(inicio, fin)
+    totales, cuencas_total = totales_cuencas(indice, inicio, fin)
+    
+    # Las cuencas con datos cambian con el rango, así que las series por cuenca van completas
+    total = Patch()
+    total['data'][0]['x'] = cuencas_total['CUENCA'].to_numpy()
+    total['data'][0]['y'] = cuencas_total['PRODUCCION FISCALIZADA'].to_numpy()
+    total['data'][0]['marker']['color'] = cuencas_total['PRODUCCION FISCALIZADA'].to_numpy()
+    
+    return [figura_cuencas_tiempo(df_filtered), total, figura_area_cuencas(df_filtered),
+            figura_cuencas_individuales(df_filtered, totales)]
+
+
+def datos_tab_departamento(indice, inicio, fin):
+    """Producción por año y departamento, totales por departamento y KPIs del rango"""
     
     # Agrupar datos por departamento
-    df_dept_grouped = df_filtered.groupby(['AÑO', 'DEPARTAMENTO'])['PRODUCCION FISCALIZADA'].sum().reset_index()
+    df_dept_grouped = indice.por_anio_entidad(inicio, fin)
     
     # Producción total por departamento
-    dept_totales = df_filtered.groupby('DEPARTAMENTO')['PRODUCCION FISCALIZADA'].sum().sort_values(ascending=False).reset_index()
+    dept_totales = indice.totales(inicio, fin).sort_values(ascending=False, kind='stable').reset_index()
     
     # KPIs específicos de departamentos
     total_departamentos = len(dept_totales)
@@ -699,172 +1163,98 @@ def crear_tab_departamento(df_filtered):
     top_3_produccion = dept_totales.head(3)['PRODUCCION FISCALIZADA'].sum()
     pct_top_3 = (top_3_produccion / produccion_total * 100) if produccion_total > 0 else 0
     
-    # Crear mapa de Colombia (choropleth)
-    # Para esto necesitamos crear un mapeo de nombres de departamentos
-    dept_mapping = {
-        'ARAUCA': 'Arauca',
-        'BOYACA': 'Boyacá',
-        'CASANARE': 'Casanare',
-        'CESAR': 'Cesar',
-        'CUNDINAMARCA': 'Cundinamarca',
-        'HUILA': 'Huila',
-        'LA GUAJIRA': 'La Guajira',
-        'META': 'Meta',
-        'PUTUMAYO': 'Putumayo',
-        'SANTANDER': 'Santander',
-        'TOLIMA': 'Tolima',
-        'NORTE DE SANTANDER': 'Norte de Santander',
-        'ANTIOQUIA': 'Antioquia',
-        'CORDOBA': 'Córdoba',
-        'MAGDALENA': 'Magdalena',
-        'BOLIVAR': 'Bolívar',
-        'VALLE DEL CAUCA': 'Valle del Cauca',
-        'CAUCA': 'Cauca',
-        'NARIÑO': 'Nariño',
-        'CHOCO': 'Chocó'
-    }
-    
-    # Preparar datos para el mapa
-    dept_totales_mapa = dept_totales.copy()
-    dept_totales_mapa['DEPARTAMENTO_MAPA'] = dept_totales_mapa['DEPARTAMENTO'].map(dept_mapping).fillna(dept_totales_mapa['DEPARTAMENTO'])
-    
-    # Mapa de burbujas por departamento (más simple y efectivo)
-    # Coordenadas aproximadas de las capitales de departamentos de Colombia
-    coordenadas_dept = {
-        'ARAUCA': {'lat': 7.0889, 'lon': -70.7591},
-        'BOYACA': {'lat': 5.4544, 'lon': -73.3624},
-        'CASANARE': {'lat': 5.3356, 'lon': -72.4056},
-        'CESAR': {'lat': 10.4636, 'lon': -73.2532},
-        'CUNDINAMARCA': {'lat': 4.7110, 'lon': -74.0721},
-        'HUILA': {'lat': 2.9273, 'lon': -75.2819},
-        'LA GUAJIRA': {'lat': 11.5444, 'lon': -72.9072},
-        'META': {'lat': 4.1420, 'lon': -73.6266},
-        'PUTUMAYO': {'lat': 0.5136, 'lon': -76.3567},
-        'SANTANDER': {'lat': 7.1193, 'lon': -73.1227},
-        'TOLIMA': {'lat': 4.4389, 'lon': -75.2322},
-        'NORTE DE SANTANDER': {'lat': 7.8939, 'lon': -72.5078},
-        'ANTIOQUIA': {'lat': 6.2442, 'lon': -75.5812},
-        'CORDOBA': {'lat': 8.7479, 'lon': -75.8814},
-        'MAGDALENA': {'lat': 11.2408, 'lon': -74.1990},
-        'BOLIVAR': {'lat': 10.3910, 'lon': -75.4794},
-        'VALLE DEL CAUCA': {'lat': 3.4516, 'lon': -76.5320},
-        'CAUCA': {'lat': 2.4418, 'lon': -76.6063},
-        'NARIÑO': {'lat': 1.2136, 'lon': -77.2811},
-        'CHOCO': {'lat': 5.6837, 'lon': -76.6581},
-        'SUCRE': {'lat': 9.3017, 'lon': -75.3975},
-        'ATLANTICO': {'lat': 10.9685, 'lon': -74.7813},
-        'CALDAS': {'lat': 5.0689, 'lon': -75.5174},
-        'QUINDIO': {'lat': 4.5389, 'lon': -75.6661},
-        'RISARALDA': {'lat': 4.8133, 'lon': -75.6961},
-        'CAQUETA': {'lat': 1.6145, 'lon': -75.6062},
-        'VICHADA': {'lat': 6.1167, 'lon': -67.4167},
-        'GUAVIARE': {'lat': 2.5649, 'lon': -72.6409},
-        'VAUPES': {'lat': 1.2500, 'lon': -70.2333},
-        'GUAINIA': {'lat': 2.5833, 'lon': -67.9167},
-        'AMAZONAS': {'lat': -4.2158, 'lon': -69.9406},
-        'SAN ANDRES Y PROVIDENCIA': {'lat': 12.5847, 'lon': -81.7006}
-    }
-    
-    # Preparar datos para el mapa con TODOS los departamentos
-    dept_mapa_data = []
-    total_nacional = dept_totales_mapa['PRODUCCION FISCALIZADA'].sum()
-    max_produccion = dept_totales_mapa['PRODUCCION FISCALIZADA'].max()
-    min_produccion = dept_totales_mapa['PRODUCCION FISCALIZADA'].min()
-    
-    for _, row in dept_totales_mapa.iterrows():
-        dept = row['DEPARTAMENTO']
-        produccion = row['PRODUCCION FISCALIZADA']
-        participacion = (produccion / total_nacional * 100) if total_nacional > 0 else 0
-        
-        # Buscar coordenadas o asignar coordenadas por defecto si no existe
-        if dept in coordenadas_dept:
-            lat = coordenadas_dept[dept]['lat']
-            lon = coordenadas_dept[dept]['lon']
-        else:
-            # Coordenadas por defecto para departamentos no encontrados (centro de Colombia)
-            lat = 4.5 + (len(dept_mapa_data) * 0.1)  # Distribución vertical para evitar superposición
-            lon = -74.0 + (len(dept_mapa_data) * 0.1)  # Distribución horizontal
-        
-        # Calcular tamaño de burbuja proporcional a la producción
-        if max_produccion > min_produccion:
-            # Escala logarítmica para mejor visualización de rangos amplios
-            import math
-            if produccion > 0:
-                log_ratio = math.log(produccion / min_produccion) / math.log(max_produccion / min_produccion)
-                size = 8 + (log_ratio * 45)  # Tamaños entre 8 y 53
-            else:
-                size = 8
-        else:
-            size = 25  # Tamaño uniforme si todos tienen la misma producción
-        
-        dept_mapa_data.append({
-            'DEPARTAMENTO': dept,
-            'PRODUCCION': produccion,
-            'PARTICIPACION': participacion,
-            'PRODUCCION_FORMATTED': f"{produccion:,.0f}",
-            'PARTICIPACION_FORMATTED': f"{participacion:.1f}%",
-            'lat': lat,
-            'lon': lon,
-            'size': size
-        })
-    
-    df_mapa = pd.DataFrame(dept_mapa_data)
-    
-    # Crear mapa con fondo geográfico real usando scatter_mapbox
-    fig_mapa = px.scatter_mapbox(
-        df_mapa,
-        lat='lat',
-        lon='lon',
-        size='size',
-        color='PRODUCCION',
-        hover_name='DEPARTAMENTO',
-        hover_data=['PRODUCCION_FORMATTED', 'PARTICIPACION_FORMATTED'],
-        color_continuous_scale=[
-            [0, '#10b981'],     # Verde medio
-            [0.3, '#059669'],   # Verde medio oscuro
-            [0.5, color_primario],  # Verde KuenKa (#00a693)
-            [0.7, '#047857'],   # Verde oscuro
-            [0.9, '#065f46'],   # Verde muy oscuro
-            [1, '#064e3b']      # Verde más oscuro
-        ],
-        size_max=60,
-        title='Geographic Distribution - Gas Production by Department',
-        mapbox_style="open-street-map",  # Mapa de fondo real
-        zoom=5,
-        center={"lat": 4.5, "lon": -74.0}  # Centrado en Colombia
-    )
-    
-    # Actualizar el hover template para mostrar la información correctamente
-    fig_mapa.update_traces(
+    return df_dept_grouped, dept_totales, total_departamentos, dept_principal, produccion_total, pct_top_3
+
+# Escala de verdes del mapa, del más claro al más oscuro
+ESCALA_MAPA = [
+    [0, '#10b981'],     # Verde medio
+    [0.3, '#059669'],   # Verde medio oscuro
+    [0.5, color_primario],  # Verde KuenKa (#00a693)
+    [0.7, '#047857'],   # Verde oscuro
+    [0.9, '#065f46'],   # Verde muy oscuro
+    [1, '#064e3b']      # Verde más oscuro
+]
+
+def tamanos_burbuja(produccion):
+    """Tamaño de cada burbuja entre 8 y 53, en escala logarítmica para rangos amplios de producción"""
+    if produccion.max() <= produccion.min():
+        return np.full(len(produccion), 25.0)
+    positivos = produccion[produccion > 0]
+    base = positivos.min() if len(positivos) else 1.0
+    rango = np.log(produccion.max() / base) if produccion.max() > base else 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proporcion = np.log(produccion / base) / rango
+    return np.where(produccion > 0, 8 + proporcion * 45, 8.0)
+
+def figura_mapa_departamentos(dept_totales):
+    """Mapa de producción por departamento: burbujas en las capitales o, con la geometría, coropletas"""
+    departamentos = dept_totales['DEPARTAMENTO'].astype(str).to_numpy()
+    produccion = dept_totales['PRODUCCION FISCALIZADA'].to_numpy(np.float64)
+    total_nacional = produccion.sum()
+    participacion = produccion / total_nacional * 100 if total_nacional > 0 else np.zeros(len(produccion))
+    claves, lat, lon = ubicar_departamentos(departamentos, CENTROS_DEPARTAMENTOS)
+    
+    comunes = dict(
+        hovertext=departamentos,
+        customdata=np.column_stack([[f"{p:,.0f}" for p in produccion], [f"{p:.1f}%" for p in participacion]]),
         hovertemplate='<b>%{hovertext}</b><br>' +
-                     'Total Production: %{customdata[0]}<br>' +
-                     'National Share: %{customdata[1]}<br>' +
-                     '<extra></extra>',
-        customdata=df_mapa[['PRODUCCION_FORMATTED', 'PARTICIPACION_FORMATTED']].values
+                      'Total Production: %{customdata[0]}<br>' +
+                      'National Share: %{customdata[1]}<br>' +
+                      '<extra></extra>'
     )
+    if MODO_MAPA == 'coropletas' and GEOMETRIA_DEPARTAMENTOS is not None:
+        # Sin teselas: solo los polígonos de los departamentos sobre fondo blanco
+        fig_mapa = go.Figure(go.Choroplethmapbox(
+            geojson=URL_GEOMETRIA, locations=claves, z=produccion, coloraxis='coloraxis',
+            marker=dict(line=dict(color='white', width=1)), **comunes
+        ))
+        estilo, capas = 'white-bg', []
+    else:
+        tamanos = tamanos_burbuja(produccion)
+        fig_mapa = go.Figure(go.Scattermapbox(
+            lat=lat, lon=lon, mode='markers',
+            # Mismo escalado de área que px.scatter_mapbox con size_max=60
+            marker=dict(size=tamanos, sizemode='area', sizeref=tamanos.max() / 60 ** 2,
+                        color=produccion, coloraxis='coloraxis'),
+            **comunes
+        ))
+        estilo = FONDO_MAPA
+        # Los bordes de los departamentos (o, sin ellos, el contorno del país) ubican las burbujas sin teselas
+        if GEOMETRIA_DEPARTAMENTOS is not None:
+            capas = [dict(source=URL_GEOMETRIA, sourcetype='geojson', type='line', color='#9aa5b1', line=dict(width=0.6))]
+        elif GEOMETRIA_CONTORNO is not None:
+            capas = [dict(source=URL_CONTORNO, sourcetype='geojson', type='line', color='#9aa5b1', line=dict(width=1))]
+        else:
+            capas = []
     
     fig_mapa.update_layout(
-        font=dict(family='Segoe UI', size=14, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
+        title='Geographic Distribution - Gas Production by Department',
+        mapbox=dict(style=estilo, zoom=5, center=dict(lat=4.5, lon=-74.0), layers=capas),  # Centrado en Colombia
+        coloraxis=dict(colorscale=ESCALA_MAPA, colorbar=dict(title='Production Volume', tickformat=',.0f')),
         height=500,
         showlegend=False,
-        margin=dict(t=60, b=40, l=40, r=40),
-        paper_bgcolor='white',
-        coloraxis_colorbar=dict(
-            title="Production Volume",
-            tickformat=",.0f"
-        )
+        margin=dict(t=60, b=40, l=40, r=40)
     )
     
+    return fig_mapa
+
+def top_10_departamentos(dept_totales, produccion_total):
+    """Top 10 departamentos con su participación, etiqueta y color de barra"""
     # Gráfica de ranking departamental mejorada
     top_10_depts = dept_totales.head(10).copy()
     top_10_depts['RANK'] = range(1, len(top_10_depts) + 1)
-    top_10_depts['PARTICIPACION'] = (top_10_depts['PRODUCCION FISCALIZADA'] / total_nacional * 100)
-    top_10_depts['DEPT_LABEL'] = top_10_depts['DEPARTAMENTO'] + ' (' + top_10_depts['PARTICIPACION'].round(1).astype(str) + '%)'
+    top_10_depts['PARTICIPACION'] = (top_10_depts['PRODUCCION FISCALIZADA'] / produccion_total * 100)
+    top_10_depts['DEPT_LABEL'] = top_10_depts['DEPARTAMENTO'].astype(str) + ' (' + top_10_depts['PARTICIPACION'].round(1).astype(str) + '%)'
     
     # Crear colores graduales personalizados
+    colors = colores_ranking(len(top_10_depts))
+    
+    return top_10_depts, colors
+
+def colores_ranking(n):
+    """Colores de las n primeras barras del ranking de departamentos"""
     colors = []
-    for i, val in enumerate(top_10_depts['PRODUCCION FISCALIZADA']):
+    for i in range(n):
         if i == 0:  # Primer lugar
             colors.append('#004d40')  # Verde oscuro
         elif i == 1:  # Segundo lugar
@@ -875,7 +1265,9 @@ def crear_tab_departamento(df_filtered):
             # Gradiente para el resto
             intensity = 0.8 - (i-3) * 0.1
             colors.append(f'rgba(0, 166, 147, {max(intensity, 0.3)})')
-    
+    return colors
+
+def figura_ranking_departamentos(top_10_depts, colors):
     fig_ranking = go.Figure(go.Bar(
         y=top_10_depts['DEPT_LABEL'],
         x=top_10_depts['PRODUCCION FISCALIZADA'],
@@ -899,10 +1291,7 @@ def crear_tab_departamento(df_filtered):
     
     fig_ranking.update_layout(
         title='Top 10 Departments by Total Production<br><span style="font-size:14px; color:#666">Percentage shows national market share</span>',
-        plot_bgcolor='white', 
-        paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=12, color=color_texto),
-        title_font=dict(size=20, color=color_texto, family='Segoe UI'),
+        font=dict(size=12),
         title_x=0.5,
         xaxis_title='Total Production (Million Cubic Feet)', 
         yaxis_title='Department',
@@ -920,6 +1309,9 @@ def crear_tab_departamento(df_filtered):
         margin=dict(l=200, r=80, t=100, b=60)
     )
     
+    return fig_ranking
+
+def figura_departamentos_tiempo(df_dept_grouped, dept_totales):
     # Serie de tiempo por departamentos principales (Top 5) mejorada
     top_5_dept = dept_totales.head(5)['DEPARTAMENTO'].tolist()
     df_top_dept = df_dept_grouped[df_dept_grouped['DEPARTAMENTO'].isin(top_5_dept)]
@@ -969,10 +1361,8 @@ def crear_tab_departamento(df_filtered):
     
     fig_dept_tiempo.update_layout(
         title='Time Evolution - Top 5 Departments<br><span style="font-size:14px; color:#666">Trend direction by department</span>',
-        plot_bgcolor='white', 
-        paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=12, color=color_texto),
-        title_font=dict(size=18, color=color_texto, family='Segoe UI'),
+        font=dict(size=12),
+        title_font=dict(size=18),
         title_x=0.5,
         xaxis_title='Year', 
         yaxis_title='Fiscalized Production (Million Cubic Feet)',
@@ -1004,9 +1394,28 @@ def crear_tab_departamento(df_filtered):
         hovermode='x unified'
     )
     
+    return fig_dept_tiempo
 
-    
+def textos_kpis_departamento(total_departamentos, dept_principal, produccion_total, pct_top_3):
+    return [f"{total_departamentos}",
+            f"{dept_principal['DEPARTAMENTO']}",
+            f"{dept_principal['PRODUCCION FISCALIZADA']:,.0f}",
+            f"{(dept_principal['PRODUCCION FISCALIZADA'] / produccion_total * 100):.1f}% of total",
+            f"{pct_top_3:.1f}%",
+            f"{produccion_total:,.0f}"]
 
+def crear_tab_departamento(indice, inicio, fin):
+    """Create department tab content with interactive maps and analysis"""
+    
+    if indice.filas(inicio, fin).empty:
+        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
+    
+    df_dept_grouped, dept_totales, total_departamentos, dept_principal, produccion_total, pct_top_3 = datos_tab_departamento(indice, inicio, fin)
+    fig_mapa = figura_mapa_departamentos(dept_totales)
+    fig_ranking = figura_ranking_departamentos(*top_10_departamentos(dept_totales, produccion_total))
+    fig_dept_tiempo = figura_departamentos_tiempo(df_dept_grouped, dept_totales)
+    (texto_activos, texto_principal, texto_principal_valor,
+     texto_principal_pct, texto_top_3, texto_total) = textos_kpis_departamento(total_departamentos, dept_principal, produccion_total, pct_top_3)
     
     return [
         # KPIs específicos de departamentos mejorados
@@ -1016,7 +1425,7 @@ def crear_tab_departamento(df_filtered):
                     dbc.CardBody([
                         html.H4("Active Departments", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{total_departamentos}", className="text-center", 
+                        html.H2(texto_activos, className="text-center", id='dept-activos',
                                style={'fontSize': '36px', 'fontWeight': 'bold', 'color': color_primario}),
                         html.P("departments producing gas", className="text-center text-muted",
                               style={'fontSize': '12px', 'marginBottom': '0', 'fontStyle': 'italic'})
@@ -1035,12 +1444,12 @@ def crear_tab_departamento(df_filtered):
                     dbc.CardBody([
                         html.H4("Leading Department", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{dept_principal['DEPARTAMENTO']}", className="text-center", 
+                        html.H2(texto_principal, className="text-center", id='dept-principal',
                                style={'fontSize': '18px', 'fontWeight': 'bold', 'color': color_primario}),
-                        html.P(f"{dept_principal['PRODUCCION FISCALIZADA']:,.0f}", className="text-center",
+                        html.P(texto_principal_valor, className="text-center", id='dept-principal-valor',
                               style={'fontSize': '14px', 'marginBottom': '5px', 'color': color_texto, 'fontWeight': '500'}),
-                        html.P(f"{(dept_principal['PRODUCCION FISCALIZADA'] / total_nacional * 100):.1f}% of total", 
-                              className="text-center text-muted",
+                        html.P(texto_principal_pct, 
+                              className="text-center text-muted", id='dept-principal-pct',
                               style={'fontSize': '12px', 'marginBottom': '0', 'fontStyle': 'italic'})
                     ], style={'padding': '25px'})
                 ], style={
@@ -1055,7 +1464,7 @@ def crear_tab_departamento(df_filtered):
                     dbc.CardBody([
                         html.H4("Geographic Concentration", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{pct_top_3:.1f}%", className="text-center", 
+                        html.H2(texto_top_3, className="text-center", id='dept-top3',
                                style={'fontSize': '32px', 'fontWeight': 'bold', 'color': color_secundario}),
                         html.P(f"produced by top 3 departments", className="text-center text-muted",
                               style={'fontSize': '12px', 'marginBottom': '0', 'fontStyle': 'italic'})
@@ -1072,7 +1481,7 @@ def crear_tab_departamento(df_filtered):
                     dbc.CardBody([
                         html.H4("Total Production", className="card-title text-center mb-3", 
                                style={'color': color_texto, 'fontSize': '16px', 'fontWeight': '600'}),
-                        html.H2(f"{produccion_total:,.0f}", className="text-center", 
+                        html.H2(texto_total, className="text-center", id='dept-total',
                                style={'fontSize': '28px', 'fontWeight': 'bold', 'color': color_primario}),
                         html.P("million cubic feet", className="text-center text-muted",
                               style={'fontSize': '12px', 'marginBottom': '0', 'fontStyle': 'italic'})
@@ -1089,23 +1498,271 @@ def crear_tab_departamento(df_filtered):
         # Mapa principal de Colombia
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_mapa, style={'height': '520px'})
+                dcc.Graph(id='dept-mapa', figure=fig_mapa, style={'height': '520px'})
             ], width=12)
         ], className="mb-4"),
         
         # Análisis de ranking y evolución temporal
         dbc.Row([
             dbc.Col([
-                dcc.Graph(figure=fig_ranking, style={'height': '520px'})
+                dcc.Graph(id='dept-ranking', figure=fig_ranking, style={'height': '520px'})
             ], width=6),
             dbc.Col([
-                dcc.Graph(figure=fig_dept_tiempo, style={'height': '520px'})
+                dcc.Graph(id='dept-tiempo', figure=fig_dept_tiempo, style={'height': '520px'})
             ], width=6)
         ], className="mb-4"),
         
 
     ]
 
+SALIDAS_DEPARTAMENTO = [('dept-activos', 'children'),
+                        ('dept-principal', 'children'),
+                        ('dept-principal-valor', 'children'),
+                        ('dept-principal-pct', 'children'),
+                        ('dept-top3', 'children'),
+                        ('dept-total', 'children'),
+                        ('dept-mapa', 'figure'),
+                        ('dept-ranking', 'figure'),
+                        ('dept-tiempo', 'figure')]
+
+def componentes_tab_departamento(indice, inicio, fin):
+    """KPIs y gráficas de la pestaña de departamentos; el ranking solo cambia sus datos"""
+    df_dept_grouped, dept_totales, total_departamentos, dept_principal, produccion_total, pct_top_3 = datos_tab_departamento(indice, inicio, fin)
+    top_10_depts, colors = top_10_departamentos(dept_totales, produccion_total)
+    
+    ranking = Patch()
+    ranking['data'][0]['y'] = top_10_depts['DEPT_LABEL'].to_numpy()
+    ranking['data'][0]['x'] = top_10_depts['PRODUCCION FISCALIZADA'].to_numpy()
+    ranking['data'][0]['marker']['color'] = colors
+    ranking['data'][0]['text'] = [f"{val:,.0f}" for val in top_10_depts['PRODUCCION FISCALIZADA']]
+    ranking['data'][0]['customdata'] = list(zip(top_10_depts['DEPARTAMENTO'], 
+                                                top_10_depts['PARTICIPACION'],
+                                                top_10_depts['RANK']))
+    
+    # El mapa y las series del top 5 cambian de departamentos con el rango, así que van completos
+    return [*textos_kpis_departamento(total_departamentos, dept_principal, produccion_total, pct_top_3),
+            figura_mapa_departamentos(dept_totales), ranking,
+            figura_departamentos_tiempo(df_dept_grouped, dept_totales)]
+
+# Vista mensual. Cada gráfica recibe como mucho ancho × GAS_MENSUAL_PUNTOS_PIXEL puntos
+# repartidos entre sus series, elegidos con LTTB. El navegador informa en el store
+# <gráfica>-vista el ancho del área de dibujo y el rango visible (assets/mensual_gas.js);
+# al hacer zoom se piden de nuevo solo los meses visibles, así que con poco rango las
+# series llegan completas
+ANCHO_INICIAL_MENSUAL = 1000  # píxeles, hasta que el navegador informa el ancho real
+PUNTOS_MINIMOS_SERIE = 50
+CAMPOS_MENSUAL_INICIALES = 5
+
+def revision_mensual(inicio, fin):
+    """uirevision de las gráficas mensuales: al cambiar el rango de años se descarta el zoom"""
+    return f'{inicio}-{fin}'
+
+def leer_vista(vista, inicio, fin):
+    """(ancho en píxeles, (desde, hasta) en periodos o None) de la vista que informó el navegador.
+
+    El zoom solo cuenta si es del rango de años actual; si no, va la serie completa.
+    """
+    if not vista:
+        return ANCHO_INICIAL_MENSUAL, None
+    ancho = min(max(int(vista.get('ancho') or ANCHO_INICIAL_MENSUAL), 100), 10000)
+    rango = vista.get('rango')
+    if not rango or vista.get('revision') != revision_mensual(inicio, fin):
+        return ancho, None
+    try:
+        desde, hasta = pd.Timestamp(rango[0]), pd.Timestamp(rango[1])
+    except (TypeError, ValueError):
+        return ancho, None
+    return ancho, (desde.year * 12 + desde.month - 1, hasta.year * 12 + hasta.month - 1)
+
+def fechas_periodos(periodos):
+    """Texto AAAA-MM de cada periodo (AÑO * 12 + mes - 1), que Plotly toma como fecha"""
+    anios, meses = np.divmod(periodos, 12)
+    return [f'{a}-{m + 1:02d}' for a, m in zip(anios.tolist(), meses.tolist())]
+
+def campos_mensual_iniciales(indice, inicio, fin):
+    """Campos que muestra la gráfica por campo al abrir la pestaña: los de más producción en el rango"""
+    return indice.totales(inicio, fin).sort_values(ascending=False, kind='stable').head(CAMPOS_MENSUAL_INICIALES).index.tolist()
+
+def series_mensuales(indice, campos, inicio, fin, ancho, zoom):
+    """Trazas reducidas con LTTB y subtítulo con los puntos enviados de los que hay en la vista.
+
+    campos=None es la serie del total de todos los campos.
+    """
+    nombres = [None] if campos is None else [c for c in campos if c in indice.categorias]
+    umbral = max(PUNTOS_MINIMOS_SERIE, int(ancho * PUNTOS_POR_PIXEL_MENSUAL) // max(len(nombres), 1))
+    trazas, enviados, en_vista = [], 0, 0
+    for i, nombre in enumerate(nombres):
+        periodos, valores = indice.serie(nombre, inicio, fin)
+        if zoom is not None:
+            visibles = ventana(periodos, *zoom)
+            periodos, valores = periodos[visibles], valores[visibles]
+        elegidos = lttb(periodos, valores, umbral)
+        enviados, en_vista = enviados + len(elegidos), en_vista + len(periodos)
+        trazas.append({
+            'type': 'scatter', 'mode': 'lines', 'name': 'Total' if nombre is None else str(nombre),
+            'x': fechas_periodos(periodos[elegidos]), 'y': valores[elegidos],
+            'line': {'color': color_primario, 'width': 3} if nombre is None else {'color': colores[i % len(colores)]},
+            'hovertemplate': plantilla_hover('MES', 'PRODUCCION FISCALIZADA', None if nombre is None else ('CAMPO_LIMPIO', nombre))
+        })
+    if enviados < en_vista:
+        detalle = f"{enviados:,} of {en_vista:,} monthly points (LTTB) - zoom in for full resolution"
+    else:
+        detalle = f"All {en_vista:,} monthly points"
+    return trazas, f"<span style='font-size:12px'>{detalle}</span>"
+
+TITULOS_MENSUAL = {'mensual-total': 'Monthly Production - All Fields', 'mensual-por-campo': 'Monthly Production by Field'}
+
+def figura_serie_mensual(grafica, indice, campos, inicio, fin):
+    """Figura mensual completa con la vista inicial (sin zoom y con el ancho por defecto)"""
+    trazas, detalle = series_mensuales(indice, campos, inicio, fin, ANCHO_INICIAL_MENSUAL, None)
+    return go.Figure(data=trazas, layout=dict(
+        title=f"{TITULOS_MENSUAL[grafica]}<br>{detalle}",
+        xaxis=dict(type='date', title='Month', hoverformat='%Y-%m'),
+        yaxis=dict(title='Fiscalized Production', tickformat=',.0f'),
+        showlegend=campos is not None, legend_title_text='CAMPO_LIMPIO',
+        uirevision=revision_mensual(inicio, fin)
+    ))
+
+def patch_serie_mensual(grafica, indice, campos, inicio, fin, ancho, zoom):
+    """Solo las trazas, el subtítulo y la revisión de una gráfica mensual para otra vista"""
+    trazas, detalle = series_mensuales(indice, campos, inicio, fin, ancho, zoom)
+    fig = Patch()
+    fig['data'] = trazas
+    fig['layout']['title']['text'] = f"{TITULOS_MENSUAL[grafica]}<br>{detalle}"
+    fig['layout']['uirevision'] = revision_mensual(inicio, fin)
+    return fig
+
+def crear_tab_mensual(indice, inicio, fin):
+    """Create monthly tab content"""
+    
+    if indice.filas(inicio, fin).empty:
+        return [html.P("No data available for the selected range", style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
+    
+    contenido = [
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='mensual-total', figure=figura_serie_mensual('mensual-total', indice, None, inicio, fin),
+                          style={'height': '450px'}),
+                dcc.Store(id='mensual-total-vista')
+            ], width=12)
+        ], className="mb-4")
+    ]
+    if indice.entidad is None:
+        # Resúmenes anteriores a Mensual_Por_Campo: solo hay total mensual
+        return contenido + [html.P("Monthly production by field is not available: run the ETL again to generate Mensual_Por_Campo",
+                                   style={'color': color_texto, 'fontSize': '16px', 'textAlign': 'center'})]
+    
+    # Campos del selector, de mayor a menor producción en todos los años
+    opciones = indice.totales(int(indice.anios[0]), int(indice.anios[-1])).sort_values(ascending=False, kind='stable').index
+    campos = campos_mensual_iniciales(indice, inicio, fin)
+    return contenido + [
+        dbc.Row([
+            dbc.Col([
+                html.Label("Fields:", style={'fontWeight': 'bold', 'color': color_texto, 'fontSize': '16px', 'marginBottom': '10px'}),
+                dcc.Dropdown(id='mensual-campos', options=[{'label': str(c), 'value': str(c)} for c in opciones],
+                             value=campos, multi=True)
+            ], width=12)
+        ], className="mb-3"),
+        
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='mensual-por-campo', figure=figura_serie_mensual('mensual-por-campo', indice, campos, inicio, fin),
+                          style={'height': '500px'}),
+                dcc.Store(id='mensual-por-campo-vista')
+            ], width=12)
+        ])
+    ]
+
+# Modo cliente: salidas que recalcula assets/filtro_cliente.js (en el orden en que las
+# devuelve cada función) y figuras que necesita leer para cambiarles solo los datos
+CLIENTE_POR_PESTANA = {
+    'general': (SALIDAS_GENERAL, [State('general-timeline', 'figure'), State('general-barras', 'figure'),
+                                  State('general-variacion', 'figure')]),
+    'campo': ([('campo-top', 'figure')], [State('campo-top', 'figure')]),
+    'cuenca': ([('cuenca-total', 'figure')], [State('cuenca-total', 'figure')]),
+    'departamento': (SALIDAS_DEPARTAMENTO[:6] + [('dept-ranking', 'figure')], [State('dept-ranking', 'figure')]),
+}
+SALIDAS_CLIENTE = {salida for salidas, _ in CLIENTE_POR_PESTANA.values() for salida in salidas}
+
+# Callbacks del filtro de años de cada pestaña
+registrar_actualizacion('general-componentes', 'tab-general', SALIDAS_GENERAL, componentes_tab_general)
+registrar_actualizacion('campo-componentes', 'tab-campo', SALIDAS_CAMPO, componentes_tab_campo)
+registrar_actualizacion('cuenca-componentes', 'tab-cuenca', SALIDAS_CUENCA, componentes_tab_cuenca)
+registrar_actualizacion('departamento-componentes', 'tab-departamento', SALIDAS_DEPARTAMENTO, componentes_tab_departamento)
+
+def actualizar_serie_mensual(grafica, campos, vista, year_range):
+    """Patch de una gráfica mensual para el rango y la vista del navegador, desde la caché de vistas"""
+    version = datos.actual()
+    inicio, fin = int(year_range[0]), int(year_range[1])
+    indice = indices_medidos(version.datos)[INDICE_PESTANA['tab-mensual']]
+    if indice.filas(inicio, fin).empty:
+        # render_content reemplaza la pestaña por el aviso de rango sin datos
+        raise PreventUpdate
+    if grafica == 'mensual-por-campo' and campos is None:
+        # Pedido sin valor del selector: los campos con que se abre la pestaña
+        campos = campos_mensual_iniciales(indice, inicio, fin)
+    ancho, zoom = leer_vista(vista, inicio, fin)
+    clave = (grafica, None if campos is None else tuple(campos), inicio, fin, ancho, zoom, version.firma)
+    return cache_vistas.obtener(clave, lambda: patch_serie_mensual(grafica, indice, campos, inicio, fin, ancho, zoom))
+
+# Callbacks de la vista mensual: el filtro de años, el selector de campos y el ancho
+# o zoom de cada gráfica (el store <gráfica>-vista lo llena el navegador)
+@app.callback(Output('mensual-total', 'figure'),
+              [Input('mensual-total-vista', 'data'),
+               Input('year-slider', 'value')],
+              prevent_initial_call=True)
+@medir_callback
+def actualizar_mensual_total(vista, year_range):
+    return actualizar_serie_mensual('mensual-total', None, vista, year_range)
+
+@app.callback(Output('mensual-por-campo', 'figure'),
+              [Input('mensual-por-campo-vista', 'data'),
+               Input('mensual-campos', 'value'),
+               Input('year-slider', 'value')],
+              prevent_initial_call=True)
+@medir_callback
+def actualizar_mensual_campos(vista, campos, year_range):
+    return actualizar_serie_mensual('mensual-por-campo', campos, vista, year_range)
+
+for grafica in TITULOS_MENSUAL:
+    app.clientside_callback(ClientsideFunction('mensual_gas', 'vista'),
+                            Output(f'{grafica}-vista', 'data'),
+                            Input(grafica, 'relayoutData'),
+                            [State(grafica, 'id'), State(f'{grafica}-vista', 'data')],
+                            prevent_initial_call=True)
+
+_datos_cliente = {}
+
+def datos_cliente(version):
+    """Arreglos de los índices y estilos que usa el filtro en el navegador, armados una vez por versión"""
+    if version.firma not in _datos_cliente:
+        indice_anual, indice_cuenca, indice_campo, indice_departamento, indice_mensual = version.datos
+        _datos_cliente.clear()
+        _datos_cliente[version.firma] = {
+            'general': indice_anual.como_columnas(),
+            'campo': indice_campo.como_columnas(),
+            'cuenca': indice_cuenca.como_columnas(),
+            'departamento': indice_departamento.como_columnas(),
+            # Para la vista mensual el navegador solo necesita saber qué años tienen datos
+            'mensual': {'anios': indice_mensual.anios.tolist()},
+            'estilos_variacion': {'positiva': estilos_variacion(0), 'negativa': estilos_variacion(-1)},
+            'colores_ranking': colores_ranking(10),
+        }
+    return _datos_cliente[version.firma]
+
+if FILTRO_CLIENTE:
+    for funcion, (salidas, figuras) in CLIENTE_POR_PESTANA.items():
+        app.clientside_callback(ClientsideFunction('filtro_gas', funcion),
+                                [Output(*salida) for salida in salidas],
+                                Input('year-slider', 'value'),
+                                [State('datos-cliente', 'data'), *figuras],
+                                prevent_initial_call=True)
+    app.clientside_callback(ClientsideFunction('filtro_gas', 'cambio_vacio'),
+                            Output('cambio-vacio', 'data'),
+                            Input('year-slider', 'value'),
+                            [State('tabs', 'value'), State('datos-cliente', 'data'), State('tab-vacia', 'data')],
+                            prevent_initial_call=True)
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 8052))  # Cambio de puerto para evitar caché
@@ -0,0 +1,86 @@
+import glob
+import os
+import sys
+
+import pytest
+
+DIR_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Los módulos de DataGas se importan entre sí por nombre, como cuando se corre el ETL
+sys.path[:0] = [DIR_REPO, os.path.join(DIR_REPO, 'DataGas')]
+
+# Libros reales de los que se aprende el perfil del generador (uno viejo y uno reciente)
+LIBROS_PERFIL = ['Produccion_Fiscalizada_Gas_2013.xlsx', 'Produccion_Fiscalizada_Gas_2024.xlsx']
+
+
+@pytest.fixture(scope='session')
+def perfil_sintetico(tmp_path_factory):
+	"""Perfil del generador aprendido de LIBROS_PERFIL"""
+	from generador_gas import aprender_perfil
+
+	faltantes = [nombre for nombre in LIBROS_PERFIL if not os.path.exists(os.path.join(DIR_REPO, nombre))]
+	if faltantes:
+		pytest.skip(f"Faltan los libros de referencia: {', '.join(faltantes)}")
+	reales = tmp_path_factory.mktemp('reales')
+	for nombre in LIBROS_PERFIL + ['produccion_gas_resumenes.xlsx']:
+		if os.path.exists(os.path.join(DIR_REPO, nombre)):
+			os.symlink(os.path.join(DIR_REPO, nombre), reales / nombre)
+	return aprender_perfil(str(reales))
+
+
+@pytest.fixture(scope='session')
+def carpeta_sintetica(tmp_path_factory, perfil_sintetico):
+	"""Carpeta con tres años de libros sintéticos pequeños y su cuencas_campos_gas.xlsx"""
+	from generador_gas import escribir_libros, generar_hechos
+
+	hechos, campos = generar_hechos(perfil_sintetico, escala=0.05, anios=3, semilla=1)
+	destino = tmp_path_factory.mktemp('sinteticos')
+	escribir_libros(perfil_sintetico, hechos, campos, str(destino))
+	return destino
+
+
+@pytest.fixture(scope='session')
+def archivos_sinteticos(carpeta_sintetica):
+	return sorted(glob.glob(str(carpeta_sintetica / 'Produccion_Fiscalizada_Gas_*.xlsx')))
+
+
+@pytest.fixture(scope='session')
+def hechos_sinteticos(carpeta_sintetica, archivos_sinteticos):
+	"""Tabla de hechos del ETL (normalizada y con CUENCA) de los libros sintéticos"""
+	from AUTOMATIZACION_GAS import asignar_cuencas, normalizar
+	from lectura_gas import leer_archivos
+
+	df_all = normalizar(leer_archivos(archivos_sinteticos))
+	_, df_merge = asignar_cuencas(df_all, str(carpeta_sintetica / 'cuencas_campos_gas.xlsx'))
+	return df_merge
+
+
+@pytest.fixture(scope='session')
+def salida_etl(carpeta_sintetica, tmp_path_factory):
+	"""Carpeta con los reportes, el almacén Parquet y el caché incremental del ETL sobre los libros sintéticos"""
+	from AUTOMATIZACION_GAS import main
+
+	salida = tmp_path_factory.mktemp('etl')
+	main(['--entrada', str(carpeta_sintetica), '--salida', str(salida),
+		'--cuencas', str(carpeta_sintetica / 'cuencas_campos_gas.xlsx')])
+	return salida
+
+
+@pytest.fixture(scope='session')
+def tablero(salida_etl):
+	"""Módulo del dashboard cargado con la salida del ETL, sin recarga en segundo plano ni caché de vistas"""
+	anterior = os.getcwd()
+	entorno = {'GAS_INTERVALO_RECARGA': '0', 'GAS_CACHE_VISTAS_MB': '0'}
+	guardado = {clave: os.environ.get(clave) for clave in entorno}
+	os.environ.update(entorno)
+	# El dashboard busca produccion_gas_resumenes.xlsx en la carpeta actual
+	os.chdir(salida_etl)
+	try:
+		import dashboard_gas_completo
+		yield dashboard_gas_completo
+	finally:
+		os.chdir(anterior)
+		for clave, valor in guardado.items():
+			if valor is None:
+				os.environ.pop(clave, None)
+			else:
+				os.environ[clave] = valor
@@ -0,0 +1,16 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from agregacion_gas import NIVELES_RESUMEN, agregar_niveles
+from esquema_gas import COLUMNAS_METRICAS
+
+
+@pytest.mark.parametrize('nombre', list(NIVELES_RESUMEN))
+def test_agregar_niveles_igual_a_groupby(hechos_sinteticos, nombre):
+	columnas = NIVELES_RESUMEN[nombre]
+	metricas = [m for m in COLUMNAS_METRICAS if pd.api.types.is_numeric_dtype(hechos_sinteticos[m])]
+	esperado = hechos_sinteticos.groupby(columnas, as_index=False, observed=True)[metricas].sum()
+	resultado = agregar_niveles(hechos_sinteticos)[nombre]
+	assert len(resultado) > 0
+	assert_frame_equal(resultado, esperado, check_dtype=False, check_categorical=False)
@@ -0,0 +1,45 @@
+import shutil
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from almacen_gas import DIR_ALMACEN, TABLAS, almacen_completo, cargar_tabla, guardar_almacen
+from esquema_gas import COLUMNAS_METRICAS
+from reportes_gas import leer_sumatoria
+
+pytest.importorskip('pyarrow')
+
+
+def test_guardar_y_cargar_tablas_con_el_esquema(hechos_sinteticos, tmp_path):
+	dir_almacen = guardar_almacen({'Hechos': hechos_sinteticos.assign(SOBRANTE=1)}, str(tmp_path))
+	assert almacen_completo(dir_almacen, ['Hechos']) and not almacen_completo(dir_almacen, ['Totales_Anuales'])
+	hechos = cargar_tabla(dir_almacen, 'Hechos')
+	assert list(hechos.columns) == TABLAS['Hechos'] + COLUMNAS_METRICAS
+	assert_frame_equal(hechos, hechos_sinteticos[list(hechos.columns)], check_categorical=False)
+
+
+def limpios_sin_indices(tablero, ruta_excel):
+	return tablero.limpiar_datos(*tablero.cargar_datos(str(ruta_excel)))
+
+
+def test_dashboard_igual_desde_parquet_que_desde_excel(tablero, salida_etl, tmp_path):
+	# Solo los libros de Excel, sin el almacén Parquet al lado
+	shutil.copy2(salida_etl / 'produccion_gas_resumenes.xlsx', tmp_path / 'produccion_gas_resumenes.xlsx')
+	assert (salida_etl / DIR_ALMACEN).is_dir()
+	desde_parquet = limpios_sin_indices(tablero, salida_etl / 'produccion_gas_resumenes.xlsx')
+	desde_excel = limpios_sin_indices(tablero, tmp_path / 'produccion_gas_resumenes.xlsx')
+	for a, b in zip(desde_parquet, desde_excel):
+		a = a.reset_index(drop=True)
+		b = b.reset_index(drop=True)[list(a.columns)]
+		assert_frame_equal(a, b, check_dtype=False, check_categorical=False, check_exact=False, rtol=1e-9)
+
+
+def test_sumatoria_con_el_nombre_de_hoja_anterior(tmp_path):
+	sumatoria = pd.DataFrame({'AÑO': [2013], 'CAMPO_LIMPIO': ['APIAY'], 'PRODUCCION FISCALIZADA': [1.5]})
+	for hoja in ['Sumatoria_Anual', 'Sumatoria_Anual_Producción_Gas']:
+		ruta = tmp_path / f'{hoja}.xlsx'
+		with pd.ExcelWriter(ruta) as libro:
+			pd.DataFrame({'x': [1]}).to_excel(libro, sheet_name='Totales_Anuales', index=False)
+			sumatoria.to_excel(libro, sheet_name=hoja, index=False)
+		assert_frame_equal(leer_sumatoria(ruta), sumatoria)
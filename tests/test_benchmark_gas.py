@@ -0,0 +1,35 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from agregacion_gas import agregar_niveles
+from benchmark_gas import comparar, escalar, mensual_por_campo, parsear_argumentos
+
+
+def corrida(**medianas):
+	return {'resultados': {nombre: {'mediana': mediana} for nombre, mediana in medianas.items()}}
+
+
+def test_comparar_marca_solo_las_regresiones_por_encima_del_umbral_y_del_minimo():
+	referencia = corrida(lento=0.100, ruido=0.001, igual=0.050, nuevo_antes=0.1)
+	actual = corrida(lento=0.150, ruido=0.003, igual=0.051, solo_ahora=0.2)
+	tabla, regresiones = comparar(actual, referencia, umbral=0.2, minimo_ms=5)
+	assert regresiones == ['lento']
+	assert 'solo_ahora' not in tabla
+
+
+def test_escalar_repite_las_filas_con_otro_nombre():
+	df = pd.DataFrame({'CAMPO': pd.Categorical(['A', 'B']), 'PRODUCCION FISCALIZADA': [1.0, 2.0]})
+	escalado = escalar(df, 'CAMPO', 3)
+	assert escalado['CAMPO'].tolist() == ['A', 'B', 'A #1', 'B #1', 'A #2', 'B #2']
+	assert isinstance(escalado['CAMPO'].dtype, pd.CategoricalDtype)
+	assert escalado['PRODUCCION FISCALIZADA'].sum() == 9.0
+	assert escalar(df, 'CAMPO', 1) is df
+
+
+def test_mensual_por_campo_desde_los_libros(carpeta_sintetica, hechos_sinteticos, tmp_path):
+	args = parsear_argumentos(['--entrada', str(carpeta_sintetica), '--cuencas', str(carpeta_sintetica / 'cuencas_campos_gas.xlsx')])
+	resultado = mensual_por_campo(args, str(tmp_path))
+	esperado = agregar_niveles(hechos_sinteticos)['Mensual_Por_Campo']
+	assert len(resultado) > 0
+	assert_frame_equal(resultado[esperado.columns], esperado, check_dtype=False, check_categorical=False)
+	assert mensual_por_campo(parsear_argumentos(['--entrada', str(tmp_path)]), str(tmp_path)) is None
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from dash import Patch, dcc, html
+
+from cache_vistas_gas import CacheVistas, a_json
+
+
+def vista():
+	"""Contenido de una pestaña: tarjetas y una figura con arreglos de numpy, fechas y categorías"""
+	fechas = pd.date_range('2013-01-01', periods=24, freq='MS')
+	figura = go.Figure(go.Scatter(x=fechas, y=np.linspace(0, 1, 24) ** 2, name='Total'))
+	figura.add_bar(x=pd.Categorical(['A', 'B', 'C']), y=np.array([1.5, np.nan, 3], dtype=np.float64))
+	return html.Div([
+		html.H4('1.234 Mpcpd', className='card-title'),
+		dcc.Graph(id='grafica', figure=figura),
+	])
+
+
+def parche():
+	p = Patch()
+	p['data'][0]['y'] = np.arange(3, dtype=np.int16)
+	return p
+
+
+def test_acierto_igual_a_fallo():
+	for construir in (vista, parche):
+		cache = CacheVistas()
+		fallo = cache.obtener(('tab-general', 2013, 2024, 1), construir)
+		acierto = cache.obtener(('tab-general', 2013, 2024, 1), construir)
+		assert (cache.fallos, cache.aciertos) == (1, 1)
+		assert a_json(acierto) == a_json(fallo)
+		assert acierto == json.loads(a_json(fallo))
+
+
+def test_acierto_de_disco_igual_a_fallo(tmp_path):
+	fallo = CacheVistas(directorio=str(tmp_path)).obtener(('tab-campo', 2015, 2016, 1), vista)
+	otro_worker = CacheVistas(directorio=str(tmp_path))
+	acierto = otro_worker.obtener(('tab-campo', 2015, 2016, 1), vista)
+	assert (otro_worker.fallos, otro_worker.aciertos_disco) == (0, 1)
+	assert a_json(acierto) == a_json(fallo)
+
+
+def test_clave_distinta_no_comparte_vista():
+	cache = CacheVistas()
+	cache.obtener(('tab-general', 2013, 2024, 1), vista)
+	assert cache.obtener(('tab-general', 2013, 2024, 2), lambda: 'nueva') == 'nueva'
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_series_equal
+
+from campos_gas import MAPEO_CAMPOS, MAPEO_CUENCAS_EXTRA, SIN_CUENCA, CampoResolver, normalizar_campo
+
+
+def resolver_fila_a_fila(df_all, df_cuencas):
+	"""CAMPO_LIMPIO y CUENCA como los calculaba el ETL antes de CampoResolver (merge y apply por fila)"""
+	df_all = df_all.copy()
+	df_all['CAMPO_LIMPIO'] = df_all['CAMPO'].replace(MAPEO_CAMPOS)
+	df_all['CAMPO_LIMPIO'] = df_all['CAMPO_LIMPIO'].fillna(df_all['CAMPO'])
+	df_merge = pd.merge(df_all, df_cuencas, how='left', left_on='CAMPO_LIMPIO', right_on='CAMPO')
+	df_merge['CUENCA'] = df_merge['CUENCA'].fillna(SIN_CUENCA)
+	extra = {normalizar_campo(k): v for k, v in MAPEO_CUENCAS_EXTRA.items()}
+	df_merge['CUENCA'] = df_merge.apply(
+		lambda row: extra.get(normalizar_campo(row['CAMPO_LIMPIO']), row['CUENCA'])
+		if row['CUENCA'] == SIN_CUENCA else row['CUENCA'], axis=1)
+	return df_merge['CAMPO_LIMPIO'], df_merge['CUENCA']
+
+
+def test_igual_al_merge_y_apply_por_fila():
+	campos = ['Alligator', 'APIAY', 'CHÁCHARO', 'Tenax', 'dividivi ', 'Gigante Caballos', 'SIN EXCEL',
+		'LA LOMA', 'CUSIANA', np.nan, 'CORAZON WEST 4', 'Unificado Río Ceibas', 'APIAY']
+	df_all = pd.DataFrame({'CAMPO': campos, 'PRODUCCION FISCALIZADA': np.arange(len(campos), dtype=float)})
+	df_cuencas = pd.DataFrame({
+		'CAMPO': ['APIAY', 'CHACHARO', 'LA LOMA ynf', 'CUSIANA', 'RIO CEIBAS', 'CORAZON WEST 4'],
+		'CUENCA': ['LLAO', 'VMM', 'CES', SIN_CUENCA, np.nan, 'VIM'],
+	})
+	limpio, cuenca = resolver_fila_a_fila(df_all, df_cuencas)
+	resolver = CampoResolver(df_cuencas)
+	nuevo_limpio = resolver.limpiar(df_all['CAMPO'])
+	assert_series_equal(nuevo_limpio, limpio, check_names=False)
+	assert_series_equal(resolver.cuencas(nuevo_limpio), cuenca, check_names=False)
+
+
+def test_sin_excel_de_cuencas():
+	resolver = CampoResolver()
+	cuencas = resolver.cuencas(pd.Series(['TENAX', 'APIAY', np.nan]))
+	assert cuencas.tolist() == ['VSM', SIN_CUENCA, SIN_CUENCA]
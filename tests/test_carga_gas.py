@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+import carga_gas
+from carga_gas import Tablero, Usuario, parsear_argumentos, resumir, separar_salidas
+
+
+def test_separar_salidas():
+	assert separar_salidas('..tab-content.children...tab-vacia.data..') == [('tab-content', 'children'), ('tab-vacia', 'data')]
+	assert separar_salidas('mensual-total.figure') == [('mensual-total', 'figure')]
+
+
+@pytest.fixture
+def conexion_local(tablero, monkeypatch):
+	"""Conexion que manda los pedidos al servidor de Flask del tablero sin abrir sockets"""
+	cliente = tablero.server.test_client()
+
+	class ConexionLocal:
+		def __init__(self, url, timeout):
+			pass
+
+		def pedir(self, metodo, ruta, cuerpo=None):
+			respuesta = cliente.open(ruta, method=metodo, data=cuerpo, content_type='application/json')
+			return respuesta.status_code, respuesta.get_data()
+
+		def cerrar(self):
+			pass
+
+	monkeypatch.setattr(carga_gas, 'Conexion', ConexionLocal)
+
+
+def test_pedidos_aceptados_por_el_tablero(tablero, conexion_local):
+	args = parsear_argumentos(['--mezcla', 'pestana=1,filtro=1'])
+	destino = Tablero(args.url)
+	assert destino.anios == tuple(int(a) for a in (tablero.datos.actual().datos[0].anios[[0, -1]]))
+	assert set(destino.filtros) >= {'tab-general', 'tab-campo', 'tab-cuenca', 'tab-departamento'}
+	registros = []
+	usuario = Usuario(destino, args, registros, random.Random(3))
+	usuario.armar_pestana(('tabs', 'value'))
+	for _ in range(30):
+		usuario.accion()
+	resumen = resumir(registros, 1.0)
+	assert resumen['total']['errores'] == 0
+	assert {'pestana', 'filtro'} <= {etiqueta.split('/')[1] for etiqueta in resumen if etiqueta != 'total'}
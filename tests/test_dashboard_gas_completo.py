@@ -0,0 +1,249 @@
+import copy
+import json
+import os
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.io.json import to_json_plotly
+
+from conftest import DIR_REPO
+from indice_gas import IndiceAnual
+
+
+@pytest.fixture
+def cliente(tablero):
+	return tablero.server.test_client()
+
+
+def pedido_pestana(valor_pestana, rango):
+	"""Cuerpo del pedido de render_content al cambiar de pestaña, como lo manda el navegador"""
+	return {
+		'output': '..tab-content.children...tab-vacia.data..',
+		'outputs': [{'id': 'tab-content', 'property': 'children'}, {'id': 'tab-vacia', 'property': 'data'}],
+		'inputs': [{'id': 'tabs', 'property': 'value', 'value': valor_pestana},
+			{'id': 'year-slider', 'property': 'value', 'value': rango}],
+		'state': [{'id': 'year-slider', 'property': 'value', 'value': rango},
+			{'id': 'tab-vacia', 'property': 'data', 'value': False}],
+		'changedPropIds': ['tabs.value'],
+	}
+
+
+def test_etiqueta_de_pestana_desconocida(tablero):
+	assert tablero.etiqueta_respuesta(pedido_pestana('tab-campo', [2013, 2014])) == 'campo/pestana'
+	assert tablero.etiqueta_respuesta(pedido_pestana('tab-x"} 1\nevil_metric{a="b', [2013, 2014])) == 'otra/pestana'
+	assert tablero.etiqueta_respuesta({'output': 'raro-kpi.children'}) == 'otra/filtro'
+
+
+def test_rango_llevado_a_los_anios_de_los_datos(tablero):
+	anios = tablero.datos.actual().datos[0].anios
+	assert tablero.rango_pedido(pedido_pestana('tab-general', [1, 10 ** 9])) == (str(anios[0]), str(anios[-1]))
+	assert tablero.rango_pedido(pedido_pestana('tab-general', ['x', 2014])) is None
+	assert tablero.rango_pedido({'inputs': 'no es una lista'}) is None
+
+
+def test_pedidos_con_error_no_dejan_series(tablero, cliente):
+	respuesta = cliente.post('/_dash-update-component', data=json.dumps(pedido_pestana('tab-x"} 1\nevil_metric{a="b', [1, 10 ** 9])),
+		content_type='application/json')
+	assert respuesta.status_code >= 400
+	texto = cliente.get('/metrics').get_data(as_text=True)
+	assert 'evil_metric' not in texto
+	assert 'pestana="otra"' not in texto
+	assert 'inicio="1"' not in texto
+
+
+def test_pedido_valido_queda_en_metricas(tablero, cliente):
+	anios = tablero.datos.actual().datos[0].anios
+	respuesta = cliente.post('/_dash-update-component', data=json.dumps(pedido_pestana('tab-general', [1, 10 ** 9])),
+		content_type='application/json')
+	assert respuesta.status_code == 200
+	texto = cliente.get('/metrics').get_data(as_text=True)
+	assert f'gas_rango_pedidos_total{{pestana="general",inicio="{anios[0]}",fin="{anios[-1]}"}}' in texto
+	assert 'gas_callback_total_segundos_count{pestana="general",tipo="pestana"}' in texto
+
+
+def json_plotly(contenido):
+	return json.loads(to_json_plotly(contenido))
+
+
+def por_id(arbol, props=None):
+	"""props de cada componente con id de un árbol de componentes ya pasado a JSON"""
+	props = {} if props is None else props
+	if isinstance(arbol, dict):
+		if 'props' in arbol and 'type' in arbol:
+			if 'id' in arbol['props']:
+				props[arbol['props']['id']] = arbol['props']
+			arbol = arbol['props']
+		for valor in arbol.values():
+			por_id(valor, props)
+	elif isinstance(arbol, list):
+		for valor in arbol:
+			por_id(valor, props)
+	return props
+
+
+def aplicar_patch(figura, patch):
+	figura = copy.deepcopy(figura)
+	for operacion in patch['operations']:
+		assert operacion['operation'] == 'Assign', operacion
+		destino = figura
+		for clave in operacion['location'][:-1]:
+			destino = destino.setdefault(clave, {}) if isinstance(destino, dict) else destino[clave]
+		destino[operacion['location'][-1]] = operacion['params']['value']
+	return figura
+
+
+def assert_casi_igual(esperado, resultado, ruta=''):
+	if isinstance(esperado, float) or isinstance(resultado, float):
+		assert resultado == pytest.approx(esperado, rel=1e-9, abs=1e-6), ruta
+	elif isinstance(esperado, dict):
+		assert esperado.keys() == resultado.keys(), ruta
+		for clave in esperado:
+			assert_casi_igual(esperado[clave], resultado[clave], f'{ruta}.{clave}')
+	elif isinstance(esperado, list):
+		assert len(esperado) == len(resultado), ruta
+		for i, (a, b) in enumerate(zip(esperado, resultado)):
+			assert_casi_igual(a, b, f'{ruta}[{i}]')
+	else:
+		assert esperado == resultado, ruta
+
+
+FUNCIONES_CLIENTE = {
+	'general': ('tab-general', 'componentes_tab_general', 'SALIDAS_GENERAL'),
+	'campo': ('tab-campo', 'componentes_tab_campo', 'SALIDAS_CAMPO'),
+	'cuenca': ('tab-cuenca', 'componentes_tab_cuenca', 'SALIDAS_CUENCA'),
+	'departamento': ('tab-departamento', 'componentes_tab_departamento', 'SALIDAS_DEPARTAMENTO'),
+}
+
+SCRIPT_CLIENTE = r'''
+global.window = {dash_clientside: {PreventUpdate: {}}};
+require(process.argv[1]);
+const entrada = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const salida = entrada.casos.map(c => window.dash_clientside.filtro_gas[c.funcion](c.rango, entrada.datos, ...c.figuras));
+process.stdout.write(JSON.stringify(salida));
+'''
+
+
+def filtro_cliente(datos, casos):
+	"""Salidas de assets/filtro_cliente.js para cada caso (funcion, rango, figuras), corriendo en node"""
+	if shutil.which('node') is None:
+		pytest.skip("node no está instalado")
+	ruta = os.path.join(DIR_REPO, 'assets', 'filtro_cliente.js')
+	proceso = subprocess.run(['node', '-e', SCRIPT_CLIENTE, ruta], input=json.dumps({'datos': datos, 'casos': casos}),
+		capture_output=True, text=True, check=True)
+	return json.loads(proceso.stdout)
+
+
+def casos_cliente(tablero, indices, funcion, rangos):
+	"""Casos del filtro en el navegador y lo que responde el servidor para el mismo cambio de rango"""
+	pestana, componentes, salidas = FUNCIONES_CLIENTE[funcion]
+	salidas_cliente, figuras = tablero.CLIENTE_POR_PESTANA[funcion]
+	casos, esperados = [], []
+	for anterior, nuevo in rangos:
+		props = por_id(json_plotly(tablero.crear_pestana(indices, pestana, *anterior)))
+		servidor = dict(zip(getattr(tablero, salidas), json_plotly(
+			getattr(tablero, componentes)(indices[tablero.INDICE_PESTANA[pestana]], *nuevo))))
+		esperado = []
+		for componente, propiedad in salidas_cliente:
+			valor = servidor[(componente, propiedad)]
+			if isinstance(valor, dict) and '__dash_patch_update' in valor:
+				valor = aplicar_patch(props[componente][propiedad], valor)
+			esperado.append(valor)
+		casos.append({'funcion': funcion, 'rango': list(nuevo),
+			'figuras': [props[f.component_id][f.component_property] for f in figuras]})
+		esperados.append(esperado)
+	return casos, esperados
+
+
+@pytest.mark.parametrize('funcion', list(FUNCIONES_CLIENTE))
+def test_filtro_cliente_igual_al_servidor(tablero, funcion):
+	version = tablero.datos.actual()
+	anios = [int(a) for a in version.datos[0].anios]
+	rangos = [((anios[0], anios[-1]), (anios[1], anios[1])), ((anios[1], anios[1]), (anios[0], anios[-1])),
+		((anios[0], anios[-1]), (anios[0], anios[-2]))]
+	casos, esperados = casos_cliente(tablero, version.datos, funcion, rangos)
+	for esperado, resultado in zip(esperados, filtro_cliente(json_plotly(tablero.datos_cliente(version)), casos)):
+		assert_casi_igual(esperado, resultado)
+
+
+def test_empates_en_el_mismo_orden_que_el_cliente(tablero):
+	"""Departamentos sin producción y empatados: el ranking del servidor y el del navegador coinciden"""
+	version = tablero.datos.actual()
+	nombres = [f'D{i:02d}' for i in range(32)]
+	df = pd.DataFrame({
+		'AÑO': np.repeat([2013, 2014], len(nombres)),
+		'DEPARTAMENTO': pd.Categorical(nombres * 2),
+		'PRODUCCION FISCALIZADA': [5.0 if n in ('D30', 'D31') else 0.0 for n in nombres] * 2,
+	})
+	datos = list(version.datos)
+	datos[tablero.INDICE_PESTANA['tab-departamento']] = IndiceAnual(df, 'DEPARTAMENTO')
+	empates = SimpleNamespace(firma=('empates', version.firma), datos=tuple(datos))
+	casos, esperados = casos_cliente(tablero, empates.datos, 'departamento', [((2013, 2014), (2014, 2014))])
+	ranking = esperados[0][-1]['data'][0]['y']
+	assert [nombre.split()[0] for nombre in ranking[:4]] == ['D30', 'D31', 'D00', 'D01']
+	(resultado,) = filtro_cliente(json_plotly(tablero.datos_cliente(empates)), casos)
+	assert_casi_igual(esperados[0], resultado)
+
+
+@pytest.mark.parametrize('funcion', list(FUNCIONES_CLIENTE))
+def test_componentes_igual_a_la_pestana_completa(tablero, funcion):
+	"""Aplicar lo que manda el filtro de años sobre la pestaña del rango anterior da la pestaña del rango nuevo"""
+	pestana, componentes, salidas = FUNCIONES_CLIENTE[funcion]
+	indices = tablero.datos.actual().datos
+	anios = [int(a) for a in indices[0].anios]
+	for anterior, nuevo in [((anios[0], anios[-1]), (anios[1], anios[1])), ((anios[1], anios[1]), (anios[0], anios[-2]))]:
+		previas = por_id(json_plotly(tablero.crear_pestana(indices, pestana, *anterior)))
+		completas = por_id(json_plotly(tablero.crear_pestana(indices, pestana, *nuevo)))
+		valores = json_plotly(getattr(tablero, componentes)(indices[tablero.INDICE_PESTANA[pestana]], *nuevo))
+		for (componente, propiedad), valor in zip(getattr(tablero, salidas), valores):
+			if isinstance(valor, dict) and '__dash_patch_update' in valor:
+				valor = aplicar_patch(previas[componente][propiedad], valor)
+			assert_casi_igual(completas[componente][propiedad], valor, f'{componente}.{propiedad}')
+
+
+def test_bytes_por_pestana_y_plantilla_compacta(tablero, cliente):
+	anios = [int(a) for a in tablero.datos.actual().datos[0].anios]
+	respuesta = cliente.post('/_dash-update-component', data=json.dumps(pedido_pestana('tab-cuenca', [anios[0], anios[-1]])),
+		content_type='application/json')
+	estado = cliente.get('/estado/respuestas').get_json()
+	assert estado['cuenca/pestana']['ultimo'] == len(respuesta.get_data())
+	# La plantilla de cada figura pesa mucho menos que la 'plotly' completa
+	_, cuencas_total = tablero.totales_cuencas(tablero.datos.actual().datos[1], anios[0], anios[-1])
+	figura = tablero.figura_cuencas_total(cuencas_total)
+	compacta = len(to_json_plotly(figura.layout.template))
+	assert compacta * 3 < len(to_json_plotly(tablero.pio.templates['plotly']))
+
+
+def test_multiples_en_una_figura(tablero):
+	filas = [pd.DataFrame({'AÑO': [2013, 2014], 'PRODUCCION FISCALIZADA': [float(i), float(i + 1)]}) for i in range(3)]
+	figura = tablero.figura_multiples(filas, ['A', 'B', 'C'])
+	assert [(t.xaxis, t.yaxis, list(t.y)) for t in figura.data] == [
+		('x', 'y', [0.0, 1.0]), ('x2', 'y2', [1.0, 2.0]), ('x3', 'y3', [2.0, 3.0])]
+	assert [a.text for a in figura.layout.annotations] == ['A', 'B', 'C']
+	# Dos columnas que no se cruzan y filas de arriba hacia abajo, con los años compartidos
+	assert figura.layout.xaxis.domain[1] < figura.layout.xaxis2.domain[0]
+	assert figura.layout.yaxis3.domain[1] < figura.layout.yaxis.domain[0]
+	assert figura.layout.xaxis2.matches == figura.layout.xaxis4.matches == 'x'
+
+
+def test_una_traza_por_cuenca(tablero):
+	indice = tablero.datos.actual().datos[tablero.INDICE_PESTANA['tab-cuenca']]
+	anios = [int(a) for a in indice.anios]
+	props = por_id(json_plotly(tablero.crear_tab_cuenca(indice, anios[0], anios[-1])))
+	cuencas = props['cuenca-total']['figure']['data'][0]['x']
+	individuales = props['cuenca-individuales']['figure']
+	assert len(individuales['data']) == len(cuencas)
+	assert {a['text'].split('<br>')[0] for a in individuales['layout']['annotations']} == {f'Evolution of {c}' for c in cuencas}
+
+
+def test_contorno_con_etag(tablero, cliente):
+	if tablero.GEOMETRIA_CONTORNO is None:
+		pytest.skip("no está el GeoJSON del contorno")
+	respuesta = cliente.get(tablero.URL_CONTORNO)
+	assert respuesta.status_code == 200 and respuesta.get_json()['type'] == 'FeatureCollection'
+	etag = respuesta.headers['ETag']
+	assert cliente.get(tablero.URL_CONTORNO, headers={'If-None-Match': etag}).status_code == 304
+	assert cliente.get(tablero.URL_CONTORNO, headers={'If-None-Match': '"otra"'}).status_code == 200
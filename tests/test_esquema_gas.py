@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esquema_gas import MESES, TIPO_MES, ErrorEsquema, aplicar_esquema
+
+
+def test_tipos_del_esquema():
+	df = pd.DataFrame({
+		'AÑO': ['2013', 2014.0],
+		'MES': [' Enero', 'diciembre'],
+		'CAMPO': ['APIAY', 'APIAY'],
+		'PRODUCCION FISCALIZADA': ['1.5', None],
+		'OTRA': [1, 2],
+	})
+	tipado = aplicar_esquema(df, ['AÑO', 'MES'])
+	assert tipado['AÑO'].dtype == np.int16
+	assert tipado['MES'].dtype == TIPO_MES
+	assert tipado['MES'].cat.codes.tolist() == [0, 11]
+	assert isinstance(tipado['CAMPO'].dtype, pd.CategoricalDtype)
+	assert tipado['PRODUCCION FISCALIZADA'].dtype == np.float64
+	assert tipado['PRODUCCION FISCALIZADA'].iloc[0] == 1.5 and np.isnan(tipado['PRODUCCION FISCALIZADA'].iloc[1])
+	assert tipado['OTRA'].dtype == df['OTRA'].dtype
+	# df no cambia
+	assert df['AÑO'].dtype == object
+
+
+def test_meses_ordenados_por_calendario():
+	meses = aplicar_esquema(pd.DataFrame({'MES': ['marzo', 'enero', 'febrero']}))['MES']
+	assert meses.sort_values().tolist() == ['enero', 'febrero', 'marzo']
+	assert len(MESES) == 12
+
+
+@pytest.mark.parametrize('df,requeridas,mensaje', [
+	(pd.DataFrame({'AÑO': [2013]}), ['AÑO', 'MES'], 'Faltan columnas'),
+	(pd.DataFrame({'AÑO': [2013, None]}), [], 'AÑO tiene 1'),
+	(pd.DataFrame({'AÑO': ['dos mil']}), [], 'AÑO tiene 1'),
+	(pd.DataFrame({'MES': ['enero', 'Brumario']}), [], 'brumario'),
+])
+def test_errores_del_esquema(df, requeridas, mensaje):
+	with pytest.raises(ErrorEsquema, match=mensaje):
+		aplicar_esquema(df, requeridas)
+
+
+def test_tabla_de_hechos_del_etl_con_el_esquema(hechos_sinteticos):
+	assert hechos_sinteticos['AÑO'].dtype == np.int16
+	assert hechos_sinteticos['MES'].dtype == TIPO_MES
+	for columna in ['CAMPO', 'CAMPO_LIMPIO', 'CUENCA', 'DEPARTAMENTO']:
+		assert isinstance(hechos_sinteticos[columna].dtype, pd.CategoricalDtype), columna
@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+
+from AUTOMATIZACION_GAS import parsear_argumentos
+from etapas_gas import RegistroEtapas
+
+
+def test_memoria_de_cada_etapa_sin_la_de_las_anteriores():
+	registro = RegistroEtapas({'escala': 1})
+	with registro.etapa('grande', filas_entrada=10) as etapa:
+		datos = np.ones(80 << 17)  # 80 MB
+		etapa.filas_salida = len(datos)
+	# datos sigue en memoria durante la etapa chica, pero no es de ella
+	with registro.etapa('chica') as etapa:
+		etapa.filas_salida = int(np.ones(1000).sum())
+	grande, chica = registro.etapas
+	assert grande.memoria_extra_mb >= 60
+	assert chica.memoria_extra_mb < 20
+	assert registro.memoria_pico_mb() >= grande.memoria_pico_mb
+	assert [linea.split()[0] for linea in registro.resumen().splitlines()] == ['ETAPA', 'grande', 'chica']
+	reporte = registro.como_dict()
+	assert reporte['parametros'] == {'escala': 1}
+	assert [e['filas_salida'] for e in reporte['etapas']] == [80 << 17, 1000]
+
+
+def test_argumentos_por_defecto_en_la_carpeta_de_entrada():
+	args = parsear_argumentos(['--entrada', 'libros', '--formatos', 'csv,parquet'])
+	assert args.salida == 'libros'
+	assert args.reporte.replace('\\', '/') == 'libros/reporte_etl_gas.json'
+	assert args.formatos == ['csv', 'parquet']
+
+
+def test_reporte_de_la_corrida_del_etl(salida_etl):
+	with open(salida_etl / 'reporte_etl_gas.json', encoding='utf-8') as f:
+		reporte = json.load(f)
+	etapas = {e['etapa']: e for e in reporte['etapas']}
+	assert list(etapas) == ['descubrir', 'leer', 'normalizar', 'cuencas', 'agregar', 'exportar']
+	assert etapas['descubrir']['filas_salida'] == 3
+	assert etapas['leer']['filas_salida'] == etapas['normalizar']['filas_entrada'] == etapas['cuencas']['filas_salida']
+	assert all(e['segundos'] >= 0 for e in etapas.values())
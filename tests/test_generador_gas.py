@@ -0,0 +1,30 @@
+import pytest
+from pandas.testing import assert_frame_equal
+
+from generador_gas import generar_hechos
+
+
+def test_misma_semilla_mismos_datos(perfil_sintetico):
+	hechos, campos = generar_hechos(perfil_sintetico, escala=0.05, anios=2, semilla=7)
+	otra_vez, campos_otra_vez = generar_hechos(perfil_sintetico, escala=0.05, anios=2, semilla=7)
+	assert_frame_equal(otra_vez, hechos)
+	assert_frame_equal(campos_otra_vez, campos)
+	distintos, _ = generar_hechos(perfil_sintetico, escala=0.05, anios=2, semilla=8)
+	assert not distintos.equals(hechos)
+
+
+def test_escala_y_anios(perfil_sintetico):
+	reales = len(perfil_sintetico['campos'])
+	hechos, campos = generar_hechos(perfil_sintetico, escala=2, anios=4, anio_inicial=2030, semilla=0)
+	assert len(campos) == 2 * reales and campos['CAMPO'].is_unique
+	# Las copias solo agregan campos; departamentos y cuencas siguen siendo los reales
+	assert set(campos['DEPARTAMENTO']) == {campo[3] for campo in perfil_sintetico['campos']}
+	assert set(campos['CUENCA']) == {campo[5] for campo in perfil_sintetico['campos']}
+	assert sorted(hechos['AÑO'].unique()) == [2030, 2031, 2032, 2033]
+	assert hechos['CAMPO'].isin(campos['CAMPO']).all()
+	assert (hechos['PRODUCCION FISCALIZADA'] >= 0).all()
+
+
+def test_anios_despues_de_2099(perfil_sintetico):
+	with pytest.raises(ValueError, match='2099'):
+		generar_hechos(perfil_sintetico, escala=0.05, anios=5, anio_inicial=2097)
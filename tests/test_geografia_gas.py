@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+
+from geografia_gas import clave_departamento, preparar_geojson, ubicar_departamentos
+
+
+def escribir_geojson(ruta, departamentos):
+	"""GeoJSON con un polígono por (nombre, anillos) y propiedades que el mapa no usa"""
+	geojson = {'type': 'FeatureCollection', 'features': [
+		{'type': 'Feature', 'properties': {'NOMBRE_DPT': nombre, 'AREA': 1.0}, 'geometry': {'type': 'Polygon', 'coordinates': anillos}}
+		for nombre, anillos in departamentos]}
+	ruta.write_text(json.dumps(geojson), encoding='utf-8')
+	return str(ruta)
+
+
+def test_claves_sin_tildes_y_con_alias():
+	assert clave_departamento('  Boyacá ') == 'BOYACA'
+	assert clave_departamento('La Guajira') == clave_departamento('GUAJIRA') == 'GUAJIRA'
+	assert clave_departamento('Bogotá, D.C.') == 'BOGOTA'
+
+
+def test_preparar_geojson(tmp_path):
+	ruta = escribir_geojson(tmp_path / 'departamentos.geojson', [
+		('Nariño', [[[-78.00011, 1.0], [-78.00012, 1.0], [-77.0, 1.0], [-77.0, 2.0], [-78.0, 2.0], [-78.0, 1.0]]]),
+		# Tan pequeño que al redondear no queda anillo y se descarta
+		('Punto', [[[-70.0001, 1.0], [-70.0002, 1.0001], [-70.0001, 1.0002], [-70.0001, 1.0]]]),
+	])
+	geojson, centros = preparar_geojson(ruta)
+	(feature,) = geojson['features']
+	assert feature == {'type': 'Feature', 'id': 'NARINO', 'properties': {},
+		'geometry': {'type': 'MultiPolygon', 'coordinates': [[[[-78.0, 1.0], [-77.0, 1.0], [-77.0, 2.0], [-78.0, 2.0], [-78.0, 1.0]]]]}}
+	assert centros.to_dict('records') == [{'CLAVE': 'NARINO', 'lat': 1.5, 'lon': -77.5}]
+
+
+def test_ubicar_departamentos(tmp_path):
+	ruta = escribir_geojson(tmp_path / 'departamentos.geojson',
+		[('Territorio Nuevo', [[[-70, 1], [-68, 1], [-68, 3], [-70, 3], [-70, 1]]])])
+	_, centros = preparar_geojson(ruta)
+	claves, lat, lon = ubicar_departamentos(['Meta', 'LA GUAJIRA', 'Territorio Nuevo', 'Sin Mapa', 'Otro Sin Mapa'], centros)
+	assert list(claves) == ['META', 'GUAJIRA', 'TERRITORIO NUEVO', 'SIN MAPA', 'OTRO SIN MAPA']
+	assert (lat[0], lon[0]) == (4.1420, -73.6266)
+	assert (lat[1], lon[1]) == (11.5444, -72.9072)
+	assert (lat[2], lon[2]) == (2.0, -69.0)
+	# Los que no tienen coordenadas quedan cerca del centro del país sin superponerse
+	assert not np.isnan(lat).any() and (lat[3], lon[3]) != (lat[4], lon[4])
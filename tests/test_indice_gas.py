@@ -0,0 +1,50 @@
+import itertools
+
+import numpy as np
+import pytest
+from pandas.testing import assert_series_equal
+
+from agregacion_gas import agregar_niveles
+from indice_gas import DECIMALES, IndiceAnual
+
+VALOR = 'PRODUCCION FISCALIZADA'
+
+
+@pytest.fixture(scope='module')
+def resumenes(hechos_sinteticos):
+	return agregar_niveles(hechos_sinteticos)
+
+
+def rangos(anios):
+	"""Todos los rangos [inicio, fin] de años, más uno antes de los datos y uno que los cubre de sobra"""
+	anios = sorted(int(a) for a in anios)
+	return list(itertools.combinations_with_replacement(anios, 2)) + [(anios[0] - 3, anios[0] - 1), (anios[0] - 1, anios[-1] + 1)]
+
+
+@pytest.mark.parametrize('hoja,entidad', [
+	('Anual_Por_Campo', 'CAMPO_LIMPIO'),
+	('Anual_Por_Cuenca', 'CUENCA'),
+	('Anual_Detalle', 'DEPARTAMENTO'),
+])
+def test_totales_igual_a_filtrar_y_agrupar(resumenes, hoja, entidad):
+	df = resumenes[hoja]
+	indice = IndiceAnual(df, entidad)
+	for inicio, fin in rangos(df['AÑO'].unique()):
+		filas = df[(df['AÑO'] >= inicio) & (df['AÑO'] <= fin)]
+		esperado = filas.groupby(entidad, observed=True)[VALOR].sum().round(DECIMALES)
+		assert_series_equal(
+			indice.totales(inicio, fin), esperado,
+			check_exact=True, check_index_type=False, check_categorical=False, obj=f'{hoja} {inicio}-{fin}',
+		)
+		assert indice.total(inicio, fin) == round(float(filas[VALOR].sum()), DECIMALES)
+
+
+def test_por_anio_igual_a_agrupar_por_anio(resumenes):
+	df = resumenes['Totales_Anuales']
+	indice = IndiceAnual(df)
+	for inicio, fin in rangos(df['AÑO'].unique()):
+		filas = df[(df['AÑO'] >= inicio) & (df['AÑO'] <= fin)]
+		esperado = filas.groupby('AÑO')[VALOR].sum().round(DECIMALES)
+		anios, valores = indice.por_anio(inicio, fin)
+		np.testing.assert_array_equal(anios, esperado.index.to_numpy())
+		np.testing.assert_array_equal(valores, esperado.to_numpy())
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+import instantanea_gas
+from instantanea_gas import cargar_con_instantanea
+
+
+@pytest.fixture
+def fuente(tmp_path):
+	ruta = tmp_path / 'produccion_gas_resumenes.xlsx'
+	ruta.write_bytes(b'version 1')
+	return ruta
+
+
+def construir_contando(llamadas):
+	def construir():
+		llamadas.append(1)
+		return (pd.DataFrame({'AÑO': np.array([2013, 2014], dtype=np.int16), 'CAMPO': pd.Categorical(['A', 'B']),
+			'PRODUCCION FISCALIZADA': [1.5, 2.5]}),)
+	return construir
+
+
+def test_se_reconstruye_solo_cuando_cambia_el_contenido(fuente, tmp_path):
+	llamadas = []
+	construir = construir_contando(llamadas)
+	ruta = str(tmp_path / 'datos.instantanea.pkl')
+	(primero,) = cargar_con_instantanea(ruta, [str(fuente)], construir)
+	(segundo,) = cargar_con_instantanea(ruta, [str(fuente)], construir)
+	assert len(llamadas) == 1
+	assert_frame_equal(segundo, primero)
+
+	# Otra fecha de modificación con el mismo contenido: la instantánea sigue vigente
+	os.utime(fuente, (1, 1))
+	cargar_con_instantanea(ruta, [str(fuente)], construir)
+	assert len(llamadas) == 1
+
+	fuente.write_bytes(b'version 2')
+	cargar_con_instantanea(ruta, [str(fuente)], construir)
+	cargar_con_instantanea(ruta, [str(fuente)], construir)
+	assert len(llamadas) == 2
+
+
+def test_otra_version_de_la_limpieza_invalida_la_instantanea(fuente, tmp_path, monkeypatch):
+	llamadas = []
+	ruta = str(tmp_path / 'datos.instantanea.pkl')
+	cargar_con_instantanea(ruta, [str(fuente)], construir_contando(llamadas))
+	monkeypatch.setattr(instantanea_gas, 'VERSION_INSTANTANEA', instantanea_gas.VERSION_INSTANTANEA + 1)
+	cargar_con_instantanea(ruta, [str(fuente)], construir_contando(llamadas))
+	assert len(llamadas) == 2
+
+
+def test_sin_alguna_fuente_no_se_guarda(fuente, tmp_path):
+	llamadas = []
+	ruta = tmp_path / 'datos.instantanea.pkl'
+	cargar_con_instantanea(str(ruta), [str(fuente), str(tmp_path / 'falta.parquet')], construir_contando(llamadas))
+	assert llamadas == [1] and not ruta.exists()
+
+
+def test_formato_desconocido(fuente, tmp_path):
+	with pytest.raises(ValueError, match='json'):
+		cargar_con_instantanea(str(tmp_path / 'x'), [str(fuente)], construir_contando([]), formato='json')
+
+
+def test_arrow_igual_a_pickle_y_sin_copiar(fuente, tmp_path):
+	construir = construir_contando([])
+	(en_pickle,) = cargar_con_instantanea(str(tmp_path / 'datos.pkl'), [str(fuente)], construir)
+	(recien,) = cargar_con_instantanea(str(tmp_path / 'arrow'), [str(fuente)], construir, formato='arrow')
+	(leido,) = cargar_con_instantanea(str(tmp_path / 'arrow'), [str(fuente)], construir, formato='arrow')
+	assert_frame_equal(recien, en_pickle)
+	assert_frame_equal(leido, en_pickle)
+	# Las columnas numéricas apuntan al archivo abierto con memory map, no a una copia
+	assert not leido['PRODUCCION FISCALIZADA'].to_numpy().flags.writeable
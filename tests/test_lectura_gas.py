@@ -0,0 +1,60 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from lectura_gas import COLUMNAS_HOJA, PlanHoja, _cerrar_libros, huella_encabezado, leer_hoja, leer_libros, listar_tareas, plan_hoja
+
+
+def test_lector_streaming_igual_a_read_excel(archivos_sinteticos):
+	tareas = listar_tareas(archivos_sinteticos)
+	assert tareas
+	try:
+		for tarea in tareas:
+			assert_frame_equal(leer_hoja(tarea, 'streaming'), leer_hoja(tarea, 'pandas'), obj=f'{tarea[0]}:{tarea[1]}')
+	finally:
+		_cerrar_libros()
+
+
+def test_lectura_en_paralelo_igual_a_en_serie(archivos_sinteticos):
+	en_serie = leer_libros(archivos_sinteticos, procesos=1)
+	en_paralelo = leer_libros(archivos_sinteticos, procesos=2)
+	assert list(en_paralelo) == list(en_serie) == archivos_sinteticos
+	for archivo, (hojas, dfs) in en_serie.items():
+		hojas_paralelo, dfs_paralelo = en_paralelo[archivo]
+		assert hojas_paralelo == hojas
+		for a, b in zip(dfs_paralelo, dfs):
+			assert_frame_equal(a, b)
+
+
+def leer_hoja_completa(tarea):
+	"""Hoja mensual como la leía el ETL antes de los planes: todas las columnas y el encabezado limpiado en cada hoja"""
+	archivo, hoja, anio, mes = tarea
+	df = pd.read_excel(archivo, sheet_name=hoja)
+	df.columns = df.columns.str.replace('\n', ' ', regex=True).str.replace('\r', ' ', regex=True)
+	df.columns = df.columns.str.strip().str.upper()
+	prod_cols = [c for c in df.columns if 'PRODUCCION' in c and 'FISCALIZADA' in c]
+	if prod_cols and prod_cols[0] != 'PRODUCCION FISCALIZADA':
+		df['PRODUCCION FISCALIZADA'] = df[prod_cols[0]]
+	df['AÑO'] = anio
+	df['MES'] = mes
+	return df
+
+
+def test_plan_de_lectura_igual_a_leer_toda_la_hoja(archivos_sinteticos):
+	tareas = listar_tareas(archivos_sinteticos)
+	try:
+		for tarea in tareas:
+			con_plan = leer_hoja(tarea, 'pandas')
+			completa = leer_hoja_completa(tarea)
+			assert set(con_plan.columns) == set(COLUMNAS_HOJA + ['AÑO', 'MES']) & set(completa.columns)
+			assert_frame_equal(con_plan, completa[list(con_plan.columns)], obj=f'{tarea[0]}:{tarea[1]}')
+	finally:
+		_cerrar_libros()
+
+
+def test_plan_por_huella_del_encabezado():
+	encabezado = ('Campo', 'CONTRATO\n', ' Empresa', 'Observaciones', 'Producción', 'PRODUCCION\nFISCALIZADA (KPC)', None, None)
+	plan = plan_hoja(encabezado)
+	assert plan == PlanHoja([0, 1, 2, 5], ['CAMPO', 'CONTRATO', 'EMPRESA', 'PRODUCCION FISCALIZADA'])
+	# Mismo encabezado, aunque traiga otras celdas vacías al final: el plan ya calculado
+	assert plan_hoja(encabezado[:-1]) is plan
+	assert huella_encabezado(encabezado) != huella_encabezado(('CAMPO',) + encabezado[1:])
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+
+import openpyxl
+import pytest
+from pandas.testing import assert_frame_equal
+
+import manifiesto_gas
+from lectura_gas import leer_archivos
+from manifiesto_gas import ARCHIVO_MANIFIESTO, leer_archivos_incremental
+
+
+@pytest.fixture
+def copia(archivos_sinteticos, tmp_path):
+	"""Copia de los libros sintéticos que cada prueba puede cambiar, y la carpeta de su caché"""
+	entrada = tmp_path / 'entrada'
+	entrada.mkdir()
+	archivos = [shutil.copy2(archivo, entrada) for archivo in archivos_sinteticos]
+	return archivos, str(tmp_path / 'cache')
+
+
+@pytest.fixture
+def leidos(monkeypatch):
+	"""Archivos que leer_archivos_incremental manda a leer en cada llamada"""
+	llamadas = []
+	leer_libros = manifiesto_gas.leer_libros
+
+	def registrar(archivos, *args, **kwargs):
+		llamadas.append([os.path.basename(a) for a in archivos])
+		return leer_libros(archivos, *args, **kwargs)
+	monkeypatch.setattr(manifiesto_gas, 'leer_libros', registrar)
+	return llamadas
+
+
+def assert_mismas_hojas(resultado, esperado):
+	assert len(resultado) == len(esperado)
+	for a, b in zip(resultado, esperado):
+		assert_frame_equal(a, b)
+
+
+def test_solo_se_leen_los_archivos_nuevos_o_cambiados(copia, leidos):
+	archivos, dir_cache = copia
+	nombres = [os.path.basename(a) for a in archivos]
+	completo = leer_archivos(archivos)
+
+	assert_mismas_hojas(leer_archivos_incremental(archivos, dir_cache), completo)
+	assert leidos == [nombres]
+
+	# Sin cambios, o solo con otra fecha de modificación: todo sale del caché
+	assert_mismas_hojas(leer_archivos_incremental(archivos, dir_cache), completo)
+	os.utime(archivos[0])
+	assert_mismas_hojas(leer_archivos_incremental(archivos, dir_cache), completo)
+	assert leidos == [nombres]
+
+	# Otro contenido: solo se vuelve a leer ese archivo
+	libro = openpyxl.load_workbook(archivos[1])
+	libro.worksheets[1].cell(row=2, column=1).value = 'CAMPO CAMBIADO'
+	libro.save(archivos[1])
+	assert_mismas_hojas(leer_archivos_incremental(archivos, dir_cache), leer_archivos(archivos))
+	assert leidos[-1] == [nombres[1]]
+
+
+def test_archivos_borrados_salen_del_manifiesto(copia, leidos):
+	archivos, dir_cache = copia
+	leer_archivos_incremental(archivos, dir_cache)
+	assert_mismas_hojas(leer_archivos_incremental(archivos[1:], dir_cache), leer_archivos(archivos[1:]))
+	assert len(leidos) == 1
+	with open(os.path.join(dir_cache, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+		manifiesto = json.load(f)
+	assert sorted(manifiesto['archivos']) == sorted(os.path.basename(a) for a in archivos[1:])
+	assert sorted(os.listdir(dir_cache)) == sorted(
+		[ARCHIVO_MANIFIESTO] + [os.path.splitext(os.path.basename(a))[0] + '.pkl' for a in archivos[1:]])
+
+
+def test_el_etl_guarda_el_cache_en_la_salida(carpeta_sintetica, salida_etl):
+	assert not (carpeta_sintetica / '.cache_gas').exists()
+	assert (salida_etl / '.cache_gas' / ARCHIVO_MANIFIESTO).exists()
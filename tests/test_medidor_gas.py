@@ -0,0 +1,21 @@
+from medidor_gas import MedidorRespuestas
+
+
+def test_estadisticas_por_etiqueta():
+	medidor = MedidorRespuestas()
+	for etiqueta, tamano in [('general/rango', 100), ('campo/pestana', 5000), ('general/rango', 301)]:
+		medidor.registrar(etiqueta, tamano)
+	assert medidor.estadisticas() == {
+		'campo/pestana': {'respuestas': 1, 'bytes': 5000, 'maximo': 5000, 'ultimo': 5000, 'promedio': 5000},
+		'general/rango': {'respuestas': 2, 'bytes': 401, 'maximo': 301, 'ultimo': 301, 'promedio': 200},
+	}
+
+
+def test_aviso_sobre_el_presupuesto(capsys):
+	medidor = MedidorRespuestas(presupuesto_bytes=1024)
+	medidor.registrar('general/rango', 1024)
+	assert capsys.readouterr().out == ''
+	medidor.registrar('departamento/pestana', 4096)
+	assert 'departamento/pestana' in capsys.readouterr().out
+	MedidorRespuestas().registrar('general/rango', 10 ** 9)
+	assert capsys.readouterr().out == ''
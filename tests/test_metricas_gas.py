@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+from metricas_gas import LIMITES_SEGUNDOS, RegistroMetricas
+
+
+def test_texto_con_formato_de_prometheus():
+	registro = RegistroMetricas()
+	registro.histograma('gas_total_segundos', "Pedido completo", LIMITES_SEGUNDOS, ('pestana',))
+	registro.contador('gas_pedidos_total', "Pedidos", ('pestana',))
+	registro.observar('gas_total_segundos', 0.02, 'general')
+	registro.observar('gas_total_segundos', 3, 'general')
+	registro.incrementar('gas_pedidos_total', 'general', cantidad=2)
+	lineas = registro.texto().splitlines()
+	assert lineas[:2] == ['# HELP gas_total_segundos Pedido completo', '# TYPE gas_total_segundos histogram']
+	assert 'gas_total_segundos_bucket{pestana="general",le="0.01"} 0' in lineas
+	assert 'gas_total_segundos_bucket{pestana="general",le="0.025"} 1' in lineas
+	assert 'gas_total_segundos_bucket{pestana="general",le="+Inf"} 2' in lineas
+	assert 'gas_total_segundos_sum{pestana="general"} 3.02' in lineas
+	assert 'gas_total_segundos_count{pestana="general"} 2' in lineas
+	assert '# TYPE gas_pedidos_total counter' in lineas
+	assert 'gas_pedidos_total{pestana="general"} 2' in lineas
+
+
+def test_etiquetas_escapadas():
+	registro = RegistroMetricas()
+	registro.contador('gas_pedidos_total', "Pedidos", ('pestana',))
+	registro.incrementar('gas_pedidos_total', 'x"} 1\nevil_metric{a="b\\')
+	lineas = registro.texto().splitlines()
+	assert lineas[-1] == 'gas_pedidos_total{pestana="x\\"} 1\\nevil_metric{a=\\"b\\\\"} 1'
+	assert not any(linea.startswith('evil_metric') for linea in lineas)
+
+
+def test_carpeta_compartida_suma_workers_vivos_y_borra_los_terminados(tmp_path):
+	worker = RegistroMetricas(directorio=str(tmp_path))
+	worker.contador('gas_pedidos_total', "Pedidos", ('pestana',))
+	worker.incrementar('gas_pedidos_total', 'general', cantidad=2)
+
+	# Un worker que ya terminó: su pid no corresponde a ningún proceso
+	terminado = subprocess.Popen([sys.executable, '-c', 'pass'])
+	terminado.wait()
+	ruta_terminado = tmp_path / f'{terminado.pid}.json'
+	ruta_terminado.write_text(json.dumps({'gas_pedidos_total': [[['general'], 5]]}))
+	# Otro worker vivo (este proceso de pruebas lo representa con el pid del padre)
+	(tmp_path / f'{os.getppid()}.json').write_text(json.dumps({'gas_pedidos_total': [[['general'], 3]]}))
+
+	assert 'gas_pedidos_total{pestana="general"} 5' in worker.texto().splitlines()
+	assert not ruta_terminado.exists()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import recarga_gas
+from recarga_gas import DatosVersionados, bloqueo_archivo
+
+
+@pytest.fixture
+def fuente(tmp_path):
+	ruta = tmp_path / 'produccion_gas_resumenes.xlsx'
+	ruta.write_text('1')
+	return ruta
+
+
+def datos_de(fuente):
+	return DatosVersionados(lambda: fuente.read_text(), lambda: [str(fuente)], intervalo=0)
+
+
+def cambiar(fuente, contenido):
+	fuente.write_text(contenido)
+	stat = fuente.stat()
+	os.utime(fuente, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_se_reemplaza_tras_dos_firmas_iguales(fuente):
+	datos = datos_de(fuente)
+	anterior = datos.actual()
+	assert (anterior.numero, anterior.datos) == (1, '1')
+	assert datos.revisar() is None
+
+	cambiar(fuente, '22')
+	pendiente = datos.revisar()
+	assert pendiente is not None and datos.actual() is anterior
+	# El ETL sigue escribiendo: la firma vuelve a cambiar y se espera otra revisión
+	cambiar(fuente, '333')
+	pendiente = datos.revisar(pendiente)
+	assert datos.actual() is anterior
+	assert datos.revisar(pendiente) is None
+	assert (datos.actual().numero, datos.actual().datos) == (2, '333')
+	# La versión que ya se había tomado no cambia
+	assert anterior.datos == '1'
+
+
+@pytest.mark.skipif(recarga_gas.fcntl is None, reason='sin fcntl siempre se toma el bloqueo')
+def test_no_reemplaza_si_otro_worker_tiene_el_bloqueo(fuente, tmp_path):
+	ruta_bloqueo = str(tmp_path / '.recarga.lock')
+	datos = DatosVersionados(lambda: fuente.read_text(), lambda: [str(fuente)], intervalo=0, ruta_bloqueo=ruta_bloqueo)
+	cambiar(fuente, '22')
+	pendiente = datos.revisar()
+	with bloqueo_archivo(ruta_bloqueo) as tomado:
+		assert tomado
+		assert datos.revisar(pendiente) == pendiente
+		assert datos.actual().numero == 1
+	assert datos.revisar(pendiente) is None
+	assert datos.actual().datos == '22'
+
+
+@pytest.mark.skipif(recarga_gas.fcntl is None, reason='sin fcntl siempre se toma el bloqueo')
+def test_bloqueo_ocupado(tmp_path):
+	ruta = str(tmp_path / '.recarga.lock')
+	with bloqueo_archivo(ruta) as primero:
+		with bloqueo_archivo(ruta) as segundo:
+			assert (primero, segundo) == (True, False)
+	with bloqueo_archivo(ruta) as tercero:
+		assert tercero
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from agregacion_gas import agregar_niveles
+from reportes_gas import escribir_reportes, ruta_hermana
+
+
+@pytest.fixture(scope='module')
+def hojas(hechos_sinteticos):
+	"""Hojas con categóricas, MES ordenado, nulos y años como nombres de columna"""
+	resumenes = agregar_niveles(hechos_sinteticos)
+	serie = resumenes['Anual_Por_Campo'].pivot(index='CAMPO_LIMPIO', columns='AÑO', values='PRODUCCION FISCALIZADA')
+	return {
+		'Totales_Mensuales': resumenes['Totales_Mensuales'],
+		'Anual_Detalle': resumenes['Anual_Detalle'],
+		'Serie_Campo': serie.reset_index(),
+		'Con_Nulos': pd.DataFrame({'CAMPO': ['A', None, 'C'], 'VALOR': [1.5, np.nan, 3.0]}),
+	}
+
+
+def test_libro_igual_al_de_to_excel(hojas, tmp_path):
+	ruta = str(tmp_path / 'nuevo.xlsx')
+	assert escribir_reportes({ruta: hojas}) == [ruta]
+	referencia = tmp_path / 'to_excel.xlsx'
+	with pd.ExcelWriter(referencia) as libro:
+		for nombre, df in hojas.items():
+			df.to_excel(libro, sheet_name=nombre, index=False)
+	nuevo, esperado = pd.read_excel(ruta, sheet_name=None), pd.read_excel(referencia, sheet_name=None)
+	assert list(nuevo) == list(esperado) == list(hojas)
+	for nombre in hojas:
+		assert_frame_equal(nuevo[nombre], esperado[nombre], obj=nombre)
+
+
+def test_formatos_extra_en_paralelo(hojas, tmp_path):
+	pytest.importorskip('pyarrow')
+	ruta = str(tmp_path / 'resumenes.xlsx')
+	escritas = escribir_reportes({ruta: hojas}, formatos=['csv', 'parquet'], procesos=2)
+	assert sorted(escritas) == sorted([ruta] + [ruta_hermana(ruta, h, f) for h in hojas for f in ('csv', 'parquet')])
+	parquet = pd.read_parquet(ruta_hermana(ruta, 'Totales_Mensuales', 'parquet'))
+	assert_frame_equal(parquet, hojas['Totales_Mensuales'], check_categorical=False)
+	csv = pd.read_csv(ruta_hermana(ruta, 'Con_Nulos', 'csv'))
+	assert_frame_equal(csv, hojas['Con_Nulos'])
+
+
+def test_formato_desconocido():
+	with pytest.raises(ValueError, match='xml'):
+		escribir_reportes({}, formatos=['xml'])
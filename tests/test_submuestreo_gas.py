@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from submuestreo_gas import lttb, ventana
+
+
+def lttb_referencia(x, y, umbral):
+	"""LTTB punto a punto, como en el artículo, para comparar con la versión vectorizada"""
+	n = len(x)
+	bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+	elegidos, a = [0], 0
+	for k in range(umbral - 2):
+		i, j = bordes[k], bordes[k + 1]
+		if k + 2 < len(bordes):
+			siguiente = range(bordes[k + 1], bordes[k + 2])
+			cx, cy = np.mean([x[p] for p in siguiente]), np.mean([y[p] for p in siguiente])
+		else:
+			cx, cy = x[n - 1], y[n - 1]
+		mejor, area_mejor = i, -1.0
+		for p in range(i, j):
+			area = abs((x[a] - cx) * (y[p] - y[a]) - (x[a] - x[p]) * (cy - y[a]))
+			if area > area_mejor:
+				mejor, area_mejor = p, area
+		a = mejor
+		elegidos.append(a)
+	return np.array(elegidos + [n - 1])
+
+
+@pytest.fixture
+def serie():
+	rng = np.random.default_rng(7)
+	x = np.arange(1000, dtype=np.float64)
+	return x, np.cumsum(rng.normal(size=len(x)))
+
+
+@pytest.mark.parametrize('umbral', [3, 4, 10, 97, 500, 999])
+def test_lttb_conserva_extremos_y_ordena(serie, umbral):
+	x, y = serie
+	elegidos = lttb(x, y, umbral)
+	assert len(elegidos) == umbral
+	assert elegidos[0] == 0 and elegidos[-1] == len(x) - 1
+	assert np.all(np.diff(elegidos) > 0)
+
+
+@pytest.mark.parametrize('umbral', [3, 10, 97, 500])
+def test_lttb_igual_a_referencia(serie, umbral):
+	x, y = serie
+	np.testing.assert_array_equal(lttb(x, y, umbral), lttb_referencia(x, y, umbral))
+
+
+@pytest.mark.parametrize('umbral', [0, 2, 1000, 5000])
+def test_lttb_sin_reducir(serie, umbral):
+	x, y = serie
+	np.testing.assert_array_equal(lttb(x, y, umbral), np.arange(len(x)))
+
+
+def test_ventana_incluye_un_punto_a_cada_lado():
+	x = np.array([2013.0, 2013.5, 2014.0, 2014.5, 2015.0])
+	assert ventana(x, 2014, 2014.2) == slice(1, 4)
+	assert ventana(x, 2010, 2020) == slice(0, 5)
+	assert ventana(x, 2013, 2013) == slice(0, 2)